@@ -1,9 +1,14 @@
+import time
+import uuid
+
 from celery import shared_task
 
-from core.models import ProfileModel
+from ai.utils.credit_ledger import CreditLedger
+
+@shared_task
+def apply_cost_task(user_id, cost, source=""):
+    CreditLedger.apply({user_id: cost}, [{"user_id": user_id, "amount": cost, "source": source, "charged_at": time.time()}], uuid.uuid4().hex)
 
 @shared_task
-def apply_cost_task(user_id, cost):
-    profile = ProfileModel.objects.filter(user_id=user_id).first()
-    profile.credit = profile.credit - cost
-    profile.save()
\ No newline at end of file
+def flush_credit_ledger_task():
+    CreditLedger().flush()
@@ -1,25 +1,85 @@
+import logging
 import re
+import json
 import random
+import asyncio
+import threading
+from concurrent.futures import ThreadPoolExecutor
 
-from ai.utils.chunk_manager import ChunkPipeline
+from ai.utils.chunk_manager import ChunkPipeline, count_tokens
+from ai.utils.summary_cache import SummaryCache
+from ai.utils.response_cache import ResponseCache
+from ai.utils.running_summary import RunningSummary
+from ai.utils.rate_limiter import RateLimiter
+from ai.utils.job_checkpoint import JobCheckpoint
+from ai.utils.prompt_builder import PromptBuilder
+from ai.utils.usage_metrics import UsageMetrics
+from ai.utils.cost_planner import CostPlanner
+from ai.utils.credit_ledger import CreditLedger
+from ai.utils.conversation_memory import ConversationMemory
+from ai.utils.tracing import Tracer
 from ai.tasks import apply_cost_task
 
+logger = logging.getLogger(__name__)
+
+@Tracer.trace_methods
 class BaseAIManager:
     """
     Base class for AI managers.
     ai_type (str): The type of AI being used (e.g., "open_ai"); options are "open_ai", "google".
+    priority (str): Rate limit priority class of the calls: "live" (default), "prebuild" or "ingestion".
     """
-    def __init__(self, ai_type="open_ai", cur_user=None):
+    # Providers with a batch API set this and implement _batch_request/_apply_batch_response.
+    SUPPORTS_BATCH = False
+
+    def __init__(self, ai_type="open_ai", cur_user=None, priority="live"):
         self.messages = []
         self.prompt = ""
         self.cost = 0
         self.ai_type = ai_type
         self.cur_user = cur_user
+        self.chunk_mode = "chars"
+        self.chunk_token_model = None
+        self.chunk_workers = None
+        self.chunk_concurrency = 4
+        self.chunk_retries = 2
+        self.summary_cache = SummaryCache()
+        self.response_cache = ResponseCache()
+        self.rate_limiter = RateLimiter.for_provider(ai_type)
+        self.priority = priority
+        self.batch_manager = None
+        self._batch_requests = None
+        self._batch_replay = None
+        self.last_job_id = None
+        self.usage = {field: 0 for field in UsageMetrics.FIELDS}
+        self.usage_metrics = UsageMetrics()
+        self.credit_ledger = CreditLedger()
+        self.charge_credit = True
+        self.memory = ConversationMemory(self)
+        self._thread_state = threading.local()
+        self._cost_lock = threading.Lock()
 
     def _apply_cost(self, cost):
-        self.cost += cost
-        if self.cur_user:
-            apply_cost_task.delay(self.cur_user.id, cost)
+        with self._cost_lock:
+            self.cost += cost
+        if self.cur_user and self.charge_credit:
+            source = f"{self.ai_type}:{self._model_name()}"
+            if not self.credit_ledger.charge(self.cur_user.id, cost, source):
+                apply_cost_task.delay(self.cur_user.id, cost, source)
+
+    def _record_usage(self, prompt_tokens, completion_tokens, cached_tokens=0):
+        with self._cost_lock:
+            self.usage["requests"] += 1
+            self.usage["prompt_tokens"] += prompt_tokens or 0
+            self.usage["cached_tokens"] += cached_tokens or 0
+            self.usage["completion_tokens"] += completion_tokens or 0
+        if self.usage_metrics is not None:
+            self.usage_metrics.record(self.ai_type, self._model_name(), prompt_tokens, completion_tokens, cached_tokens)
+        model = self._model_name()
+        Tracer.observe("ai_tokens", prompt_tokens or 0, provider=self.ai_type, model=model, kind="prompt")
+        Tracer.observe("ai_tokens", completion_tokens or 0, provider=self.ai_type, model=model, kind="completion")
+        if cached_tokens:
+            Tracer.observe("ai_tokens", cached_tokens, provider=self.ai_type, model=model, kind="cached")
     
     def _clean_code_block(self, response_text):
         pattern = r"^```(?:json|html)?\n?(.*)```$"
@@ -44,6 +104,102 @@ class BaseAIManager:
         characters = "abcdefghijklmnopqrstuvwxyzABCDEFGHIJKLMNOPQRSTUVWXYZ0123456789"
         return "".join(random.choice(characters) for _ in range(length))
     
+    def _model_name(self):
+        model = getattr(self, "model", None)
+        return getattr(model, "model_name", model) or self.ai_type
+
+    def _summary_chunk_mode(self):
+        if self.chunk_mode == "token_budget" and self.chunk_token_model:
+            return f"token_budget:{self.chunk_token_model}"
+        return self.chunk_mode
+
+    def _get_cached_summary(self, kind, text, max_length, max_chunk_size, strategy="rolling"):
+        if self.summary_cache is None:
+            return None
+        return self.summary_cache.get(kind, text, self._model_name(), max_length, max_chunk_size, strategy=strategy, chunk_mode=self._summary_chunk_mode())
+
+    def _set_cached_summary(self, kind, text, max_length, max_chunk_size, summary, strategy="rolling"):
+        if self.summary_cache is not None and summary:
+            self.summary_cache.set(kind, text, self._model_name(), max_length, max_chunk_size, summary, strategy=strategy, chunk_mode=self._summary_chunk_mode())
+
+    def _response_cache_key(self, payload, max_token, use_cache=False):
+        """
+        Return the response cache key of a request, or None if caching is disabled for it.
+        """
+        if not use_cache or self.response_cache is None:
+            return None
+        return self.response_cache.build_key(self.ai_type, self._model_name(), payload, max_token)
+
+    def _get_cached_response(self, cache_key):
+        if cache_key is None:
+            return None
+        self._thread_state.last_cache_key = cache_key
+        return self.response_cache.get(cache_key)
+
+    def _set_cached_response(self, cache_key, response):
+        if cache_key is not None and response:
+            self.response_cache.set(cache_key, response)
+
+    def _estimate_tokens(self, payload, max_token=0):
+        if isinstance(payload, list):
+            payload = "\n".join(str(message.get("content", "")) if isinstance(message, dict) else str(message) for message in payload)
+        return count_tokens(payload or "", self._model_name()) + (max_token or 0)
+
+    def _acquire_rate_limit(self, payload, max_token=0):
+        """
+        Wait for provider capacity before a call. payload is the messages or prompt of the call.
+        """
+        if self.rate_limiter is None:
+            return
+        self.rate_limiter.acquire(self._estimate_tokens(payload, max_token), self.priority, self.cur_user.id if self.cur_user else None)
+
+    async def _aacquire_rate_limit(self, payload, max_token=0):
+        if self.rate_limiter is None:
+            return
+        await self.rate_limiter.aacquire(self._estimate_tokens(payload, max_token), self.priority, self.cur_user.id if self.cur_user else None)
+
+    def _batch_request(self, payload, max_token):
+        """
+        Return (url, body) of the batch request for a call, or None if the provider has no batch mode
+        (SUPPORTS_BATCH is False); the call is then made live.
+        """
+        return None
+
+    def _apply_batch_response(self, body):
+        """
+        Apply the cost of a batch response body and return its text. Implemented by providers that support batch mode.
+        """
+        return None
+
+    def _batch_intercept(self, payload, max_token, cache_key=None):
+        """
+        Called by generate_response after the cache lookup. While chunk tasks are collected, the request is recorded
+        and an empty response returned; while they are replayed, the next batch response is returned. Otherwise None.
+        Threads that set self._thread_state.skip_batch (conversation memory refreshes) always get None.
+        """
+        if getattr(self._thread_state, "skip_batch", False):
+            return None
+        if self._batch_requests is not None:
+            request = self._batch_request(payload, max_token)
+            if request is None:
+                return None
+            self._batch_requests.append(request)
+            return ""
+        if self._batch_replay:
+            result = self._apply_batch_response(self._batch_replay.pop(0))
+            self._set_cached_response(cache_key, result)
+            return result
+        return None
+
+    def _job_checkpoint(self, resume_job_id, namespace):
+        """
+        Return the checkpoint of a pipeline run, kept under resume_job_id (a new id starts a checkpointed job).
+        Without an id nothing is checkpointed, so one-off runs do not write their chunks to the cache.
+        """
+        checkpoint = JobCheckpoint(resume_job_id, namespace=namespace, enabled=bool(resume_job_id))
+        self.last_job_id = checkpoint.job_id if checkpoint.enabled else None
+        return checkpoint
+
     def get_cost(self):
         """
         Get the total accumulated cost of API calls.
@@ -68,18 +224,47 @@ class BaseAIManager:
         """
         self.cost = 0
 
-    def clear_messages(self):
+    def _estimate_cost(self, input_tokens, output_tokens, model=None):
+        """
+        Return the expected cost of a call from the provider's pricing. Implemented by providers.
+        """
+        return 0
+
+    def get_usage(self):
         """
-        Clear the message history.
+        Get the token usage of this manager's requests, including the prompt tokens served from the provider's prompt cache.
+
+        Returns:
+            dict: {"requests", "prompt_tokens", "cached_tokens", "completion_tokens", "cache_hit_rate"}
+
+        Example:
+            print(manager.get_usage()["cache_hit_rate"])
+        """
+        usage = dict(self.usage)
+        usage["cache_hit_rate"] = usage["cached_tokens"] / usage["prompt_tokens"] if usage["prompt_tokens"] else 0.0
+        return usage
+
+    def clear_messages(self, clear_memory=False):
+        """
+        Clear the message history. The conversation memory (self.memory) is kept, so a summary refresh that is
+        running or already done is not thrown away when a request clears the history.
+        Does nothing inside a background conversation summary refresh.
+
+        Args:
+            clear_memory (bool): Also forget the conversation memory (start a new conversation). Default is False.
 
         Returns:
             None
 
         Example:
-            manager.clear_messages()
+            manager.clear_messages(clear_memory=True)
         """
+        if getattr(self._thread_state, "keep_messages", False):
+            return
         self.messages = []
         self.prompt = ""
+        if clear_memory:
+            self.memory.clear()
 
     def build_simple_text_from_html(self, html_src):
         """
@@ -95,31 +280,102 @@ class BaseAIManager:
         text = chunk_pipeline.process(html_src, "get_text")
         return text
 
-    def build_chunks(self, text, max_chunk_size=1000, chunk_mode="html_aware"):
+    def build_chunks(self, text, max_chunk_size=1000, chunk_mode=None):
         """
         Chunk text into manageable pieces for processing.
         
         Args:
             text (str): The input text to chunk.
             max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            chunk_mode (str): 'chars' or 'token_budget'. If None, uses self.chunk_mode.
+                In 'token_budget' mode, max_chunk_size is a number of tokens counted with self.chunk_token_model's encoder.
         
         Returns:
-            list: List of chunk dicts with 'html' and 'text' keys.
+            list: List of Chunk objects; chunk["html"] and chunk["text"] are sliced lazily from the shared source.
         
         Example:
             chunks = manager.build_chunks(long_text, max_chunk_size=500)
+            chunks = manager.build_chunks(long_text, max_chunk_size=3000, chunk_mode="token_budget")
         """
-        chunk_pipeline = ChunkPipeline(max_text_chars=max_chunk_size, backtrack=300)
-        chunks = chunk_pipeline.process(text, "get_chunks", chunk_mode)
-        for i in range(len(chunks) - 1):
-            head, tail = chunk_pipeline.chunker.get_incomplete_end_html_aware(chunks[i]["html"])
-            if tail:
-                chunks[i]["html"] = head
-                chunks[i]["text"] = self.build_simple_text_from_html(head)
-                chunks[i + 1]["html"] = tail + chunks[i + 1]["html"]
-                chunks[i + 1]["text"] = self.build_simple_text_from_html(tail + chunks[i + 1]["text"])
-        return chunks
-    
+        return list(self.iter_chunks(text, max_chunk_size=max_chunk_size, chunk_mode=chunk_mode))
+
+    def iter_chunks(self, text, max_chunk_size=1000, chunk_mode=None):
+        """
+        Lazily chunk text, moving each chunk's incomplete sentence to the next chunk.
+        Plain text is produced in the same pass as the HTML, so large documents are never re-parsed.
+
+        Args:
+            text (str): The input text to chunk (can be HTML).
+            max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            chunk_mode (str): 'chars' or 'token_budget'. If None, uses self.chunk_mode.
+
+        Returns:
+            generator: Chunk objects exposing 'html' and 'text'.
+
+        Example:
+            for chunk in manager.iter_chunks(long_text, max_chunk_size=500):
+                print(chunk["text"])
+        """
+        chunk_pipeline = self._build_chunk_pipeline(max_chunk_size, chunk_mode)
+        return chunk_pipeline.iter_chunks(text)
+
+    def build_chunk_tree(self, text, sizes=(15000, 5000, 1000), chunk_mode=None):
+        """
+        Chunk text at several resolutions in one pass, with every child chunk nested inside its parent.
+        A pipeline can summarize the coarse level and hand each parent's summary to its children
+        (via chunk["parent"]) without chunking the text again.
+
+        Args:
+            text (str): The input text to chunk (can be HTML).
+            sizes (tuple): Chunk sizes from coarsest to finest. Default is (15000, 5000, 1000).
+            chunk_mode (str): 'chars' or 'token_budget'. If None, uses self.chunk_mode.
+
+        Returns:
+            dict: {"sizes": [...], "levels": [[chunk, ...], ...]} with the coarsest level first.
+                Each chunk has 'html', 'text', 'start', 'end', 'parent' and 'children' keys.
+
+        Example:
+            tree = manager.build_chunk_tree(long_text, sizes=(15000, 1000))
+            for chunk in tree["levels"][1]:
+                parent_summary = summaries[chunk["parent"]]
+        """
+        chunk_pipeline = self._build_chunk_pipeline(min(sizes), chunk_mode)
+        return chunk_pipeline.build_chunk_tree(text, sizes)
+
+    def set_chunk_mode(self, chunk_mode="chars", token_model=None):
+        """
+        Set how every pipeline of this manager sizes its chunks.
+        In 'token_budget' mode, all max_chunk_size arguments (e.g. in summarize, translate) are token budgets.
+
+        Args:
+            chunk_mode (str): 'chars' or 'token_budget'. Default is 'chars'.
+            token_model (str): Model whose tiktoken encoder counts tokens (e.g., 'gpt-4o'). Default is the manager's encoder.
+
+        Returns:
+            None
+
+        Example:
+            manager.set_chunk_mode("token_budget", token_model="gpt-4o")
+        """
+        if chunk_mode not in ("chars", "token_budget"):
+            raise ValueError(f"Unsupported chunk_mode: {chunk_mode}")
+        self.chunk_mode = chunk_mode
+        if token_model:
+            self.chunk_token_model = token_model
+
+    def _build_chunk_pipeline(self, max_chunk_size, chunk_mode=None):
+        chunk_mode = chunk_mode or self.chunk_mode
+        if chunk_mode == "html_aware":
+            chunk_mode = "chars"
+        return ChunkPipeline(
+            max_text_chars=max_chunk_size,
+            backtrack=300,
+            chunk_mode=chunk_mode,
+            max_tokens=max_chunk_size if chunk_mode == "token_budget" else None,
+            token_model=self.chunk_token_model,
+            workers=self.chunk_workers,
+        )
+
     def add_message(self, *args, **kwargs):
         """
         Abstract method for adding a new message to build the prompt.
@@ -133,27 +389,56 @@ class BaseAIManager:
         Must be implemented in subclasses.
         """
         raise NotImplementedError("Subclasses must implement generate_response.")
+
+    async def agenerate_response(self, *args, **kwargs):
+        """
+        Async counterpart of generate_response.
+        Subclasses with an async client override this; the default runs generate_response in a worker thread.
+        """
+        return await asyncio.to_thread(self.generate_response, *args, **kwargs)
     
-    def summarize(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None):
+    def summarize(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None, strategy="rolling", max_concurrency=4, dry_run=False):
         """
         Iteratively summarize a long text by processing it chunk by chunk and accumulating the summary.
         For each chunk, the method combines the previous summary (if any) with the current chunk and asks the AI model to summarize them together.
         This process continues for all chunks, so the summary grows and evolves as more of the text is processed.
 
+        With strategy='map_reduce', the chunks are summarized independently and concurrently (at most max_concurrency requests in flight),
+        then the partial summaries are merged in groups of up to max_chunk_size characters, level by level, until a single summary remains.
+
+        Summaries are cached in self.summary_cache by (text hash, model, max_length, max_chunk_size, strategy, chunk mode), so later pipelines on the same text reuse them.
+        Set manager.summary_cache = None to disable the cache, or call manager.summary_cache.invalidate(text=text) to drop a document's summaries.
+
         Args:
             text (str): The text to summarize.
             max_length (int): Maximum number of tokens for each summary step. Default is 1000.
             max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            strategy (str): 'rolling' (sequential fold) or 'map_reduce' (concurrent). Default is 'rolling'.
+            max_concurrency (int): Maximum number of concurrent requests in 'map_reduce' mode. Default is 4.
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             str: The final accumulated summary of the entire text.
 
         Example:
             summary = manager.summarize(long_text)
+            summary = manager.summarize(long_text, max_chunk_size=15000, strategy="map_reduce", max_concurrency=8)
         """
+        if dry_run:
+            planner = CostPlanner(self)
+            return planner.plan("summarize", [planner.plan_summary("summary", text, max_length, max_chunk_size, strategy=strategy, max_concurrency=max_concurrency)])
+        if strategy not in ("rolling", "map_reduce"):
+            raise ValueError(f"Unsupported summarize strategy: {strategy}")
         if len(text) <= max_length:
             return text
+        cached = self._get_cached_summary("general", text, max_length, max_chunk_size, strategy=strategy)
+        if cached is not None:
+            return cached
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
+        if strategy == "map_reduce":
+            summary = self._summarize_map_reduce(chunks, max_length, max_chunk_size, progress_callback, max_concurrency)
+            self._set_cached_summary("general", text, max_length, max_chunk_size, summary, strategy=strategy)
+            return summary
         summary = ""
         i = 0
         for chunk in chunks:
@@ -162,20 +447,309 @@ class BaseAIManager:
             if progress_callback:
                 progress_callback(chunk=chunk, index=i, total=len(chunks))
             else:
-                print(msg)
+                logger.info(msg)
             input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
-            messages = [
-                {"role": "system", "content": "You are a summarization expert. Summarize the following text."},
-                {"role": "user", "content": input_text}
-            ]
-            prompt = f"Summarize the following text in at most {max_length} tokens:\n\n{input_text}"
-            if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_length, messages=messages)
-            elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_length, prompt=prompt)
-            summary = response
+            summary = self._summarize_step(input_text, max_length)
+        self._set_cached_summary("general", text, max_length, max_chunk_size, summary, strategy=strategy)
         return summary
-    
+
+    async def asummarize(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None, strategy="rolling", max_concurrency=4):
+        """
+        Async counterpart of summarize, built on agenerate_response.
+        In 'map_reduce' mode, chunk and reduce requests run with asyncio.gather, at most max_concurrency at a time.
+
+        Args:
+            text (str): The text to summarize.
+            max_length (int): Maximum number of tokens for each summary step. Default is 1000.
+            max_chunk_size (int): Maximum size of each chunk. Default is 1000.
+            strategy (str): 'rolling' (sequential fold) or 'map_reduce' (concurrent). Default is 'rolling'.
+            max_concurrency (int): Maximum number of concurrent requests in 'map_reduce' mode. Default is 4.
+
+        Returns:
+            str: The final summary of the entire text.
+
+        Example:
+            summary = await manager.asummarize(long_text, max_chunk_size=15000, strategy="map_reduce")
+        """
+        if strategy not in ("rolling", "map_reduce"):
+            raise ValueError(f"Unsupported summarize strategy: {strategy}")
+        if len(text) <= max_length:
+            return text
+        cached = await asyncio.to_thread(self._get_cached_summary, "general", text, max_length, max_chunk_size, strategy)
+        if cached is not None:
+            return cached
+        chunks = await asyncio.to_thread(self.build_chunks, text, max_chunk_size=max_chunk_size)
+        summary = ""
+        if strategy == "map_reduce" and chunks:
+            semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+            async def summarize_part(input_text):
+                async with semaphore:
+                    return await self._asummarize_step(input_text, max_length)
+
+            for i, chunk in enumerate(chunks, start=1):
+                msg = f"Processing chunk {i}/{len(chunks)}"
+                if progress_callback:
+                    progress_callback(chunk=chunk, index=i, total=len(chunks))
+                else:
+                    logger.info(msg)
+            partials = await asyncio.gather(*(summarize_part(chunk["text"]) for chunk in chunks))
+            while len(partials) > 1:
+                groups = self._group_partials(partials, max_chunk_size)
+                merged = await asyncio.gather(*(summarize_part("\n".join(group)) for group in groups if len(group) > 1))
+                merged = iter(merged)
+                partials = [next(merged) if len(group) > 1 else group[0] for group in groups]
+            summary = partials[0]
+        else:
+            for i, chunk in enumerate(chunks, start=1):
+                msg = f"Processing chunk {i}/{len(chunks)}"
+                if progress_callback:
+                    progress_callback(chunk=chunk, index=i, total=len(chunks))
+                else:
+                    logger.info(msg)
+                input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
+                summary = await self._asummarize_step(input_text, max_length)
+        await asyncio.to_thread(self._set_cached_summary, "general", text, max_length, max_chunk_size, summary, strategy)
+        return summary
+
+    def _summarize_request(self, input_text, max_length):
+        """
+        Build the generate_response keyword arguments of one summarization step for this provider.
+        """
+        if self.ai_type == "google":
+            return {"max_token": max_length, "prompt": f"Summarize the following text in at most {max_length} tokens:\n\n{input_text}"}
+        messages = [
+            {"role": "system", "content": "You are a summarization expert. Summarize the following text."},
+            {"role": "user", "content": input_text}
+        ]
+        return {"max_token": max_length, "messages": messages}
+
+    def _summarize_step(self, input_text, max_length):
+        return self.generate_response(**self._summarize_request(input_text, max_length), use_cache=True)
+
+    async def _asummarize_step(self, input_text, max_length):
+        return await self.agenerate_response(**self._summarize_request(input_text, max_length), use_cache=True)
+
+    def _group_partials(self, partials, max_chunk_size):
+        """
+        Group consecutive partial summaries into reduce inputs of up to max_chunk_size characters.
+        Every group takes at least two partials so that each reduce level strictly shrinks.
+        """
+        groups = []
+        for partial in partials:
+            if groups and (len(groups[-1]) < 2 or len("\n".join(groups[-1] + [partial])) <= max_chunk_size):
+                groups[-1].append(partial)
+            else:
+                groups.append([partial])
+        return groups
+
+    def _summarize_map_reduce(self, chunks, max_length, max_chunk_size, progress_callback=None, max_concurrency=4):
+        """
+        Summarize chunks concurrently, then reduce the partial summaries hierarchically.
+        progress_callback is called from the calling thread, in chunk order, as each chunk is submitted.
+
+        Args:
+            chunks (list): Chunks from build_chunks.
+            max_length (int): Maximum number of tokens for each summary step.
+            max_chunk_size (int): Maximum size of each group of partial summaries merged in one reduce step.
+            progress_callback (callable): Called as progress_callback(chunk=..., index=..., total=...).
+            max_concurrency (int): Maximum number of concurrent requests.
+
+        Returns:
+            str: The final summary.
+        """
+        if not chunks:
+            return ""
+        with ThreadPoolExecutor(max_workers=max(1, max_concurrency)) as executor:
+            futures = []
+            for i, chunk in enumerate(chunks, start=1):
+                msg = f"Processing chunk {i}/{len(chunks)}"
+                if progress_callback:
+                    progress_callback(chunk=chunk, index=i, total=len(chunks))
+                else:
+                    logger.info(msg)
+                futures.append(executor.submit(self._summarize_step, chunk["text"], max_length))
+            partials = [future.result() for future in futures]
+            level = 0
+            while len(partials) > 1:
+                level += 1
+                groups = self._group_partials(partials, max_chunk_size)
+                logger.info("Reducing %s partial summaries into %s (level %s)", len(partials), len(groups), level)
+                futures = [executor.submit(self._summarize_step, "\n".join(group), max_length) if len(group) > 1 else None for group in groups]
+                partials = [future.result() if future else group[0] for future, group in zip(futures, groups)]
+        return partials[0]
+
+    def _run_chunk_tasks(self, chunks, task, label, progress_callback=None, max_workers=None, batch=True, checkpoint=None):
+        """
+        Run task(i, chunk) for every chunk concurrently and return the results in chunk order.
+        progress_callback is called from the calling thread, in chunk order, as each chunk is submitted.
+        Chunks whose task raised are retried (only those) up to self.chunk_retries times; the last error is raised if they still fail.
+        If self.batch_manager is set, the chunk requests are run as one batch job instead (see _run_chunk_tasks_batched).
+        With a checkpoint, every parsed result is saved as soon as its chunk completes and chunks already saved under the label are skipped.
+
+        Args:
+            chunks (list): Chunks from build_chunks.
+            task (callable): task(i, chunk) -> result; its prompt must not depend on other chunks' results.
+            label (str): Progress message prefix (e.g. 'Translating chunk').
+            progress_callback (callable): Called as progress_callback(chunk=..., index=..., total=...).
+            max_workers (int): Number of concurrent tasks. Default is self.chunk_concurrency.
+            batch (bool): Use self.batch_manager if it is set. Default is True.
+            checkpoint (JobCheckpoint): If set, save and resume the results of the chunks.
+
+        Returns:
+            list: One result per chunk.
+        """
+        if checkpoint is not None:
+            return self._run_chunk_tasks_checkpointed(chunks, task, label, progress_callback, max_workers, batch, checkpoint)
+        if batch and self.batch_manager is not None and self.SUPPORTS_BATCH:
+            return self._run_chunk_tasks_batched(chunks, task, label, progress_callback, max_workers)
+        max_workers = max(1, max_workers or self.chunk_concurrency)
+        results = [None] * len(chunks)
+        pending = list(range(len(chunks)))
+        attempt = 0
+        with ThreadPoolExecutor(max_workers=max_workers) as executor:
+            while pending:
+                futures = {}
+                for i in pending:
+                    if attempt == 0:
+                        msg = f"{label} {i}/{len(chunks)}"
+                        if progress_callback:
+                            progress_callback(chunk=chunks[i], index=i, total=len(chunks))
+                        else:
+                            logger.info(msg)
+                    futures[i] = executor.submit(task, i, chunks[i])
+                failed = []
+                last_error = None
+                for i, future in futures.items():
+                    try:
+                        results[i] = future.result()
+                    except Exception as e:
+                        logger.warning("%s %s/%s failed: %s", label, i, len(chunks), e)
+                        failed.append(i)
+                        last_error = e
+                if failed and attempt >= self.chunk_retries:
+                    raise last_error
+                pending = failed
+                attempt += 1
+        return results
+
+    def _run_chunk_tasks_checkpointed(self, chunks, task, label, progress_callback, max_workers, batch, checkpoint):
+        done = checkpoint.get_chunks(label, len(chunks))
+        if done:
+            logger.info("Job %s: %s/%s chunks already done for '%s'", checkpoint.job_id, len(done), len(chunks), label)
+        todo = [i for i in range(len(chunks)) if i not in done]
+
+        def checkpointed_task(j, chunk):
+            self._thread_state.chunk_unparsed = False
+            self._thread_state.last_cache_key = None
+            result = task(todo[j], chunk)
+            if self._batch_requests is None and not self._thread_state.chunk_unparsed:
+                checkpoint.set_chunk(label, todo[j], result)
+            return result
+
+        def todo_progress_callback(chunk=None, index=None, total=None):
+            progress_callback(chunk=chunk, index=todo[index], total=len(chunks))
+
+        results = [done.get(i) for i in range(len(chunks))]
+        if todo:
+            todo_results = self._run_chunk_tasks([chunks[i] for i in todo], checkpointed_task, label, todo_progress_callback if progress_callback else None, max_workers, batch)
+            for i, result in zip(todo, todo_results):
+                results[i] = result
+        return results
+
+    def _mark_chunk_unparsed(self):
+        """
+        Called by a chunk task that falls back to a placeholder because the answer could not be parsed,
+        so _run_chunk_tasks_checkpointed does not save the placeholder and a resumed job retries the chunk.
+        The unparsable answer is also dropped from the response cache, so the retry asks the provider again.
+        """
+        self._thread_state.chunk_unparsed = True
+        cache_key = getattr(self._thread_state, "last_cache_key", None)
+        if cache_key is not None and self.response_cache is not None:
+            self.response_cache.delete(cache_key)
+
+    def _run_chunk_tasks_batched(self, chunks, task, label, progress_callback=None, max_workers=None):
+        """
+        Batch-mode counterpart of _run_chunk_tasks. Every task is first run with generate_response only recording its
+        request; the requests are run as one batch job (custom_id "<chunk index>:<call index>"); then every task is run
+        again with generate_response returning its batch responses, so the tasks' own parsing is reused.
+        Chunks whose requests failed in the batch are run live with _run_chunk_tasks.
+        """
+        requests = {}
+        for i, chunk in enumerate(chunks):
+            msg = f"{label} {i}/{len(chunks)} (batch)"
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i, total=len(chunks))
+            else:
+                logger.info(msg)
+            self._batch_requests = []
+            try:
+                task(i, chunk)
+            except Exception:
+                pass
+            finally:
+                requests[i], self._batch_requests = self._batch_requests, None
+        lines = [self.batch_manager.build_line(f"{i}:{n}", url, body) for i, calls in requests.items() for n, (url, body) in enumerate(calls)]
+        responses = self.batch_manager.run(lines, label)
+        results = [None] * len(chunks)
+        failed = []
+        for i, chunk in enumerate(chunks):
+            bodies = [responses.get(f"{i}:{n}") for n in range(len(requests[i]))]
+            if any(body is None for body in bodies):
+                failed.append(i)
+                continue
+            self._batch_replay = bodies
+            try:
+                results[i] = task(i, chunk)
+            except Exception as e:
+                logger.warning("%s %s/%s failed in batch: %s", label, i, len(chunks), e)
+                failed.append(i)
+            finally:
+                self._batch_replay = None
+        if failed:
+            logger.warning("%s: running %s failed chunks live", label, len(failed))
+            retried = self._run_chunk_tasks([chunks[i] for i in failed], lambda j, chunk: task(failed[j], chunk), label, None, max_workers, batch=False)
+            for i, result in zip(failed, retried):
+                results[i] = result
+        return results
+
+    async def _arun_chunk_tasks(self, chunks, task, label, progress_callback=None, max_workers=None):
+        """
+        Async counterpart of _run_chunk_tasks: await task(i, chunk) for every chunk with asyncio.gather,
+        at most max_workers at a time, retrying only the failed chunks.
+        """
+        semaphore = asyncio.Semaphore(max(1, max_workers or self.chunk_concurrency))
+
+        async def run(i):
+            async with semaphore:
+                return await task(i, chunks[i])
+
+        for i, chunk in enumerate(chunks):
+            msg = f"{label} {i}/{len(chunks)}"
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i, total=len(chunks))
+            else:
+                logger.info(msg)
+        results = [None] * len(chunks)
+        pending = list(range(len(chunks)))
+        attempt = 0
+        while pending:
+            outcomes = await asyncio.gather(*(run(i) for i in pending), return_exceptions=True)
+            failed = []
+            last_error = None
+            for i, outcome in zip(pending, outcomes):
+                if isinstance(outcome, Exception):
+                    logger.warning("%s %s/%s failed: %s", label, i, len(chunks), outcome)
+                    failed.append(i)
+                    last_error = outcome
+                else:
+                    results[i] = outcome
+            if failed and attempt >= self.chunk_retries:
+                raise last_error
+            pending = failed
+            attempt += 1
+        return results
+
     def summarize_for_translation(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None):
         """
         Iteratively summarize and interpret a long text chunk by chunk, accumulating summary and clarifications for translation.
@@ -198,6 +772,9 @@ class BaseAIManager:
         """
         if len(text) <= max_length:
             return text
+        cached = self._get_cached_summary("translation", text, max_length, max_chunk_size)
+        if cached is not None:
+            return cached
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
         summary = ""
         i = 0
@@ -207,33 +784,59 @@ class BaseAIManager:
             if progress_callback:
                 progress_callback(chunk=chunk, index=i, total=len(chunks))
             else:
-                print(msg)
+                logger.info(msg)
             input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
-            system_prompt = (
-                "You are a translation assistant. The purpose of this summarization is to provide hints and context needed for better translation of words, phrases, and expressions used in the text, not a general summary. "
-                "For the following text, do the following: "
-                "1. Summarize only the information relevant for accurate translation. "
-                "2. Identify any ambiguous phrases or unclear meanings and note them. "
-                "3. If you now understand the meaning of a previously ambiguous phrase, clarify it in this summary. "
-                "4. Track and update clarifications as more context is available. "
-                "5. Because the text comes from OCR, some words/characters might not be captured properly. If you are suspicious about a word, mention it, suggest what the correct word could be, and write it in a highlighted format (ALL UPPERCASE). In the translation, you can use the suggested correction. "
-                "Output only the summary and clarifications that help with translation."
-            )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": input_text}
-            ]
+            summary = self.generate_response(**self._translation_summary_request(input_text, max_length), use_cache=True)
+        self._set_cached_summary("translation", text, max_length, max_chunk_size, summary)
+        return summary
+
+    async def asummarize_for_translation(self, text, max_length=1000, max_chunk_size=1000, progress_callback=None):
+        """
+        Async counterpart of summarize_for_translation, built on agenerate_response.
+
+        Args:
+            Same as summarize_for_translation.
+
+        Returns:
+            str: The final accumulated summary and clarifications for translation.
+
+        Example:
+            summary = await manager.asummarize_for_translation(long_text)
+        """
+        if len(text) <= max_length:
+            return text
+        cached = await asyncio.to_thread(self._get_cached_summary, "translation", text, max_length, max_chunk_size)
+        if cached is not None:
+            return cached
+        chunks = await asyncio.to_thread(self.build_chunks, text, max_chunk_size=max_chunk_size)
+        summary = ""
+        for i, chunk in enumerate(chunks, start=1):
+            msg = f"Processing chunk {i}/{len(chunks)}"
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i, total=len(chunks))
+            else:
+                logger.info(msg)
+            input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
+            summary = await self.agenerate_response(**self._translation_summary_request(input_text, max_length), use_cache=True)
+        await asyncio.to_thread(self._set_cached_summary, "translation", text, max_length, max_chunk_size, summary)
+        return summary
+
+    def _translation_summary_request(self, input_text, max_length):
+        """
+        Build the generate_response keyword arguments of one summarize_for_translation step for this provider.
+        """
+        if self.ai_type == "google":
             prompt = (
-                "Summarize and interpret the following text in at most {max_length} tokens. "
+                f"Summarize and interpret the following text in at most {max_length} tokens. "
                 "Identify ambiguous phrases and clarify them if possible as context improves. "
-                "If you are suspicious about a word due to OCR errors, mention it, suggest the correct word, and write it in ALL UPPERCASE for highlighting.\n\n{input_text}"
+                f"If you are suspicious about a word due to OCR errors, mention it, suggest the correct word, and write it in ALL UPPERCASE for highlighting.\n\n{input_text}"
             )
-            if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_length, messages=messages)
-            elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_length, prompt=prompt)
-            summary = response
-        return summary
+            return {"max_token": max_length, "prompt": prompt}
+        messages = [
+            {"role": "system", "content": self._translation_summary_prompt()},
+            {"role": "user", "content": input_text}
+        ]
+        return {"max_token": max_length, "messages": messages}
     
     def summarize_for_manipulation(self, text, manipulation_type="improve_fluency", max_length=1000, max_chunk_size=1000, progress_callback=None):
         """
@@ -258,6 +861,9 @@ class BaseAIManager:
         """
         if len(text) <= max_length:
             return text
+        cached = self._get_cached_summary(f"manipulation:{manipulation_type}", text, max_length, max_chunk_size)
+        if cached is not None:
+            return cached
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
         summary = ""
         i = 0
@@ -267,22 +873,9 @@ class BaseAIManager:
             if progress_callback:
                 progress_callback(chunk=chunk, index=i, total=len(chunks))
             else:
-                print(msg)
+                logger.info(msg)
             input_text = (summary + "\n" + chunk["text"]).strip() if summary else chunk["text"]
-            system_prompt = (
-                f"You are a documentation improvement assistant. The purpose of this summarization is to provide hints and guidance for manipulating the text to better match the desired style: {manipulation_type}. "
-                "For the following text, do the following: "
-                "1. Summarize only the information relevant for improving or changing the tone, literature, and structure. "
-                "2. Identify weaknesses, awkward phrasing, poor punctuation, or lack of fluency, and suggest improvements. "
-                "3. If manipulation_type is 'academic', make sure to have clear citations if needed, formal structure, and technical vocabulary. "
-                "4. If manipulation_type is 'formal', make the text more professional and polished. "
-                "5. If manipulation_type is 'informal' or 'conversational', make the text more relaxed and friendly. "
-                "6. If manipulation_type is 'poetic', suggest ways to make the text more lyrical or artistic. "
-                "7. For any other manipulation_type, provide specific guidance to achieve the desired style. "
-                "8. After each paragraph, add hints about weaknesses and how to improve the text. "
-                "9. Because the text comes from OCR, some words/characters might not be captured properly. If you are suspicious about a word, mention it, suggest what the correct word could be, and write it in a highlighted format (ALL UPPERCASE). In the manipulation, you can use the suggested correction. "
-                "Output only the summary and actionable guidance for manipulation."
-            )
+            system_prompt = self._manipulation_summary_prompt(manipulation_type)
             messages = [
                 {"role": "system", "content": system_prompt},
                 {"role": "user", "content": input_text}
@@ -294,13 +887,255 @@ class BaseAIManager:
                 "Identify weaknesses and suggest improvements as context improves.\n\n{input_text}"
             )
             if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_length, messages=messages)
+                response = self.generate_response(max_token=max_length, messages=messages, use_cache=True)
             elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_length, prompt=prompt)
+                response = self.generate_response(max_token=max_length, prompt=prompt, use_cache=True)
             summary = response
+        self._set_cached_summary(f"manipulation:{manipulation_type}", text, max_length, max_chunk_size, summary)
         return summary
 
-    def translate(self, text, target_language, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_translation_summary=5000, max_chunk_size_for_translation_summary=15000, max_chunk_size=1000, max_translation_tokens=5000, progress_callback=None):
+    def _translation_summary_prompt(self):
+        return (
+            "You are a translation assistant. The purpose of this summarization is to provide hints and context needed for better translation of words, phrases, and expressions used in the text, not a general summary. "
+            "For the following text, do the following: "
+            "1. Summarize only the information relevant for accurate translation. "
+            "2. Identify any ambiguous phrases or unclear meanings and note them. "
+            "3. If you now understand the meaning of a previously ambiguous phrase, clarify it in this summary. "
+            "4. Track and update clarifications as more context is available. "
+            "5. Because the text comes from OCR, some words/characters might not be captured properly. If you are suspicious about a word, mention it, suggest what the correct word could be, and write it in a highlighted format (ALL UPPERCASE). In the translation, you can use the suggested correction. "
+            "Output only the summary and clarifications that help with translation."
+        )
+
+    def _manipulation_summary_prompt(self, manipulation_type):
+        return (
+            f"You are a documentation improvement assistant. The purpose of this summarization is to provide hints and guidance for manipulating the text to better match the desired style: {manipulation_type}. "
+            "For the following text, do the following: "
+            "1. Summarize only the information relevant for improving or changing the tone, literature, and structure. "
+            "2. Identify weaknesses, awkward phrasing, poor punctuation, or lack of fluency, and suggest improvements. "
+            "3. If manipulation_type is 'academic', make sure to have clear citations if needed, formal structure, and technical vocabulary. "
+            "4. If manipulation_type is 'formal', make the text more professional and polished. "
+            "5. If manipulation_type is 'informal' or 'conversational', make the text more relaxed and friendly. "
+            "6. If manipulation_type is 'poetic', suggest ways to make the text more lyrical or artistic. "
+            "7. For any other manipulation_type, provide specific guidance to achieve the desired style. "
+            "8. After each paragraph, add hints about weaknesses and how to improve the text. "
+            "9. Because the text comes from OCR, some words/characters might not be captured properly. If you are suspicious about a word, mention it, suggest what the correct word could be, and write it in a highlighted format (ALL UPPERCASE). In the manipulation, you can use the suggested correction. "
+            "Output only the summary and actionable guidance for manipulation."
+        )
+
+    def _fused_summary_task(self, purpose, manipulation_type="improve_fluency"):
+        """
+        Return the summary cache kind and the task-summary instructions of a summarize_fused purpose.
+        """
+        if purpose == "translation":
+            return "translation", self._translation_summary_prompt()
+        if purpose == "manipulation":
+            return f"manipulation:{manipulation_type}", self._manipulation_summary_prompt(manipulation_type)
+        raise ValueError(f"Unsupported fused summary purpose: {purpose}")
+
+    def _fused_summary_request(self, task_prompt, max_length_for_general_summary, max_length_for_task_summary, running_general, running_task, chunk_text):
+        """
+        Build the generate_response keyword arguments of one summarize_fused step.
+        """
+        system_prompt = (
+            "You maintain two running summaries of a long text that is given to you chunk by chunk.\n"
+            f"1. general_summary: a general summary of everything read so far, in at most {max_length_for_general_summary} tokens.\n"
+            f"2. task_summary: in at most {max_length_for_task_summary} tokens, follow these instructions:\n{task_prompt}\n"
+            "Update both summaries with the new chunk. "
+            'Output only a JSON object: {"general_summary": "...", "task_summary": "..."}'
+        )
+        user_content = (
+            f"Previous general summary: {running_general}\n"
+            f"Previous task summary: {running_task}\n"
+            f"New chunk: {chunk_text}\n"
+        )
+        max_token = max_length_for_general_summary + max_length_for_task_summary
+        if self.ai_type == "google":
+            return {"max_token": max_token, "prompt": f"{system_prompt}\n{user_content}"}
+        return {"max_token": max_token, "messages": [{"role": "system", "content": system_prompt}, {"role": "user", "content": user_content}]}
+
+    def summarize_fused(self, text, purpose="translation", manipulation_type="improve_fluency", max_length_for_general_summary=2000, max_length_for_task_summary=5000, max_chunk_size=15000, progress_callback=None):
+        """
+        Build the general summary and the task-specific summary (translation or manipulation guidance) in one traversal.
+        For each chunk, the AI receives both running summaries and the chunk, and returns both updated summaries as one JSON object:
+        {"general_summary": "...", "task_summary": "..."}
+        This needs half the sequential round trips of summarize() followed by summarize_for_translation()/summarize_for_manipulation().
+        Results are stored in (and read from) the same summary cache entries as the separate passes.
+
+        Args:
+            text (str): The text to summarize.
+            purpose (str): 'translation' or 'manipulation'. Default is 'translation'.
+            manipulation_type (str): Desired manipulation style when purpose is 'manipulation'. Default is 'improve_fluency'.
+            max_length_for_general_summary (int): Maximum tokens for the general summary. Default is 2000.
+            max_length_for_task_summary (int): Maximum tokens for the task-specific summary. Default is 5000.
+            max_chunk_size (int): Maximum size of each chunk. Default is 15000.
+
+        Returns:
+            tuple: (general_summary, task_summary)
+
+        Example:
+            general_summary, translation_summary = manager.summarize_fused(long_text, purpose="translation")
+        """
+        kind, task_prompt = self._fused_summary_task(purpose, manipulation_type)
+        general_summary, task_summary = self._get_fused_summaries(kind, text, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size)
+        if general_summary is not None and task_summary is not None:
+            return general_summary, task_summary
+        chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
+        running_general = ""
+        running_task = ""
+        for i, chunk in enumerate(chunks, start=1):
+            msg = f"Processing chunk {i}/{len(chunks)}"
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i, total=len(chunks))
+            else:
+                logger.info(msg)
+            response = self.generate_response(**self._fused_summary_request(task_prompt, max_length_for_general_summary, max_length_for_task_summary, running_general, running_task, chunk["text"]), use_cache=True)
+            running_general, running_task = self._fused_summary_update(response, running_general, running_task)
+        return self._set_fused_summaries(kind, text, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size, general_summary, task_summary, running_general, running_task)
+
+    async def asummarize_fused(self, text, purpose="translation", manipulation_type="improve_fluency", max_length_for_general_summary=2000, max_length_for_task_summary=5000, max_chunk_size=15000, progress_callback=None):
+        """
+        Async counterpart of summarize_fused, built on agenerate_response. The steps stay sequential (each one needs
+        the previous running summaries); cache lookups and chunking run in worker threads.
+
+        Args:
+            Same as summarize_fused.
+
+        Returns:
+            tuple: (general_summary, task_summary)
+
+        Example:
+            general_summary, translation_summary = await manager.asummarize_fused(long_text, purpose="translation")
+        """
+        kind, task_prompt = self._fused_summary_task(purpose, manipulation_type)
+        general_summary, task_summary = await asyncio.to_thread(self._get_fused_summaries, kind, text, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size)
+        if general_summary is not None and task_summary is not None:
+            return general_summary, task_summary
+        chunks = await asyncio.to_thread(self.build_chunks, text, max_chunk_size=max_chunk_size)
+        running_general = ""
+        running_task = ""
+        for i, chunk in enumerate(chunks, start=1):
+            msg = f"Processing chunk {i}/{len(chunks)}"
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i, total=len(chunks))
+            else:
+                logger.info(msg)
+            response = await self.agenerate_response(**self._fused_summary_request(task_prompt, max_length_for_general_summary, max_length_for_task_summary, running_general, running_task, chunk["text"]), use_cache=True)
+            running_general, running_task = self._fused_summary_update(response, running_general, running_task)
+        return await asyncio.to_thread(self._set_fused_summaries, kind, text, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size, general_summary, task_summary, running_general, running_task)
+
+    def _get_fused_summaries(self, kind, text, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size):
+        general_summary = text if len(text) <= max_length_for_general_summary else self._get_cached_summary("general", text, max_length_for_general_summary, max_chunk_size, strategy="fused")
+        task_summary = text if len(text) <= max_length_for_task_summary else self._get_cached_summary(kind, text, max_length_for_task_summary, max_chunk_size, strategy="fused")
+        return general_summary, task_summary
+
+    def _set_fused_summaries(self, kind, text, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size, general_summary, task_summary, running_general, running_task):
+        if general_summary is None:
+            general_summary = running_general
+            self._set_cached_summary("general", text, max_length_for_general_summary, max_chunk_size, general_summary, strategy="fused")
+        if task_summary is None:
+            task_summary = running_task
+            self._set_cached_summary(kind, text, max_length_for_task_summary, max_chunk_size, task_summary, strategy="fused")
+        return general_summary, task_summary
+
+    def _fused_summary_update(self, response, running_general, running_task):
+        """
+        Return the running (general, task) summaries updated from one summarize_fused answer.
+        """
+        try:
+            summaries = json.loads(self._clean_code_block(response))
+            return summaries.get("general_summary", running_general), summaries.get("task_summary", running_task)
+        except (ValueError, AttributeError):
+            # Not valid JSON: keep the answer as the general summary and the previous task summary.
+            return response, running_task
+
+    def _translation_system_prompt(self, target_language):
+        return (
+            f"You are a professional translator. Your task is to translate only the current chunk to {target_language}.\n"
+            "You are given the general summary, translation summary, previous chunk, current chunk, and next chunk for context.\n"
+            "Do NOT translate or modify any HTML tags; keep them as is, even if incomplete.\n"
+            "If you see suspicious/unrelated words (e.g., OCR errors), skip or replace them with meaningful words/phrases.\n"
+            "If a chunk/block is only a page number, page title, or footer, ignore it in the translation.\n"
+            "Make sure the translation is fluent and natural for the target language, preserving the original meaning."
+        )
+
+    def _manipulation_system_prompt(self, manipulation_type, target_language=None):
+        return (
+            f"You are a professional documentation editor. Your task is to manipulate only the current chunk according to the style: {manipulation_type}.\n"
+            + (f"Rewrite the improved version in {target_language}.\n" if target_language else "")
+            + "You are given the general summary, manipulation summary, previous chunk, current chunk, next chunk, previous manipulated chunk, and a summary of all previous manipulated chunks for context.\n"
+            + "Include only standard HTML tags.\n"
+            + "For images or videos, use a placeholder with a caption.\n"
+            + "When reviewing each chunk, use the context to improve writing, consistency, and interpretation.\n"
+            + "If you see a header, anchor, paragraph, list, or table, use the correct HTML tag.\n"
+            + "IMPORTANT: Keep the structure of sentences as is. If the original chunk contains questions, lists, or other formats, preserve those formats in the manipulated output. Do not change questions to statements, or lists to paragraphs, etc.\n"
+            + "Output onlsy the manipulated chunk in HTML format."
+        )
+
+    def _q_and_a_system_prompt(self, target_language=None):
+        return (
+            "You are an expert educator and exam/interview designer. Your task is to generate a list of Q&A pairs in JSON format for the current chunk, to help people understand the context, prepare for exams/interviews, and cover important concepts.\n"
+            "Only generate Q&A for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
+            "For each Q&A, use the format: {\"question\": \"...\", \"answer\": \"...\"}.\n"
+            + (f"All questions and answers must be written in {target_language}.\n" if target_language else "")
+            + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
+            + "Output is ONLY for the current chunk. Output only the list of Q&A JSONs."
+        )
+
+    def _mcq_system_prompt(self, target_language=None):
+        return (
+            "You are an expert educator and exam/interview designer. Your task is to generate a list of multiple-choice questions (MCQs) in JSON format for the current chunk, to help people understand the context, prepare for exams/interviews, and cover important concepts.\n"
+            "Each question must have exactly 4 options, and only one option must be marked as correct (is_correct: 1), the rest as incorrect (is_correct: 0).\n"
+            "If the correct answer is 'all of the above', only that option is marked as correct and the rest as incorrect.\n"
+            "For each MCQ, use the format: {\"question\": \"...\", \"options\": [{\"option\": \"...\", \"is_correct\": 1/0}, ...]}\n"
+            + (f"All questions and options must be written in {target_language}.\n" if target_language else "")
+            + "Only generate MCQs for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
+            + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
+            + "Output is ONLY for the current chunk. Output only the list of MCQ JSONs."
+        )
+
+    def _teaching_system_prompt(self, target_language=None):
+        return (
+            "You are an expert teacher and educator. For the current chunk, deeply understand the content and generate teaching material as follows:\n"
+            "1. clarifying_concept_to_teach: Write a clear, detailed HTML output that explains the concept, using headings, lists, examples, and formatting to help the user learn.\n"
+            "2. q_and_a_list: Generate a list of Q&A pairs (question and answer) that, if answered correctly, prove the user has mastered the concept.\n"
+            + (f"All outputs must be written in {target_language}.\n" if target_language else "")
+            + "Only generate teaching content for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
+            + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
+            + "Output is ONLY for the current chunk. Output only the teaching content JSON."
+        )
+
+    def _advanced_teaching_system_prompt(self, target_language=None):
+        return (
+            "You are an expert AI teacher. For the current chunk, deeply understand the content and generate advanced teaching material as follows:\n"
+            "1. text_to_speech: Write a strong, clear explanation for the AI teacher to speak, using SSML markup tags (such as <speak>, <break>, <emphasis>, etc.) to enhance text-to-speech output (e.g., pauses, emphasis, pitch, rate, etc.).\n"
+            "2. text_to_write: Write a concise HTML output (like PowerPoint slides) that highlights and organizes the most important points from the speech. Use headings, lists, tables, and formatting to help the user grasp the speech. Do not make it lengthy; focus on clarity and highlights.\n"
+            "3. questions_and_answers: Generate a list of Q&A pairs (question and answer) that, if answered correctly, prove the user has mastered the concept.\n"
+            + (f"ALL OUTPUTS (text_to_speech, text_to_write, questions_and_answers) MUST BE IN THE {target_language}, EVEN IF THE ORIGINAL LANGUAGE OF THE INPUT IS DIFFERENT. THIS REQUIREMENT IS MANDATORY.\n" if target_language else "")
+            + "Only generate teaching content for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
+            + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
+            + "Output is ONLY for the current chunk. Output only the advanced teaching content JSON in the following format:\n"
+            + '{"text_to_speech": "...", "text_to_write": "...", "questions_and_answers": [{"question": "...", "answer": "..."}, ...]}'
+        )
+
+    def _neighbour_chunks_context(self, chunks, i):
+        """
+        Return the chunk-specific context of chunk i for PromptBuilder: previous, current and next chunk.
+        """
+        return [
+            ("Previous chunk", chunks[i-1]["html"] if i > 0 else ""),
+            ("Current chunk", chunks[i]["html"]),
+            ("Next chunk", chunks[i+1]["html"] if i < len(chunks)-1 else "")
+        ]
+
+    def _translation_request(self, chunks, i, target_language, general_summary, translation_summary, max_translation_tokens):
+        """
+        Build the generate_response keyword arguments for translating chunk i.
+        """
+        system_prompt = self._translation_system_prompt(target_language)
+        prompt_builder = PromptBuilder(system_prompt, [("General summary", general_summary), ("Translation summary", translation_summary)])
+        return prompt_builder.request(self.ai_type, self._neighbour_chunks_context(chunks, i), max_translation_tokens)
+
+    def translate(self, text, target_language, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_translation_summary=5000, max_chunk_size_for_translation_summary=15000, max_chunk_size=1000, max_translation_tokens=5000, progress_callback=None, max_workers=None, fused_summary=False, resume_job_id=None, dry_run=False):
         """
         Translate text to the target language using context-aware chunking and translation.
 
@@ -321,6 +1156,10 @@ class BaseAIManager:
             max_chunk_size_for_translation_summary (int): Maximum chunk size for translation summary. Default is 15000.
             max_chunk_size (int): Maximum size of each chunk for translation. Default is 1000.
             max_translation_tokens (int): Maximum tokens for each translation step. Default is 5000.
+            fused_summary (bool): Build both summaries in one pass with summarize_fused (using max_chunk_size_for_general_summary). Default is False.
+            max_workers (int): Number of chunks processed concurrently. Default is self.chunk_concurrency.
+            resume_job_id (str): Id of the job to checkpoint: a new id saves this run's progress under it, the id of an interrupted run reuses its summaries and completed chunks. Default is None (no checkpoints).
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             str: The translated text.
@@ -328,53 +1167,50 @@ class BaseAIManager:
         Example:
             translated = manager.translate(text, target_language='en')
         """
-        general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
-        translation_summary = self.summarize_for_translation(text, max_length=max_length_for_translation_summary, max_chunk_size=max_chunk_size_for_translation_summary)
+        if dry_run:
+            return CostPlanner(self).plan_translate(text, target_language, max_length_for_general_summary, max_chunk_size_for_general_summary, max_length_for_translation_summary, max_chunk_size_for_translation_summary, max_chunk_size, max_translation_tokens, max_workers, fused_summary=fused_summary)
+        checkpoint = self._job_checkpoint(resume_job_id, "translate")
+        if fused_summary:
+            general_summary, translation_summary = checkpoint.stage("summaries", lambda: self.summarize_fused(text, purpose="translation", max_length_for_general_summary=max_length_for_general_summary, max_length_for_task_summary=max_length_for_translation_summary, max_chunk_size=max_chunk_size_for_general_summary))
+        else:
+            general_summary = checkpoint.stage("general_summary", lambda: self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary))
+            translation_summary = checkpoint.stage("translation_summary", lambda: self.summarize_for_translation(text, max_length=max_length_for_translation_summary, max_chunk_size=max_chunk_size_for_translation_summary))
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        translated_chunks = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Translating chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            previous_chunk = chunks[i-1]["html"] if i > 0 else ""
-            cur_chunk = chunk["html"]
-            next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
-            system_prompt = (
-                f"You are a professional translator. Your task is to translate only the current chunk to {target_language}.\n"
-                "You are given the general summary, translation summary, previous chunk, current chunk, and next chunk for context.\n"
-                "Do NOT translate or modify any HTML tags; keep them as is, even if incomplete.\n"
-                "If you see suspicious/unrelated words (e.g., OCR errors), skip or replace them with meaningful words/phrases.\n"
-                "If a chunk/block is only a page number, page title, or footer, ignore it in the translation.\n"
-                "Make sure the translation is fluent and natural for the target language, preserving the original meaning."
+        def process_chunk(i, chunk):
+            return self.generate_response(**self._translation_request(chunks, i, target_language, general_summary, translation_summary, max_translation_tokens), use_cache=True)
+        translated_chunks = self._run_chunk_tasks(chunks, process_chunk, "Translating chunk", progress_callback, max_workers, checkpoint=checkpoint)
+        return "".join(translated_chunks)
+
+    async def atranslate(self, text, target_language, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_translation_summary=5000, max_chunk_size_for_translation_summary=15000, max_chunk_size=1000, max_translation_tokens=5000, progress_callback=None, max_workers=None, fused_summary=False):
+        """
+        Async counterpart of translate. The general and translation summaries are built concurrently
+        (or in one pass with fused_summary=True), then the chunks are translated with asyncio.gather, at most max_workers at a time.
+
+        Args:
+            Same as translate.
+
+        Returns:
+            str: The translated text.
+
+        Example:
+            translated = await manager.atranslate(text, target_language='en')
+        """
+        if fused_summary:
+            general_summary, translation_summary = await self.asummarize_fused(text, purpose="translation", max_length_for_general_summary=max_length_for_general_summary, max_length_for_task_summary=max_length_for_translation_summary, max_chunk_size=max_chunk_size_for_general_summary)
+        else:
+            general_summary, translation_summary = await asyncio.gather(
+                self.asummarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary),
+                self.asummarize_for_translation(text, max_length=max_length_for_translation_summary, max_chunk_size=max_chunk_size_for_translation_summary),
             )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": (
-                    f"General summary: {general_summary}\n"
-                    f"Translation summary: {translation_summary}\n"
-                    f"Previous chunk: {previous_chunk}\n"
-                    f"Current chunk: {cur_chunk}\n"
-                    f"Next chunk: {next_chunk}\n"
-                )}
-            ]
-            if self.ai_type == "open_ai":
-                translated = self.generate_response(max_token=max_translation_tokens, messages=messages)
-            elif self.ai_type == "google":
-                prompt = (
-                    f"{system_prompt}\n"
-                    f"General summary: {general_summary}\n"
-                    f"Translation summary: {translation_summary}\n"
-                    f"Previous chunk: {previous_chunk}\n"
-                    f"Current chunk: {cur_chunk}\n"
-                    f"Next chunk: {next_chunk}\n"
-                )
-                translated = self.generate_response(max_token=max_translation_tokens, prompt=prompt)
-            translated_chunks.append(translated)
+        chunks = await asyncio.to_thread(self.build_chunks, text, max_chunk_size=max_chunk_size)
+
+        async def process_chunk(i, chunk):
+            return await self.agenerate_response(**self._translation_request(chunks, i, target_language, general_summary, translation_summary, max_translation_tokens), use_cache=True)
+
+        translated_chunks = await self._arun_chunk_tasks(chunks, process_chunk, "Translating chunk", progress_callback, max_workers)
         return "".join(translated_chunks)
 
-    def manipulate_text(self, text, manipulation_type="improve_fluency", target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_manipulation_summary=5000, max_chunk_size_for_manipulation_summary=15000, max_chunk_size=1000, max_manipulation_tokens=5000, progress_callback=None):
+    def manipulate_text(self, text, manipulation_type="improve_fluency", target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_manipulation_summary=5000, max_chunk_size_for_manipulation_summary=15000, max_chunk_size=1000, max_manipulation_tokens=5000, progress_callback=None, fused_summary=False, running_summary_max_tokens=1000, running_summary_every=None, resume_job_id=None, dry_run=False):
         """
         Manipulate the input text using context-aware chunking, summaries, and generate HTML output with allowed tags and placeholders.
 
@@ -392,6 +1228,11 @@ class BaseAIManager:
             max_chunk_size_for_manipulation_summary (int): Maximum chunk size for manipulation summary. Default is 15000.
             max_chunk_size (int): Maximum size of each chunk for manipulation. Default is 1000.
             max_manipulation_tokens (int): Maximum tokens for each manipulation step. Default is 5000.
+            fused_summary (bool): Build both summaries in one pass with summarize_fused (using max_chunk_size_for_general_summary). Default is False.
+            running_summary_max_tokens (int): Token budget of the summary of previous manipulated chunks; it is only re-summarized when this is exceeded. Default is 1000.
+            running_summary_every (int): If set, also re-summarize the previous manipulated chunks every N chunks. Default is None.
+            resume_job_id (str): Id of the job to checkpoint: a new id saves this run's progress under it, the id of an interrupted run reuses its summaries, completed chunks and running summary. Default is None (no checkpoints).
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             str: The manipulated text in HTML format.
@@ -399,64 +1240,48 @@ class BaseAIManager:
         Example:
             manipulated = manager.manipulate_text(text, manipulation_type='academic', target_language='fr')
         """
-        general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
-        manipulation_summary = self.summarize_for_manipulation(text, manipulation_type=manipulation_type, max_length=max_length_for_manipulation_summary, max_chunk_size=max_chunk_size_for_manipulation_summary)
+        if dry_run:
+            return CostPlanner(self).plan_manipulate(text, manipulation_type, target_language, max_length_for_general_summary, max_chunk_size_for_general_summary, max_length_for_manipulation_summary, max_chunk_size_for_manipulation_summary, max_chunk_size, max_manipulation_tokens, running_summary_max_tokens, running_summary_every, fused_summary=fused_summary)
+        checkpoint = self._job_checkpoint(resume_job_id, "manipulate")
+        if fused_summary:
+            general_summary, manipulation_summary = checkpoint.stage("summaries", lambda: self.summarize_fused(text, purpose="manipulation", manipulation_type=manipulation_type, max_length_for_general_summary=max_length_for_general_summary, max_length_for_task_summary=max_length_for_manipulation_summary, max_chunk_size=max_chunk_size_for_general_summary))
+        else:
+            general_summary = checkpoint.stage("general_summary", lambda: self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary))
+            manipulation_summary = checkpoint.stage("manipulation_summary", lambda: self.summarize_for_manipulation(text, manipulation_type=manipulation_type, max_length=max_length_for_manipulation_summary, max_chunk_size=max_chunk_size_for_manipulation_summary))
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
         manipulated_chunks = []
-        joint_manipulated_summary = ""
+        running_summary = RunningSummary(self, max_tokens=running_summary_max_tokens, refresh_every=running_summary_every)
+        # Chunks depend on the previous ones, so only the completed prefix is reused.
+        done = checkpoint.get_chunks("manipulate", len(chunks))
+        while len(manipulated_chunks) in done:
+            saved = done[len(manipulated_chunks)]
+            manipulated_chunks.append(saved["manipulated"])
+            running_summary.summary, running_summary.pending = saved["summary"], list(saved["pending"])
+        if manipulated_chunks:
+            logger.info("Job %s: %s/%s chunks already manipulated", checkpoint.job_id, len(manipulated_chunks), len(chunks))
+        system_prompt = self._manipulation_system_prompt(manipulation_type, target_language)
+        prompt_builder = PromptBuilder(system_prompt, [("General summary", general_summary), ("Manipulation summary", manipulation_summary)])
         for i, chunk in enumerate(chunks):
+            if i < len(manipulated_chunks):
+                continue
+            joint_manipulated_summary = running_summary.text
             msg = f"Manipulating chunk {i}/{len(chunks)}"
             if progress_callback:
                 progress_callback(chunk=chunk, index=i, total=len(chunks))
             else:
-                print(msg)
-            previous_chunk = chunks[i-1]["html"] if i > 0 else ""
-            cur_chunk = chunk["html"]
-            next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
+                logger.info(msg)
             previous_manipulated_chunk = manipulated_chunks[i-1] if i > 0 else ""
-            system_prompt = (
-                f"You are a professional documentation editor. Your task is to manipulate only the current chunk according to the style: {manipulation_type}.\n"
-                + (f"Rewrite the improved version in {target_language}.\n" if target_language else "")
-                + "You are given the general summary, manipulation summary, previous chunk, current chunk, next chunk, previous manipulated chunk, and a summary of all previous manipulated chunks for context.\n"
-                + "Include only standard HTML tags.\n"
-                + "For images or videos, use a placeholder with a caption.\n"
-                + "When reviewing each chunk, use the context to improve writing, consistency, and interpretation.\n"
-                + "If you see a header, anchor, paragraph, list, or table, use the correct HTML tag.\n"
-                + "IMPORTANT: Keep the structure of sentences as is. If the original chunk contains questions, lists, or other formats, preserve those formats in the manipulated output. Do not change questions to statements, or lists to paragraphs, etc.\n"
-                + "Output onlsy the manipulated chunk in HTML format."
-            )
-            user_content = (
-                f"General summary: {general_summary}\n"
-                f"Manipulation summary: {manipulation_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-                f"Previous manipulated chunk: {previous_manipulated_chunk}\n"
-                f"Summary of all previous manipulated chunks: {joint_manipulated_summary}\n"
-            )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
+            chunk_context = self._neighbour_chunks_context(chunks, i) + [
+                ("Previous manipulated chunk", previous_manipulated_chunk),
+                ("Summary of all previous manipulated chunks", joint_manipulated_summary)
             ]
-            prompt = (
-                f"{system_prompt}\n"
-                f"General summary: {general_summary}\n"
-                f"Manipulation summary: {manipulation_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-                f"Previous manipulated chunk: {previous_manipulated_chunk}\n"
-                f"Summary of all previous manipulated chunks: {joint_manipulated_summary}\n"
-            )
-            if self.ai_type == "open_ai":
-                manipulated = self.generate_response(max_token=max_manipulation_tokens, messages=messages)
-            elif self.ai_type == "google":
-                manipulated = self.generate_response(max_token=max_manipulation_tokens, prompt=prompt)
+            manipulated = self.generate_response(**prompt_builder.request(self.ai_type, chunk_context, max_manipulation_tokens), use_cache=True)
             manipulated_chunks.append(manipulated)
-            joint_manipulated_summary = self.summarize(joint_manipulated_summary)
+            running_summary.add(manipulated)
+            checkpoint.set_chunk("manipulate", i, {"manipulated": manipulated, "summary": running_summary.summary, "pending": running_summary.pending})
         return "".join(manipulated_chunks)
 
-    def generate_q_and_a_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_q_and_a_tokens=5000, progress_callback=None):
+    def generate_q_and_a_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_q_and_a_tokens=5000, progress_callback=None, max_workers=None, resume_job_id=None, dry_run=False):
         """
         Generate Q&A pairs from the text to help people understand the context, prepare for exams/interviews, and cover important concepts.
 
@@ -474,6 +1299,9 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for Q&A. Default 1000.
             max_q_and_a_tokens (int): Max tokens for each Q&A step. Default 2000.
+            max_workers (int): Number of chunks processed concurrently. Default is self.chunk_concurrency.
+            resume_job_id (str): Id of the job to checkpoint: a new id saves this run's progress under it, the id of an interrupted run reuses its summary and completed chunks. Default is None (no checkpoints).
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             list: List of Q&A dicts for all chunks.
@@ -481,57 +1309,30 @@ class BaseAIManager:
         Example:
             q_and_a_list = manager.generate_q_and_a_from_text(text, target_language='fr')
         """
-        general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
+        if dry_run:
+            return CostPlanner(self).plan_chunk_pipeline("q_and_a", self._q_and_a_system_prompt(target_language), text, max_length_for_general_summary, max_chunk_size_for_general_summary, max_chunk_size, max_q_and_a_tokens, max_workers)
+        checkpoint = self._job_checkpoint(resume_job_id, "q_and_a")
+        general_summary = checkpoint.stage("general_summary", lambda: self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary))
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_q_and_a = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating Q&A for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            previous_chunk = chunks[i-1]["html"] if i > 0 else ""
-            cur_chunk = chunk["html"]
-            next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
-            system_prompt = (
-                "You are an expert educator and exam/interview designer. Your task is to generate a list of Q&A pairs in JSON format for the current chunk, to help people understand the context, prepare for exams/interviews, and cover important concepts.\n"
-                "Only generate Q&A for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
-                "For each Q&A, use the format: {\"question\": \"...\", \"answer\": \"...\"}.\n"
-                + (f"All questions and answers must be written in {target_language}.\n" if target_language else "")
-                + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
-                + "Output is ONLY for the current chunk. Output only the list of Q&A JSONs."
-            )
-            user_content = (
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
-            ]
-            prompt = (
-                f"{system_prompt}\n"
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_q_and_a_tokens, messages=messages)
-            elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_q_and_a_tokens, prompt=prompt)
+        system_prompt = self._q_and_a_system_prompt(target_language)
+        prompt_builder = PromptBuilder(system_prompt, [("General summary", general_summary)])
+        def process_chunk(i, chunk):
+            response = self.generate_response(**prompt_builder.request(self.ai_type, self._neighbour_chunks_context(chunks, i), max_q_and_a_tokens), use_cache=True)
             try:
                 q_and_a_list = eval(response) if isinstance(response, str) else response
                 if not isinstance(q_and_a_list, list):
                     q_and_a_list = []
+                    self._mark_chunk_unparsed()
             except Exception:
                 q_and_a_list = []
+                self._mark_chunk_unparsed()
+            return q_and_a_list
+        all_q_and_a = []
+        for q_and_a_list in self._run_chunk_tasks(chunks, process_chunk, "Generating Q&A for chunk", progress_callback, max_workers, checkpoint=checkpoint):
             all_q_and_a.extend(q_and_a_list)
         return all_q_and_a
     
-    def generate_multiple_choice_questions_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_mcq_tokens=5000, progress_callback=None):
+    def generate_multiple_choice_questions_from_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_mcq_tokens=5000, progress_callback=None, max_workers=None, resume_job_id=None, dry_run=False):
         """
         Generate multiple-choice questions (MCQs) from the text. Each question has 4 options, only one valid answer.
 
@@ -555,6 +1356,9 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for MCQ. Default 2500.
             max_mcq_tokens (int): Max tokens for each MCQ step. Default 5000.
+            max_workers (int): Number of chunks processed concurrently. Default is self.chunk_concurrency.
+            resume_job_id (str): Id of the job to checkpoint: a new id saves this run's progress under it, the id of an interrupted run reuses its summary and completed chunks. Default is None (no checkpoints).
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             list: List of MCQ dicts for all chunks.
@@ -562,59 +1366,30 @@ class BaseAIManager:
         Example:
             mcq_list = manager.generate_multiple_choice_questions_from_text(text, target_language='en')
         """
-        general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
+        if dry_run:
+            return CostPlanner(self).plan_chunk_pipeline("mcq", self._mcq_system_prompt(target_language), text, max_length_for_general_summary, max_chunk_size_for_general_summary, max_chunk_size, max_mcq_tokens, max_workers)
+        checkpoint = self._job_checkpoint(resume_job_id, "mcq")
+        general_summary = checkpoint.stage("general_summary", lambda: self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary))
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_mcq = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating MCQ for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            previous_chunk = chunks[i-1]["html"] if i > 0 else ""
-            cur_chunk = chunk["html"]
-            next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
-            system_prompt = (
-                "You are an expert educator and exam/interview designer. Your task is to generate a list of multiple-choice questions (MCQs) in JSON format for the current chunk, to help people understand the context, prepare for exams/interviews, and cover important concepts.\n"
-                "Each question must have exactly 4 options, and only one option must be marked as correct (is_correct: 1), the rest as incorrect (is_correct: 0).\n"
-                "If the correct answer is 'all of the above', only that option is marked as correct and the rest as incorrect.\n"
-                "For each MCQ, use the format: {\"question\": \"...\", \"options\": [{\"option\": \"...\", \"is_correct\": 1/0}, ...]}\n"
-                + (f"All questions and options must be written in {target_language}.\n" if target_language else "")
-                + "Only generate MCQs for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
-                + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
-                + "Output is ONLY for the current chunk. Output only the list of MCQ JSONs."
-            )
-            user_content = (
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
-            ]
-            prompt = (
-                f"{system_prompt}\n"
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_mcq_tokens, messages=messages)
-            elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_mcq_tokens, prompt=prompt)
+        system_prompt = self._mcq_system_prompt(target_language)
+        prompt_builder = PromptBuilder(system_prompt, [("General summary", general_summary)])
+        def process_chunk(i, chunk):
+            response = self.generate_response(**prompt_builder.request(self.ai_type, self._neighbour_chunks_context(chunks, i), max_mcq_tokens), use_cache=True)
             try:
                 mcq_list = eval(response) if isinstance(response, str) else response
                 if not isinstance(mcq_list, list):
                     mcq_list = []
+                    self._mark_chunk_unparsed()
             except Exception:
                 mcq_list = []
+                self._mark_chunk_unparsed()
+            return mcq_list
+        all_mcq = []
+        for mcq_list in self._run_chunk_tasks(chunks, process_chunk, "Generating MCQ for chunk", progress_callback, max_workers, checkpoint=checkpoint):
             all_mcq.extend(mcq_list)
         return all_mcq
     
-    def build_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None):
+    def build_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None, max_workers=None, resume_job_id=None, dry_run=False):
         """
         Build teaching content for a text. For each chunk, generate:
         {
@@ -631,6 +1406,9 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for teaching. Default 2500.
             max_teaching_tokens (int): Max tokens for each teaching step. Default 5000.
+            max_workers (int): Number of chunks processed concurrently. Default is self.chunk_concurrency.
+            resume_job_id (str): Id of the job to checkpoint: a new id saves this run's progress under it, the id of an interrupted run reuses its summary and completed chunks. Default is None (no checkpoints).
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             list: List of teaching content dicts for all chunks.
@@ -638,58 +1416,27 @@ class BaseAIManager:
         Example:
             teaching_content = manager.build_teaching_content_for_a_text(text, target_language='en')
         """
-        general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
+        if dry_run:
+            return CostPlanner(self).plan_chunk_pipeline("teaching", self._teaching_system_prompt(target_language), text, max_length_for_general_summary, max_chunk_size_for_general_summary, max_chunk_size, max_teaching_tokens, max_workers)
+        checkpoint = self._job_checkpoint(resume_job_id, "teaching")
+        general_summary = checkpoint.stage("general_summary", lambda: self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary))
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_teaching_content = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating teaching content for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            previous_chunk = chunks[i-1]["html"] if i > 0 else ""
-            cur_chunk = chunk["html"]
-            next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
-            system_prompt = (
-                "You are an expert teacher and educator. For the current chunk, deeply understand the content and generate teaching material as follows:\n"
-                "1. clarifying_concept_to_teach: Write a clear, detailed HTML output that explains the concept, using headings, lists, examples, and formatting to help the user learn.\n"
-                "2. q_and_a_list: Generate a list of Q&A pairs (question and answer) that, if answered correctly, prove the user has mastered the concept.\n"
-                + (f"All outputs must be written in {target_language}.\n" if target_language else "")
-                + "Only generate teaching content for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
-                + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
-                + "Output is ONLY for the current chunk. Output only the teaching content JSON."
-            )
-            user_content = (
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
-            ]
-            prompt = (
-                f"{system_prompt}\n"
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_teaching_tokens, messages=messages)
-            elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_teaching_tokens, prompt=prompt)
+        system_prompt = self._teaching_system_prompt(target_language)
+        prompt_builder = PromptBuilder(system_prompt, [("General summary", general_summary)])
+        def process_chunk(i, chunk):
+            response = self.generate_response(**prompt_builder.request(self.ai_type, self._neighbour_chunks_context(chunks, i), max_teaching_tokens), use_cache=True)
             try:
                 teaching_content = eval(response) if isinstance(response, str) else response
                 if not isinstance(teaching_content, dict):
                     teaching_content = {}
+                    self._mark_chunk_unparsed()
             except Exception:
                 teaching_content = {}
-            all_teaching_content.append(teaching_content)
-        return all_teaching_content
+                self._mark_chunk_unparsed()
+            return teaching_content
+        return self._run_chunk_tasks(chunks, process_chunk, "Generating teaching content for chunk", progress_callback, max_workers, checkpoint=checkpoint)
     
-    def build_advanced_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None):
+    def build_advanced_teaching_content_for_a_text(self, text, target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_teaching_tokens=5000, progress_callback=None, max_workers=None, resume_job_id=None, dry_run=False):
         """
         Build advanced teaching content for a text. For each chunk, generate:
         {
@@ -706,60 +1453,30 @@ class BaseAIManager:
             max_chunk_size_for_general_summary (int): Max chunk size for general summary. Default 15000.
             max_chunk_size (int): Max size of each chunk for teaching. Default 2500.
             max_teaching_tokens (int): Max tokens for each teaching step. Default 5000.
+            max_workers (int): Number of chunks processed concurrently. Default is self.chunk_concurrency.
+            resume_job_id (str): Id of the job to checkpoint: a new id saves this run's progress under it, the id of an interrupted run reuses its summary and completed chunks. Default is None (no checkpoints).
+            dry_run (bool): Return the CostPlanner estimate (calls, tokens, cost, sequential depth) without calling any provider. Default is False.
 
         Returns:
             list: List of advanced teaching content dicts for all chunks.
         """
-        general_summary = self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary)
+        if dry_run:
+            return CostPlanner(self).plan_chunk_pipeline("advanced_teaching", self._advanced_teaching_system_prompt(target_language), text, max_length_for_general_summary, max_chunk_size_for_general_summary, max_chunk_size, max_teaching_tokens, max_workers)
+        checkpoint = self._job_checkpoint(resume_job_id, "advanced_teaching")
+        general_summary = checkpoint.stage("general_summary", lambda: self.summarize(text, max_length=max_length_for_general_summary, max_chunk_size=max_chunk_size_for_general_summary))
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
-        all_advanced_content = []
-        for i, chunk in enumerate(chunks):
-            msg = f"Generating advanced teaching content for chunk {i}/{len(chunks)}"
-            if progress_callback:
-                progress_callback(chunk=chunk, index=i, total=len(chunks))
-            else:
-                print(msg)
-            previous_chunk = chunks[i-1]["html"] if i > 0 else ""
-            cur_chunk = chunk["html"]
-            next_chunk = chunks[i+1]["html"] if i < len(chunks)-1 else ""
-            system_prompt = (
-                "You are an expert AI teacher. For the current chunk, deeply understand the content and generate advanced teaching material as follows:\n"
-                "1. text_to_speech: Write a strong, clear explanation for the AI teacher to speak, using SSML markup tags (such as <speak>, <break>, <emphasis>, etc.) to enhance text-to-speech output (e.g., pauses, emphasis, pitch, rate, etc.).\n"
-                "2. text_to_write: Write a concise HTML output (like PowerPoint slides) that highlights and organizes the most important points from the speech. Use headings, lists, tables, and formatting to help the user grasp the speech. Do not make it lengthy; focus on clarity and highlights.\n"
-                "3. questions_and_answers: Generate a list of Q&A pairs (question and answer) that, if answered correctly, prove the user has mastered the concept.\n"
-                + (f"ALL OUTPUTS (text_to_speech, text_to_write, questions_and_answers) MUST BE IN THE {target_language}, EVEN IF THE ORIGINAL LANGUAGE OF THE INPUT IS DIFFERENT. THIS REQUIREMENT IS MANDATORY.\n" if target_language else "")
-                + "Only generate teaching content for meaningful, teaching, or explanatory parts. If the chunk is not important (e.g., table of contents, filler, or lacks concepts), return an empty list.\n"
-                + "You are given the general summary, previous chunk, current chunk, next chunk, for context. These inputs are only helpers to give you better insight and help you analyze the current chunk more effectively.\n"
-                + "Output is ONLY for the current chunk. Output only the advanced teaching content JSON in the following format:\n"
-                + '{"text_to_speech": "...", "text_to_write": "...", "questions_and_answers": [{"question": "...", "answer": "..."}, ...]}'
-            )
-            user_content = (
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            messages = [
-                {"role": "system", "content": system_prompt},
-                {"role": "user", "content": user_content}
-            ]
-            prompt = (
-                f"{system_prompt}\n"
-                f"General summary: {general_summary}\n"
-                f"Previous chunk: {previous_chunk}\n"
-                f"Current chunk: {cur_chunk}\n"
-                f"Next chunk: {next_chunk}\n"
-            )
-            if self.ai_type == "open_ai":
-                response = self.generate_response(max_token=max_teaching_tokens, messages=messages)
-            elif self.ai_type == "google":
-                response = self.generate_response(max_token=max_teaching_tokens, prompt=prompt)
+        system_prompt = self._advanced_teaching_system_prompt(target_language)
+        prompt_builder = PromptBuilder(system_prompt, [("General summary", general_summary)])
+        def process_chunk(i, chunk):
+            response = self.generate_response(**prompt_builder.request(self.ai_type, self._neighbour_chunks_context(chunks, i), max_teaching_tokens), use_cache=True)
             try:
                 advanced_content = eval(response) if isinstance(response, str) else response
                 if not isinstance(advanced_content, dict):
                     advanced_content = {}
+                    self._mark_chunk_unparsed()
             except Exception:
                 advanced_content = {}
-            all_advanced_content.append(advanced_content)
-        return all_advanced_content
+                self._mark_chunk_unparsed()
+            return advanced_content
+        return self._run_chunk_tasks(chunks, process_chunk, "Generating advanced teaching content for chunk", progress_callback, max_workers, checkpoint=checkpoint)
         
\ No newline at end of file
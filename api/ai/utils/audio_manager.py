@@ -7,6 +7,9 @@ import tempfile
 import uuid
 
 from ai.utils.open_ai_manager import OpenAIManager
+from ai.utils.tracing import Tracer
+
+@Tracer.trace_methods
 class AudioManager:
     def __init__(self):
         """DOC
@@ -1,6 +1,10 @@
 from django.conf import settings
 import boto3
 
+from ai.utils.provider_backends import ProviderBackends
+from ai.utils.tracing import Tracer
+
+@Tracer.trace_methods
 class AwsManager:
     def __init__(self, access_key_id, secret_access_key, region_name):
         self.polly_client = boto3.client(
@@ -9,6 +13,7 @@ class AwsManager:
             aws_secret_access_key=secret_access_key,
             region_name=region_name
         )
+        ProviderBackends.install(self)
 
     def list_voices(self, language_code="fa-IR"):
         """List available voices for a given language (e.g., fa-IR for Farsi)"""
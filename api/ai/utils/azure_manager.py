@@ -1,11 +1,20 @@
+import logging
 import azure.cognitiveservices.speech as speechsdk
 
+from ai.utils.provider_backends import ProviderBackends
+from ai.utils.tracing import Tracer
+
+logger = logging.getLogger(__name__)
+
+@Tracer.trace_methods
 class AzureManager:
     def __init__(self, key, region):
         self.speech_config = speechsdk.SpeechConfig(subscription=key, region=region)
+        self.synthesizer_class = speechsdk.SpeechSynthesizer
+        ProviderBackends.install(self)
 
     def list_voices(self, locale_prefix="fa-"):
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config)
+        synthesizer = self.synthesizer_class(speech_config=self.speech_config)
         voices = synthesizer.get_voices_async().get()
         return [
             {
@@ -37,7 +46,7 @@ class AzureManager:
             getattr(speechsdk.SpeechSynthesisOutputFormat, enum_format)
         )
 
-        synthesizer = speechsdk.SpeechSynthesizer(speech_config=self.speech_config, audio_config=None)
+        synthesizer = self.synthesizer_class(speech_config=self.speech_config, audio_config=None)
 
         result = synthesizer.speak_ssml_async(text).get() if ssml else synthesizer.speak_text_async(text).get()
 
@@ -45,7 +54,7 @@ class AzureManager:
             return result.audio_data
         elif result.reason == speechsdk.ResultReason.Canceled:
             details = result.cancellation_details
-            print(f"Azure TTS canceled: {details.reason}, error={details.error_details}")
+            logger.warning("Azure TTS canceled: %s, error=%s", details.reason, details.error_details)
             raise Exception(f"TTS failed: {details.reason}")
         else:
             raise Exception(f"TTS failed with reason: {result.reason}")
@@ -0,0 +1,188 @@
+import logging
+import json
+import time
+import hashlib
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class BatchJobPending(Exception):
+    """
+    Raised by a non-blocking BatchJobManager while the job is still running. Running the same requests again
+    after retry_after seconds picks up the submitted job.
+    """
+    def __init__(self, batch_id, status, retry_after):
+        super().__init__(f"Batch job {batch_id} is {status}; check again in {retry_after}s.")
+        self.batch_id = batch_id
+        self.status = status
+        self.retry_after = retry_after
+
+class BatchJobManager:
+    """
+    Run many independent LLM requests as one provider batch job (OpenAI Batch API JSONL format).
+    Requests are uploaded as a JSONL file, the job is polled until it finishes, and the responses are returned
+    by custom_id. The job id is stored in Redis under a hash of the requests, so after a restart the same
+    requests resume polling the submitted job instead of paying for it twice.
+    With block=False the job is checked once per run() and BatchJobPending is raised while it runs, so a Celery
+    task can re-schedule itself (apply_async(countdown=...)) instead of sleeping in a worker.
+    """
+    PREFIX = "batch_job"
+    FINAL_STATUSES = ("completed", "failed", "expired", "cancelled")
+
+    def __init__(self, client, poll_interval=60, completion_window="24h", max_wait=None, state_timeout=60 * 60 * 24 * 7, block=True):
+        """
+        Args:
+            client (openai.OpenAI): Client used for the Files and Batches APIs.
+            poll_interval (float): Seconds between status checks (the retry_after of BatchJobPending). Default is 60.
+            completion_window (str): Batch completion window. Default is '24h'.
+            max_wait (float): Seconds to wait for a job before raising TimeoutError. None waits until the job ends. Default is None.
+            state_timeout (int): Seconds the job id is kept for resuming. Default is 7 days.
+            block (bool): Wait for the job in run(). If False, run() raises BatchJobPending while the job runs. Default is True.
+
+        Example:
+            batch_manager = BatchJobManager(openai.OpenAI(api_key="sk-..."), poll_interval=30)
+            responses = batch_manager.run([BatchJobManager.build_line("0", "/v1/embeddings", {"model": "text-embedding-3-large", "input": "Hello"})])
+        """
+        self.client = client
+        self.poll_interval = poll_interval
+        self.completion_window = completion_window
+        self.max_wait = max_wait
+        self.state_timeout = state_timeout
+        self.block = block
+
+    @staticmethod
+    def build_line(custom_id, url, body):
+        """
+        Build one request line of a batch file.
+
+        Args:
+            custom_id (str): Id the response is returned under.
+            url (str): Endpoint (e.g., '/v1/chat/completions', '/v1/embeddings').
+            body (dict): Request body.
+
+        Returns:
+            dict: The request line.
+        """
+        return {"custom_id": str(custom_id), "method": "POST", "url": url, "body": body}
+
+    @staticmethod
+    def job_key(lines):
+        """
+        Hash the request lines into the key the job is stored under.
+        """
+        payload = json.dumps(lines, sort_keys=True, ensure_ascii=False)
+        return hashlib.sha256(payload.encode("utf-8")).hexdigest()
+
+    def _state_key(self, key):
+        return f"{self.PREFIX}:{key}"
+
+    def run(self, lines, label="Batch job"):
+        """
+        Submit the requests (or resume the job already submitted for them) and wait for the responses.
+        If self.block is False, BatchJobPending is raised instead of waiting for a job that has not finished.
+
+        Args:
+            lines (list): Request lines from build_line; all must use the same endpoint.
+            label (str): Progress message prefix.
+
+        Returns:
+            dict: custom_id -> response body, or None for requests that failed.
+        """
+        if not lines:
+            return {}
+        key = self.job_key(lines)
+        batch_id = cache.get(self._state_key(key))
+        if batch_id:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in ("failed", "expired", "cancelled"):
+                logger.info("%s: previous job %s %s, submitting again", label, batch_id, batch.status)
+                batch_id = None
+            else:
+                logger.info("%s: resuming job %s (%s)", label, batch_id, batch.status)
+        if not batch_id:
+            batch_id = self.submit(lines, label)
+            cache.set(self._state_key(key), batch_id, self.state_timeout)
+        batch = self.wait(batch_id, label) if self.block else self.check(batch_id, label)
+        if batch.status != "completed":
+            cache.delete(self._state_key(key))
+            logger.info("%s: job %s %s", label, batch_id, batch.status)
+            return {line["custom_id"]: None for line in lines}
+        responses = self.fetch_results(batch)
+        return {line["custom_id"]: responses.get(line["custom_id"]) for line in lines}
+
+    def submit(self, lines, label="Batch job"):
+        """
+        Upload the requests as a JSONL file and create the batch job.
+
+        Returns:
+            str: The batch id.
+        """
+        content = "\n".join(json.dumps(line, ensure_ascii=False) for line in lines).encode("utf-8")
+        input_file = self.client.files.create(file=("batch_input.jsonl", content), purpose="batch")
+        batch = self.client.batches.create(
+            input_file_id=input_file.id,
+            endpoint=lines[0]["url"],
+            completion_window=self.completion_window
+        )
+        logger.info("%s: submitted job %s with %s requests", label, batch.id, len(lines))
+        return batch.id
+
+    def wait(self, batch_id, label="Batch job"):
+        """
+        Poll a batch job until it reaches a final status.
+
+        Returns:
+            Batch: The final batch object.
+        """
+        started = time.monotonic()
+        while True:
+            batch = self.client.batches.retrieve(batch_id)
+            if batch.status in self.FINAL_STATUSES:
+                return batch
+            self._log_progress(batch, label)
+            if self.max_wait is not None and time.monotonic() - started > self.max_wait:
+                raise TimeoutError(f"Batch job {batch_id} did not finish within {self.max_wait}s.")
+            time.sleep(self.poll_interval)
+
+    def check(self, batch_id, label="Batch job"):
+        """
+        Check a batch job once.
+
+        Returns:
+            Batch: The final batch object.
+
+        Raises:
+            BatchJobPending: If the job has not reached a final status.
+        """
+        batch = self.client.batches.retrieve(batch_id)
+        if batch.status in self.FINAL_STATUSES:
+            return batch
+        self._log_progress(batch, label)
+        raise BatchJobPending(batch_id, batch.status, self.poll_interval)
+
+    def _log_progress(self, batch, label):
+        counts = getattr(batch, "request_counts", None)
+        if counts:
+            logger.info("%s: job %s %s (%s/%s)", label, batch.id, batch.status, counts.completed, counts.total)
+        else:
+            logger.info("%s: job %s %s", label, batch.id, batch.status)
+
+    def fetch_results(self, batch):
+        """
+        Download the output file of a completed job.
+
+        Returns:
+            dict: custom_id -> response body of the successful requests.
+        """
+        if not batch.output_file_id:
+            return {}
+        responses = {}
+        for raw in self.client.files.content(batch.output_file_id).text.splitlines():
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            response = line.get("response") or {}
+            if response.get("status_code") == 200 and not line.get("error"):
+                responses[line["custom_id"]] = response.get("body")
+        return responses
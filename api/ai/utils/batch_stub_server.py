@@ -0,0 +1,177 @@
+import json
+import time
+import uuid
+import threading
+from email.parser import BytesParser
+from email.policy import HTTP
+from http.server import BaseHTTPRequestHandler, ThreadingHTTPServer
+
+def default_responder(url, body):
+    """
+    Answer a batch request with a deterministic fake response: chat completions echo the last message,
+    embeddings return a small vector derived from the input.
+    """
+    if url == "/v1/embeddings":
+        text = body.get("input", "")
+        return {
+            "object": "list",
+            "model": body.get("model"),
+            "data": [{"object": "embedding", "index": 0, "embedding": [((len(text) + i) % 10) / 10 for i in range(8)]}],
+            "usage": {"prompt_tokens": max(1, len(text) // 4), "total_tokens": max(1, len(text) // 4)},
+        }
+    messages = body.get("messages") or []
+    content = messages[-1].get("content", "") if messages else ""
+    return {
+        "id": f"chatcmpl-{uuid.uuid4().hex}",
+        "object": "chat.completion",
+        "created": int(time.time()),
+        "model": body.get("model"),
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": f"echo: {content}"}, "finish_reason": "stop"}],
+        "usage": {"prompt_tokens": max(1, len(str(content)) // 4), "completion_tokens": 5, "total_tokens": max(1, len(str(content)) // 4) + 5},
+    }
+
+class BatchStubServer:
+    """
+    Local stand-in for the OpenAI Files and Batches APIs, for testing batch mode without the network.
+    Jobs complete after `polls_until_complete` status checks; every request is answered by
+    responder(url, body) -> response body, or fails if the responder raises.
+
+    Example:
+        with BatchStubServer() as server:
+            client = openai.OpenAI(api_key="test", base_url=server.base_url)
+            manager.OPEN_AI_CLIENT = client
+    """
+    def __init__(self, responder=None, polls_until_complete=1, host="127.0.0.1", port=0):
+        """
+        Args:
+            responder (callable): responder(url, body) -> response body. Default is default_responder.
+            polls_until_complete (int): Status checks a job stays 'in_progress'. Default is 1.
+            host (str): Bind address. Default is '127.0.0.1'.
+            port (int): Port; 0 picks a free one. Default is 0.
+        """
+        self.responder = responder or default_responder
+        self.polls_until_complete = polls_until_complete
+        self.files = {}
+        self.batches = {}
+        self.submitted = 0
+        self._lock = threading.Lock()
+        self.httpd = ThreadingHTTPServer((host, port), self._handler_class())
+        self._thread = None
+
+    @property
+    def base_url(self):
+        host, port = self.httpd.server_address[:2]
+        return f"http://{host}:{port}/v1"
+
+    def start(self):
+        self._thread = threading.Thread(target=self.httpd.serve_forever, daemon=True)
+        self._thread.start()
+        return self
+
+    def stop(self):
+        self.httpd.shutdown()
+        self.httpd.server_close()
+
+    def __enter__(self):
+        return self.start()
+
+    def __exit__(self, *exc):
+        self.stop()
+
+    def _file_object(self, file_id):
+        item = self.files[file_id]
+        return {"id": file_id, "object": "file", "bytes": len(item["content"]), "created_at": item["created_at"], "filename": item["filename"], "purpose": item["purpose"], "status": "processed"}
+
+    def _batch_object(self, batch_id):
+        batch = self.batches[batch_id]
+        return {key: value for key, value in batch.items() if key != "polls"}
+
+    def _create_file(self, filename, content, purpose):
+        file_id = f"file-{uuid.uuid4().hex}"
+        self.files[file_id] = {"filename": filename, "content": content, "purpose": purpose, "created_at": int(time.time())}
+        return file_id
+
+    def _create_batch(self, body):
+        batch_id = f"batch_{uuid.uuid4().hex}"
+        self.submitted += 1
+        self.batches[batch_id] = {
+            "id": batch_id,
+            "object": "batch",
+            "endpoint": body["endpoint"],
+            "input_file_id": body["input_file_id"],
+            "completion_window": body.get("completion_window", "24h"),
+            "status": "in_progress",
+            "created_at": int(time.time()),
+            "output_file_id": None,
+            "error_file_id": None,
+            "request_counts": {"total": 0, "completed": 0, "failed": 0},
+            "polls": 0,
+        }
+        return batch_id
+
+    def _complete_batch(self, batch):
+        outputs, errors = [], []
+        for raw in self.files[batch["input_file_id"]]["content"].decode("utf-8").splitlines():
+            if not raw.strip():
+                continue
+            line = json.loads(raw)
+            try:
+                body = self.responder(line["url"], line["body"])
+                outputs.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": line["custom_id"], "response": {"status_code": 200, "body": body}, "error": None})
+            except Exception as e:
+                errors.append({"id": f"batch_req_{uuid.uuid4().hex}", "custom_id": line["custom_id"], "response": None, "error": {"message": str(e)}})
+        batch["output_file_id"] = self._create_file("batch_output.jsonl", "\n".join(json.dumps(line) for line in outputs).encode("utf-8"), "batch_output")
+        if errors:
+            batch["error_file_id"] = self._create_file("batch_errors.jsonl", "\n".join(json.dumps(line) for line in errors).encode("utf-8"), "batch_output")
+        batch["request_counts"] = {"total": len(outputs) + len(errors), "completed": len(outputs), "failed": len(errors)}
+        batch["status"] = "completed"
+
+    def _handler_class(self):
+        server = self
+
+        class Handler(BaseHTTPRequestHandler):
+            def log_message(self, *args):
+                pass
+
+            def _send(self, status, payload, raw=False):
+                data = payload if raw else json.dumps(payload).encode("utf-8")
+                self.send_response(status)
+                self.send_header("Content-Type", "application/octet-stream" if raw else "application/json")
+                self.send_header("Content-Length", str(len(data)))
+                self.end_headers()
+                self.wfile.write(data)
+
+            def _body(self):
+                return self.rfile.read(int(self.headers.get("Content-Length", 0)))
+
+            def do_POST(self):
+                with server._lock:
+                    if self.path.rstrip("/") == "/v1/files":
+                        raw = self._body()
+                        message = BytesParser(policy=HTTP).parsebytes(f"Content-Type: {self.headers['Content-Type']}\r\n\r\n".encode("utf-8") + raw)
+                        fields = {}
+                        for part in message.iter_parts():
+                            name = part.get_param("name", header="content-disposition")
+                            fields[name] = (part.get_filename(), part.get_payload(decode=True))
+                        filename, content = fields["file"]
+                        file_id = server._create_file(filename or "upload.jsonl", content, fields.get("purpose", (None, b"batch"))[1].decode("utf-8"))
+                        return self._send(200, server._file_object(file_id))
+                    if self.path.rstrip("/") == "/v1/batches":
+                        batch_id = server._create_batch(json.loads(self._body()))
+                        return self._send(200, server._batch_object(batch_id))
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+            def do_GET(self):
+                with server._lock:
+                    parts = self.path.strip("/").split("/")
+                    if len(parts) == 3 and parts[:2] == ["v1", "batches"] and parts[2] in server.batches:
+                        batch = server.batches[parts[2]]
+                        batch["polls"] += 1
+                        if batch["status"] == "in_progress" and batch["polls"] > server.polls_until_complete:
+                            server._complete_batch(batch)
+                        return self._send(200, server._batch_object(parts[2]))
+                    if len(parts) == 4 and parts[:2] == ["v1", "files"] and parts[3] == "content" and parts[2] in server.files:
+                        return self._send(200, server.files[parts[2]]["content"], raw=True)
+                self._send(404, {"error": {"message": f"Unknown path {self.path}"}})
+
+        return Handler
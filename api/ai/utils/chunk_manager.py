@@ -1,6 +1,53 @@
+import logging
 import re
 import html
+import hashlib
+import threading
+from array import array
+from concurrent.futures import ProcessPoolExecutor
+from bisect import bisect_left, bisect_right
+from collections import OrderedDict
+from functools import lru_cache
 from bs4 import BeautifulSoup
+import tiktoken
+
+logger = logging.getLogger(__name__)
+
+@lru_cache(maxsize=None)
+def get_token_encoder(model=None):
+    """
+    Get a process-wide cached tiktoken encoder.
+    Args:
+        model (str): Model name (e.g., 'gpt-4o'). Unknown or missing models use 'cl100k_base'.
+    Returns:
+        tiktoken.Encoding: The encoder for the model.
+    """
+    if model:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            pass
+    return tiktoken.get_encoding("cl100k_base")
+
+# Only short texts (words and small runs, which repeat a lot) are memoized, so the cache never holds whole documents.
+COUNT_TOKENS_CACHE_MAX_CHARS = 64
+
+@lru_cache(maxsize=16384)
+def _count_short_tokens(text, model):
+    return len(get_token_encoder(model).encode(text, disallowed_special=()))
+
+def count_tokens(text, model=None):
+    """
+    Count the tokens of a text with the cached encoder of a model.
+    Args:
+        text (str): Text to count.
+        model (str): Model name used to pick the encoder.
+    Returns:
+        int: Number of tokens.
+    """
+    if len(text) <= COUNT_TOKENS_CACHE_MAX_CHARS:
+        return _count_short_tokens(text, model)
+    return len(get_token_encoder(model).encode(text, disallowed_special=()))
 
 class HTMLChunker:
     def __init__(self):
@@ -10,6 +57,7 @@ class HTMLChunker:
         """
         self.TAG_RE = re.compile(r'(<[^>]+>)', re.DOTALL)
         self.ENTITY_RE = re.compile(r'&[A-Za-z0-9#]+;')
+        self.TAG_NAME_RE = re.compile(r'<\s*/?\s*([a-zA-Z0-9]+)')
         self.BLOCK_BREAK_TAGS = {
             "p", "div", "br", "li", "ul", "ol",
             "h1", "h2", "h3", "h4", "h5", "h6",
@@ -22,6 +70,8 @@ class HTMLChunker:
         self._COMPLETE_SENTENCE_AT_END = re.compile(
             rf"(?:\.{{3}}|[{re.escape(self._SENT_END_CHARS)}]){self._OPTIONAL_CLOSERS_RE}{self._TRAILING_CLOSE_TAGS_RE}"
         )
+        self._OPTIONAL_CLOSERS_MATCH = re.compile(self._OPTIONAL_CLOSERS_RE)
+        self._CLOSE_TAGS_MATCH = re.compile(r"(?:\s*(?:</[^>]+>))*\s*")
 
     def _tag_name(self, tag):
         """
@@ -31,9 +81,22 @@ class HTMLChunker:
         Returns:
             str: Lowercase tag name (e.g., 'div', 'p').
         """
-        m = re.match(r'<\s*/?\s*([a-zA-Z0-9]+)', tag)
+        m = self.TAG_NAME_RE.match(tag)
         return m.group(1).lower() if m else ""
 
+    def _tag_text(self, tag):
+        """
+        Get the plain text a tag contributes: a line break for closing block tags and <br>.
+        Args:
+            tag (str): HTML tag string.
+        Returns:
+            str: '\\n' or ''.
+        """
+        name = self._tag_name(tag)
+        if name == "br" or (tag.startswith("</") and name in self.BLOCK_BREAK_TAGS):
+            return "\n"
+        return ""
+
     def _iter_html_tokens(self, html_src):
         """
         Tokenize HTML into tags and text segments.
@@ -75,6 +138,31 @@ class HTMLChunker:
                 yield ch, ch
                 i += 1
 
+    def _iter_text_runs(self, raw_text):
+        """
+        Tokenize raw text into entity-free runs and entities.
+        Args:
+            raw_text (str): Text string.
+        Yields:
+            tuple: (raw, plain, is_run) where runs are slices with raw == plain, and entities are
+                (entity, decoded value, False).
+        """
+        pos = 0
+        for em in self.ENTITY_RE.finditer(raw_text):
+            if em.start() > pos:
+                run = raw_text[pos:em.start()]
+                yield run, run, True
+            raw = em.group(0)
+            try:
+                plain = html.unescape(raw)
+            except Exception:
+                plain = raw
+            yield raw, plain, False
+            pos = em.end()
+        if pos < len(raw_text):
+            run = raw_text[pos:]
+            yield run, run, True
+
     def join_paragraphs(self, text):
         """
         Join all paragraphs into a single line, separating them by a space.
@@ -115,49 +203,212 @@ class HTMLChunker:
         text = soup.get_text(separator=" ")
         return text
     
-    def chunk_html_streaming(self, html_src, max_text_chars = 1000):
+    def _iter_raw_chunks(self, html_src, max_text_chars=1000):
         """
-        Chunk HTML into segments of up to max_text_chars, preserving tag structure.
+        Stream raw chunks of up to max_text_chars as aligned html/text pieces.
+        Every html piece (tag, entity or text run) has a matching plain text piece,
+        so a cut in html coordinates can be mapped to text without re-parsing.
         Args:
             html_src (str): HTML source string.
             max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
-        Returns:
-            List[Dict[str, str]]: List of chunks, each with 'html' and 'text' keys.
+        Yields:
+            tuple: (html_pieces, text_pieces) lists of equal length.
         """
-        chunks = []
         html_buf = []
         text_buf = []
         cur_len = 0
-
-        def flush():
-            nonlocal html_buf, text_buf, cur_len
-            if html_buf or text_buf:
-                chunks.append({
-                    "html": "".join(html_buf),
-                    "text": "".join(text_buf).strip()
-                })
-            html_buf = []
-            text_buf = []
-            cur_len = 0
-
         for kind, token in self._iter_html_tokens(html_src):
             if kind == "tag":
+                tag_text = self._tag_text(token)
                 html_buf.append(token)
-                name = self._tag_name(token)
-                if name == "br" or token.startswith("</"):
-                    if name in self.BLOCK_BREAK_TAGS or name == "br":
-                        text_buf.append("\n")
-                        cur_len += 1
+                text_buf.append(tag_text)
+                cur_len += len(tag_text)
                 continue
-            for raw_unit, plain_unit in self._iter_text_units(token):
-                if cur_len + len(plain_unit) > max_text_chars and cur_len > 0:
-                    flush()
+            for raw_unit, plain_unit, is_run in self._iter_text_runs(token):
+                if not is_run:
+                    if cur_len + len(plain_unit) > max_text_chars and cur_len > 0:
+                        yield html_buf, text_buf
+                        html_buf = []
+                        text_buf = []
+                        cur_len = 0
+                    html_buf.append(raw_unit)
+                    text_buf.append(plain_unit)
+                    cur_len += len(plain_unit)
+                    continue
+                # Entity-free run: take as many characters as fit, splitting at the budget boundary.
+                start = 0
+                run_len = len(raw_unit)
+                while start < run_len:
+                    room = max_text_chars - cur_len if cur_len > 0 else max(max_text_chars, 1)
+                    if room <= 0:
+                        yield html_buf, text_buf
+                        html_buf = []
+                        text_buf = []
+                        cur_len = 0
+                        continue
+                    end = min(run_len, start + room)
+                    piece = raw_unit[start:end] if start or end < run_len else raw_unit
+                    html_buf.append(piece)
+                    text_buf.append(piece)
+                    cur_len += end - start
+                    start = end
+        if html_buf:
+            yield html_buf, text_buf
+
+    def _iter_raw_chunks_by_tokens(self, html_src, max_tokens=1000, token_model=None):
+        """
+        Stream raw chunks of up to max_tokens tokens as aligned html/text pieces.
+        Tokens are counted incrementally per word (leading whitespace + word), with cached
+        counts per word, and chunks are only cut between words.
+        Args:
+            html_src (str): HTML source string.
+            max_tokens (int): Maximum number of tokens per chunk (default: 1000).
+            token_model (str): Model name used to pick the tiktoken encoder.
+        Yields:
+            tuple: (html_pieces, text_pieces) lists of equal length.
+        """
+        html_buf = []
+        text_buf = []
+        cur_tokens = 0
+        word = []
+        word_start = 0
+        word_has_text = False
+        for kind, token in self._iter_html_tokens(html_src):
+            if kind == "tag":
+                units = [(token, self._tag_text(token))]
+            else:
+                units = self._iter_text_units(token)
+            for raw_unit, plain_unit in units:
+                if plain_unit and plain_unit.isspace() and word_has_text:
+                    word_tokens = count_tokens("".join(word), token_model)
+                    if cur_tokens + word_tokens > max_tokens and cur_tokens > 0:
+                        yield html_buf[:word_start], text_buf[:word_start]
+                        html_buf = html_buf[word_start:]
+                        text_buf = text_buf[word_start:]
+                        cur_tokens = 0
+                    cur_tokens += word_tokens
+                    word = []
+                    word_start = len(html_buf)
+                    word_has_text = False
                 html_buf.append(raw_unit)
                 text_buf.append(plain_unit)
-                cur_len += len(plain_unit)
-        flush()
+                if plain_unit:
+                    word.append(plain_unit)
+                    word_has_text = word_has_text or not plain_unit.isspace()
+        if word_has_text:
+            word_tokens = count_tokens("".join(word), token_model)
+            if cur_tokens + word_tokens > max_tokens and cur_tokens > 0:
+                yield html_buf[:word_start], text_buf[:word_start]
+                html_buf = html_buf[word_start:]
+                text_buf = text_buf[word_start:]
+        if html_buf:
+            yield html_buf, text_buf
+
+    def _iter_raw_chunk_source(self, html_src, max_text_chars=1000, max_tokens=None, token_model=None):
+        """
+        Pick the raw chunk stream: token budgeted when max_tokens is set, character budgeted otherwise.
+        """
+        if max_tokens:
+            return self._iter_raw_chunks_by_tokens(html_src, max_tokens, token_model)
+        return self._iter_raw_chunks(html_src, max_text_chars)
+
+    def chunk_html_streaming(self, html_src, max_text_chars = 1000, max_tokens=None, token_model=None):
+        """
+        Chunk HTML into segments of up to max_text_chars, preserving tag structure.
+        Args:
+            html_src (str): HTML source string.
+            max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
+            max_tokens (int): If set, chunk by this token budget instead of characters.
+            token_model (str): Model name used to count tokens when max_tokens is set.
+        Returns:
+            List[Dict[str, str]]: List of chunks, each with 'html' and 'text' keys.
+        """
+        chunks = []
+        for html_buf, text_buf in self._iter_raw_chunk_source(html_src, max_text_chars, max_tokens, token_model):
+            chunks.append({
+                "html": "".join(html_buf),
+                "text": "".join(text_buf).strip()
+            })
         return chunks
 
+    def _split_pieces(self, html_pieces, text_pieces, cut):
+        """
+        Split aligned html/text pieces at an offset in html coordinates.
+        A text run straddling the cut is split in both html and text. Any other piece
+        straddling the cut (e.g. a tag containing a '.') is split in its html, and its text goes with the head.
+        Args:
+            html_pieces (list): HTML pieces.
+            text_pieces (list): Plain text pieces aligned with html_pieces.
+            cut (int): Offset into "".join(html_pieces).
+        Returns:
+            tuple: (head_html, head_text, tail_html, tail_text) piece lists.
+        """
+        pos = 0
+        for idx, piece in enumerate(html_pieces):
+            end = pos + len(piece)
+            if end == cut:
+                return html_pieces[:idx + 1], text_pieces[:idx + 1], html_pieces[idx + 1:], text_pieces[idx + 1:]
+            if end > cut:
+                if pos == cut:
+                    return html_pieces[:idx], text_pieces[:idx], html_pieces[idx:], text_pieces[idx:]
+                offset = cut - pos
+                head_html = html_pieces[:idx] + [piece[:offset]]
+                tail_html = [piece[offset:]] + html_pieces[idx + 1:]
+                if text_pieces[idx] == piece:
+                    return head_html, text_pieces[:idx] + [piece[:offset]], tail_html, [piece[offset:]] + text_pieces[idx + 1:]
+                return head_html, text_pieces[:idx + 1], tail_html, [""] + text_pieces[idx + 1:]
+            pos = end
+        return html_pieces, text_pieces, [], []
+
+    def iter_chunks(self, html_src, max_text_chars=1000, backtrack=300, max_tokens=None, token_model=None, boundary_index=None):
+        """
+        Lazily yield final chunks with sentence-boundary carry-over already applied.
+        The incomplete tail of each chunk is moved to the front of the next one, and the
+        plain text is built from the same tokenizer pass, so no HTML re-parsing happens.
+        Args:
+            html_src (str): HTML source string.
+            max_text_chars (int): Maximum number of text characters per raw chunk (default: 1000).
+            backtrack (int): Number of characters to look back for incomplete segments (default: 300).
+            max_tokens (int): If set, chunk by this token budget instead of characters.
+            token_model (str): Model name used to count tokens when max_tokens is set.
+            boundary_index (DocumentBoundaryIndex): Prebuilt index of html_src, shared across chunk sizes.
+        Yields:
+            Dict[str, str]: Chunk dict with 'html' and 'text' keys.
+        """
+        for start, end, text in self._iter_chunk_spans(html_src, max_text_chars, backtrack, max_tokens, token_model, boundary_index):
+            yield {"html": html_src[start:end], "text": text.strip()}
+
+    def _iter_chunk_spans(self, html_src, max_text_chars=1000, backtrack=300, max_tokens=None, token_model=None, boundary_index=None):
+        """
+        Lazily yield final chunk spans with sentence-boundary carry-over applied (see iter_chunks).
+        Yields:
+            tuple: (start, end, text) where html_src[start:end] is the chunk html and text its unstripped plain text.
+        """
+        if boundary_index is None:
+            boundary_index = DocumentBoundaryIndex(html_src, self)
+        pending_html = None
+        pending_text = None
+        pending_start = 0
+        pending_end = 0
+        for html_pieces, text_pieces in self._iter_raw_chunk_source(html_src, max_text_chars, max_tokens, token_model):
+            raw_end = pending_end + sum(map(len, html_pieces))
+            if pending_html is not None:
+                cut = boundary_index.find_cut(pending_start, pending_end, backtrack)
+                if cut < pending_end:
+                    head_html, head_text, tail_html, tail_text = self._split_pieces(pending_html, pending_text, cut - pending_start)
+                    yield pending_start, cut, "".join(head_text)
+                    html_pieces = tail_html + html_pieces
+                    text_pieces = tail_text + text_pieces
+                    pending_start = cut
+                else:
+                    yield pending_start, pending_end, "".join(pending_text)
+                    pending_start = pending_end
+            pending_html = html_pieces
+            pending_text = text_pieces
+            pending_end = raw_end
+        if pending_html is not None:
+            yield pending_start, pending_end, "".join(pending_text)
+
     def get_incomplete_end_html_aware(self, chunk_html, backtrack=300, sent_end_chars=None, optional_closers_re=None, complete_sentence_at_end=None):
         """
         Get the complete and incomplete parts at the end of a chunk, ignoring HTML entities as boundaries.
@@ -206,33 +457,416 @@ class HTMLChunker:
         if last_punct >= 0:
             cut = wstart + last_punct + 1
             # Optionally extend cut to include closers and closing tags
-            import re
-            m = re.match(optional_closers_re, s[cut:])
-            if m and m.end() > 0:
-                cut += m.end()
-            m2 = re.match(r"(?:\s*(?:</[^>]+>))*\s*", s[cut:])
-            if m2 and m2.end() > 0:
-                cut += m2.end()
+            closers_match = self._OPTIONAL_CLOSERS_MATCH if optional_closers_re == self._OPTIONAL_CLOSERS_RE else re.compile(optional_closers_re)
+            m = closers_match.match(s, cut)
+            if m and m.end() > cut:
+                cut = m.end()
+            m2 = self._CLOSE_TAGS_MATCH.match(s, cut)
+            if m2 and m2.end() > cut:
+                cut = m2.end()
             if cut < n:
                 return s[:cut], s[cut:]
         # 3. If no tag or sentence boundary found, treat everything as head
         return s, ""
 
+class DocumentBoundaryIndex:
+    """
+    Precomputed boundary offsets of one document, so every chunk size can find its cut point by
+    binary search instead of rescanning each chunk's backtrack window.
+    Cut points are the same as HTMLChunker.get_incomplete_end_html_aware on the chunk's html.
+    """
+    _TRUE_ENDINGS = ".!?؟؛…。！？；．।॥։።፧"
+
+    def __init__(self, html_src, chunker=None, offsets=None):
+        """
+        Build the index in a single pass of C-level regex scans.
+        Args:
+            html_src (str): The normalized HTML source (after clean_text and join_paragraphs).
+            chunker (HTMLChunker): Chunker whose sentence-end and closer characters are used.
+            offsets (tuple): Precomputed (tag_open_offsets, tag_close_offsets, sentence_end_offsets, entity_spans),
+                e.g. merged from shards; skips the scans.
+        """
+        self.chunker = chunker or HTMLChunker()
+        self.html_src = html_src
+        if offsets is not None:
+            self.tag_open_offsets, self.tag_close_offsets, self.sentence_end_offsets, self.entity_spans = offsets
+            return
+        self.tag_open_offsets = array("q", (m.start() for m in re.finditer("<", html_src)))
+        self.tag_close_offsets = array("q", (m.start() for m in re.finditer(">", html_src)))
+        self.sentence_end_offsets = array("q", (m.start() for m in re.finditer(f"[{re.escape(self._TRUE_ENDINGS)};]", html_src)))
+        # ';' ending an entity-like run (e.g. &rsquo;) -> offset of its '&'
+        self.entity_spans = {m.end() - 1: m.start() for m in re.finditer(r"&(?:[^\W_]|#)*;", html_src)}
+
+    def _last_before(self, offsets, start, end):
+        """
+        Get the last offset in [start, end), or -1.
+        """
+        i = bisect_left(offsets, end) - 1
+        if i >= 0 and offsets[i] >= start:
+            return offsets[i]
+        return -1
+
+    def _ends_with_complete_sentence(self, start, end):
+        """
+        Check whether html_src[start:end] ends with sentence punctuation, optionally followed by
+        closers, closing tags and whitespace.
+        """
+        src = self.html_src
+        stack = [end]
+        while stack:
+            p = stack.pop()
+            while p > start and src[p - 1].isspace():
+                p -= 1
+            q = p
+            while q > start and src[q - 1] in self.chunker._CLOSERS:
+                q -= 1
+            if q > start and src[q - 1] in self.chunker._SENT_END_CHARS:
+                return True
+            if p > start and src[p - 1] == ">":
+                # Any '</' after the previous '>' may open the trailing closing tag
+                gt = p - 1
+                prev_gt = self._last_before(self.tag_close_offsets, start, gt)
+                i = bisect_left(self.tag_open_offsets, max(start, prev_gt + 1))
+                while i < len(self.tag_open_offsets) and self.tag_open_offsets[i] < gt - 2:
+                    lt = self.tag_open_offsets[i]
+                    if src[lt + 1] == "/":
+                        stack.append(lt)
+                    i += 1
+        return False
+
+    def find_cut(self, start, end, backtrack=300):
+        """
+        Find where the incomplete end of the chunk html_src[start:end] begins.
+        Args:
+            start (int): Chunk start offset.
+            end (int): Chunk end offset.
+            backtrack (int): Number of characters to look back for incomplete segments (default: 300).
+        Returns:
+            int: Cut offset; end if the chunk has no incomplete tail.
+        """
+        if end <= start:
+            return end
+        # 1. Incomplete HTML tag at the end
+        last_lt = self._last_before(self.tag_open_offsets, start, end)
+        if last_lt > self._last_before(self.tag_close_offsets, start, end):
+            return last_lt
+        # 2. Chunk already ends with a complete sentence
+        if self._ends_with_complete_sentence(start, end):
+            return end
+        # 3. Last sentence end in the backtrack window, skipping ';' of entities
+        wstart = max(start, end - backtrack)
+        i = bisect_left(self.sentence_end_offsets, end) - 1
+        while i >= 0:
+            q = self.sentence_end_offsets[i]
+            if q < wstart:
+                return end
+            amp = self.entity_spans.get(q)
+            if amp is None or amp < wstart:
+                break
+            i -= 1
+        else:
+            return end
+        cut = q + 1
+        cut = self.chunker._OPTIONAL_CLOSERS_MATCH.match(self.html_src, cut, end).end()
+        cut = self.chunker._CLOSE_TAGS_MATCH.match(self.html_src, cut, end).end()
+        return cut
+
+def _tokenize_source(html_src, chunker=None):
+    """
+    Tokenize a normalized document into the parts of a ChunkSource.
+    Args:
+        html_src (str): Normalized HTML source.
+        chunker (HTMLChunker): Chunker used to tokenize the source.
+    Returns:
+        tuple: (text, (atom_html_starts, atom_html_ends, atom_text_starts, atom_text_ends, atom_is_tag), index_offsets)
+    """
+    chunker = chunker or HTMLChunker()
+    atoms = (array("q"), array("q"), array("q"), array("q"), array("b"))
+    html_starts, html_ends, text_starts, text_ends, is_tag = atoms
+    text_parts = []
+    html_pos = 0
+    text_pos = 0
+    for kind, token in chunker._iter_html_tokens(html_src):
+        if kind == "tag":
+            units = ((token, chunker._tag_text(token), False),)
+        else:
+            units = chunker._iter_text_runs(token)
+        for raw, plain, is_run in units:
+            if not is_run:
+                html_starts.append(html_pos)
+                html_ends.append(html_pos + len(raw))
+                text_starts.append(text_pos)
+                text_ends.append(text_pos + len(plain))
+                is_tag.append(kind == "tag")
+            text_parts.append(plain)
+            html_pos += len(raw)
+            text_pos += len(plain)
+    index = DocumentBoundaryIndex(html_src, chunker)
+    index_offsets = (index.tag_open_offsets, index.tag_close_offsets, index.sentence_end_offsets, index.entity_spans)
+    return "".join(text_parts), atoms, index_offsets
+
+def _normalize_shard(html_src):
+    """
+    Worker: clean and join the lines of one line-aligned shard.
+    """
+    chunker = HTMLChunker()
+    return chunker.join_paragraphs(chunker.clean_text(html_src))
+
+def _split_shards(src, shard_count, boundary_re):
+    """
+    Split src into about shard_count pieces, cutting only right after a match of boundary_re.
+    """
+    target = max(1, len(src) // shard_count)
+    cuts = [0]
+    pos = target
+    while pos < len(src):
+        m = boundary_re.search(src, pos)
+        if not m:
+            break
+        cuts.append(m.end())
+        pos = m.end() + target
+    cuts.append(len(src))
+    return [src[a:b] for a, b in zip(cuts, cuts[1:]) if b > a]
+
+def _shift(offsets, delta, typecode="q"):
+    """
+    Shift shard-local offsets by the shard's position in the merged document.
+    """
+    return array(typecode, (x + delta for x in offsets)) if delta else offsets
+
+def build_chunk_source_parallel(html_src, workers=4, chunker=None):
+    """
+    Normalize and tokenize a large document in a process pool, producing the same ChunkSource as
+    the serial path. Lines are normalized in line-aligned shards; the normalized HTML is tokenized in
+    shards cut right after </p>, </table> or </h1>-</h6>, and shard offsets are shifted and merged.
+    Falls back to serial processing where child processes are not allowed (e.g. daemonic Celery workers).
+    Args:
+        html_src (str): Raw HTML source.
+        workers (int): Number of worker processes (default: 4).
+        chunker (HTMLChunker): Chunker used for the serial fallback.
+    Returns:
+        ChunkSource: The normalized document.
+    """
+    chunker = chunker or HTMLChunker()
+    line_shards = _split_shards(html_src, workers, re.compile(r"\n"))
+    try:
+        with ProcessPoolExecutor(max_workers=workers) as executor:
+            normalized = " ".join(part for part in executor.map(_normalize_shard, line_shards) if part)
+            shards = _split_shards(normalized, workers, re.compile(r"</\s*(?:p|table|h[1-6])\s*>", re.IGNORECASE))
+            shard_parts = list(executor.map(_tokenize_source, shards))
+    except (AssertionError, OSError, RuntimeError) as e:
+        logger.warning("Parallel chunking unavailable (%s), falling back to serial.", e)
+        normalized = chunker.join_paragraphs(chunker.clean_text(html_src))
+        return ChunkSource(normalized, chunker)
+    text_parts = []
+    atoms = (array("q"), array("q"), array("q"), array("q"), array("b"))
+    tag_open, tag_close, sentence_ends, entity_spans = array("q"), array("q"), array("q"), {}
+    html_base = 0
+    text_base = 0
+    for shard, (text, shard_atoms, shard_offsets) in zip(shards, shard_parts):
+        text_parts.append(text)
+        for merged, part, delta in zip(atoms, shard_atoms, (html_base, html_base, text_base, text_base, 0)):
+            merged.extend(_shift(part, delta, merged.typecode))
+        tag_open.extend(_shift(shard_offsets[0], html_base))
+        tag_close.extend(_shift(shard_offsets[1], html_base))
+        sentence_ends.extend(_shift(shard_offsets[2], html_base))
+        for semicolon, amp in shard_offsets[3].items():
+            entity_spans[semicolon + html_base] = amp + html_base
+        html_base += len(shard)
+        text_base += len(text)
+    parts = ("".join(text_parts), atoms, (tag_open, tag_close, sentence_ends, entity_spans))
+    return ChunkSource(normalized, chunker, parts)
+
+class ChunkSource:
+    """
+    A normalized document shared by all of its chunks: the HTML, its full plain text, a map from
+    HTML offsets to plain text offsets, and its boundary index.
+    """
+    __slots__ = ("html", "text", "boundary_index", "_atom_html_starts", "_atom_html_ends", "_atom_text_starts", "_atom_text_ends", "_atom_is_tag")
+
+    def __init__(self, html_src, chunker=None, parts=None):
+        """
+        Build the plain text and offset map in one tokenizer pass.
+        Only tags and entities are recorded; inside entity-free runs HTML and text offsets advance together.
+        Args:
+            html_src (str): The normalized HTML source (after clean_text and join_paragraphs).
+            chunker (HTMLChunker): Chunker used to tokenize the source.
+            parts (tuple): Precomputed (text, atom tables, index offsets) from _tokenize_source, e.g. merged from shards.
+        """
+        chunker = chunker or HTMLChunker()
+        if parts is None:
+            parts = _tokenize_source(html_src, chunker)
+        text, atoms, index_offsets = parts
+        self.html = html_src
+        self.text = text
+        self._atom_html_starts, self._atom_html_ends, self._atom_text_starts, self._atom_text_ends, self._atom_is_tag = atoms
+        self.boundary_index = DocumentBoundaryIndex(html_src, chunker, index_offsets)
+
+    def text_offset(self, html_offset):
+        """
+        Map an HTML offset to a plain text offset. An offset inside a tag or entity maps to the end
+        of its text, matching how chunk cuts assign a straddled piece to the head.
+        Args:
+            html_offset (int): Offset into self.html.
+        Returns:
+            int: Offset into self.text.
+        """
+        i = bisect_right(self._atom_html_starts, html_offset) - 1
+        if i < 0:
+            return html_offset
+        if html_offset == self._atom_html_starts[i]:
+            return self._atom_text_starts[i]
+        if html_offset < self._atom_html_ends[i]:
+            return self._atom_text_ends[i]
+        return self._atom_text_ends[i] + html_offset - self._atom_html_ends[i]
+
+    def iter_raw_spans(self, max_text_chars=1000):
+        """
+        Split the document into raw spans of up to max_text_chars text characters.
+        Walks the tag/entity table and slices the runs between them arithmetically; spans are the
+        same as HTMLChunker._iter_raw_chunks on self.html.
+        Args:
+            max_text_chars (int): Maximum number of text characters per span (default: 1000).
+        Yields:
+            tuple: (start, end) HTML offsets.
+        """
+        chunk_start = 0
+        cur_len = 0
+        pos = 0
+        n_atoms = len(self._atom_html_starts)
+        for i in range(n_atoms + 1):
+            run_end = self._atom_html_starts[i] if i < n_atoms else len(self.html)
+            while pos < run_end:
+                room = max_text_chars - cur_len if cur_len > 0 else max(max_text_chars, 1)
+                if room <= 0:
+                    yield chunk_start, pos
+                    chunk_start = pos
+                    cur_len = 0
+                    continue
+                take = min(run_end - pos, room)
+                cur_len += take
+                pos += take
+            if i == n_atoms:
+                break
+            atom_len = self._atom_text_ends[i] - self._atom_text_starts[i]
+            if not self._atom_is_tag[i] and cur_len + atom_len > max_text_chars and cur_len > 0:
+                yield chunk_start, pos
+                chunk_start = pos
+                cur_len = 0
+            cur_len += atom_len
+            pos = self._atom_html_ends[i]
+        if chunk_start < len(self.html):
+            yield chunk_start, len(self.html)
+
+    def iter_spans(self, max_text_chars=1000, backtrack=300):
+        """
+        Yield final chunk spans with sentence-boundary carry-over applied, from offsets only.
+        Args:
+            max_text_chars (int): Maximum number of text characters per raw span (default: 1000).
+            backtrack (int): Number of characters to look back for incomplete segments (default: 300).
+        Yields:
+            tuple: (start, end) HTML offsets.
+        """
+        pending_start = None
+        pending_end = None
+        for start, end in self.iter_raw_spans(max_text_chars):
+            if pending_start is not None:
+                cut = self.boundary_index.find_cut(pending_start, pending_end, backtrack)
+                yield pending_start, cut
+                pending_start = cut
+            else:
+                pending_start = start
+            pending_end = end
+        if pending_start is not None:
+            yield pending_start, pending_end
+
+    def chunk(self, start, end):
+        """
+        Create a chunk for the HTML span [start, end).
+        """
+        return Chunk(self, start, end, self.text_offset(start), self.text_offset(end))
+
+class Chunk:
+    """
+    Compact chunk holding offsets into a shared ChunkSource; 'html' and 'text' are sliced on access.
+    Supports chunk["html"] / chunk["text"] like the chunk dicts it replaces.
+    """
+    __slots__ = ("source", "start", "end", "text_start", "text_end", "parent", "children")
+
+    def __init__(self, source, start, end, text_start, text_end, parent=None, children=None):
+        self.source = source
+        self.start = start
+        self.end = end
+        self.text_start = text_start
+        self.text_end = text_end
+        self.parent = parent
+        self.children = children if children is not None else []
+
+    @property
+    def html(self):
+        return self.source.html[self.start:self.end]
+
+    @property
+    def text(self):
+        return self.source.text[self.text_start:self.text_end].strip()
+
+    def __getitem__(self, key):
+        if key in self.__slots__ or key in ("html", "text"):
+            return getattr(self, key)
+        raise KeyError(key)
+
+    def get(self, key, default=None):
+        try:
+            return self[key]
+        except KeyError:
+            return default
+
+    def to_dict(self):
+        """
+        Materialize the chunk as a plain dict with 'html' and 'text' keys.
+        """
+        return {"html": self.html, "text": self.text}
+
+    def __repr__(self):
+        return f"Chunk(start={self.start}, end={self.end})"
+
 class ChunkPipeline:
     """
     High-level pipeline for chunking HTML using HTMLChunker.
+    Normalized sources and their boundary indexes are cached per document, so chunking the
+    same text at several sizes (e.g. 15000 for summaries, then 1000 for translation) prepares it once.
+    The cache is a process-wide LRU keyed by content hash, bounded by entry count and by total characters.
     """
-    def __init__(self, max_text_chars=1000, backtrack=300):
+    PREPARED_CACHE_SIZE = 4
+    PREPARED_CACHE_MAX_CHARS = 20_000_000
+    _prepared_cache = OrderedDict()
+    _prepared_lock = threading.Lock()
+
+    PARALLEL_MIN_CHARS = 2_000_000
+
+    def __init__(self, max_text_chars=1000, backtrack=300, chunk_mode="chars", max_tokens=None, token_model=None, workers=None):
         """
         Initialize ChunkPipeline.
         Args:
             max_text_chars (int): Maximum number of text characters per chunk (default: 1000).
             backtrack (int): Number of characters to look back for incomplete segments (default: 300).
             method (str): Method to use for incomplete sentence detection ('custom' or 'advanced', default: 'advanced').
+            chunk_mode (str): How chunks are sized ('chars' or 'token_budget', default: 'chars').
+                If chunk_mode == "token_budget", chunks hold at most max_tokens tokens of text.
+            max_tokens (int): Token budget per chunk for 'token_budget' mode (default: max_text_chars).
+            token_model (str): Model whose tiktoken encoder counts tokens (e.g., 'gpt-4o').
+            workers (int): If > 1, documents of at least PARALLEL_MIN_CHARS characters are normalized and
+                tokenized in a process pool of this size. Output is identical to serial mode.
         """
+        if chunk_mode not in ("chars", "token_budget"):
+            raise ValueError(f"Unsupported chunk_mode: {chunk_mode}")
         self.chunker = HTMLChunker()
+        self.workers = workers
         self.max_text_chars = max_text_chars
         self.backtrack = backtrack
+        self.chunk_mode = chunk_mode
+        self.max_tokens = (max_tokens or max_text_chars) if chunk_mode == "token_budget" else None
+        self.token_model = token_model
 
     def process(self, html_src, mode="get_chunks", chunk_method="html_aware"):
         """
@@ -247,19 +881,123 @@ class ChunkPipeline:
         Returns:
             List[Dict[str, str]]: List of chunk dicts with 'html', 'text', 'head', and 'tail' keys.
         """
-        html_src = self.chunker.clean_text(html_src)
-        html_src = self.chunker.join_paragraphs(html_src)
         if mode == "get_text":
+            html_src = self.chunker.clean_text(html_src)
+            html_src = self.chunker.join_paragraphs(html_src)
             return self.chunker.get_simple_text_from_html(html_src)
-        chunks = self.chunker.chunk_html_streaming(html_src, self.max_text_chars)
+        source = self.prepare(html_src)
+        html_src, boundary_index = source.html, source.boundary_index
         results = []
-        for chunk in chunks:
+        start = 0
+        for html_pieces, text_pieces in self.chunker._iter_raw_chunk_source(html_src, self.max_text_chars, self.max_tokens, self.token_model):
+            end = start + sum(map(len, html_pieces))
             if chunk_method == "html_aware":
-                head, tail = self.chunker.get_incomplete_end_html_aware(chunk["html"], self.backtrack)
+                cut = boundary_index.find_cut(start, end, self.backtrack)
+                head, tail = html_src[start:cut], html_src[cut:end]
             results.append({
-                "html": chunk["html"],
-                "text": chunk["text"],
+                "html": html_src[start:end],
+                "text": "".join(text_pieces).strip(),
                 "head": head,
                 "tail": tail,
             })
-        return results
\ No newline at end of file
+            start = end
+        return results
+
+    def prepare(self, html_src):
+        """
+        Normalize HTML source and build its ChunkSource, reusing the cached result for the same document.
+        Args:
+            html_src (str): HTML source string.
+        Returns:
+            ChunkSource: The normalized document with its text offset map and boundary index.
+        """
+        key = hashlib.sha256(html_src.encode("utf-8")).hexdigest()
+        with self._prepared_lock:
+            cached = self._prepared_cache.get(key)
+            if cached is not None:
+                self._prepared_cache.move_to_end(key)
+                return cached
+        if self.workers and self.workers > 1 and len(html_src) >= self.PARALLEL_MIN_CHARS:
+            source = build_chunk_source_parallel(html_src, self.workers, self.chunker)
+        else:
+            normalized = self.chunker.join_paragraphs(self.chunker.clean_text(html_src))
+            source = ChunkSource(normalized, self.chunker)
+        if len(source.html) > self.PREPARED_CACHE_MAX_CHARS:
+            return source
+        with self._prepared_lock:
+            self._prepared_cache[key] = source
+            self._prepared_cache.move_to_end(key)
+            total_chars = sum(len(cached.html) for cached in self._prepared_cache.values())
+            while len(self._prepared_cache) > self.PREPARED_CACHE_SIZE or total_chars > self.PREPARED_CACHE_MAX_CHARS:
+                _, evicted = self._prepared_cache.popitem(last=False)
+                total_chars -= len(evicted.html)
+        return source
+
+    def build_chunk_tree(self, html_src, sizes=(15000, 5000, 1000)):
+        """
+        Chunk HTML source at several resolutions from a single tokenization.
+        The finest level is chunked once with sentence-boundary carry-over; each coarser level groups
+        consecutive children while they fit its size, so every child nests exactly inside its parent.
+        Sizes are characters, or tokens in 'token_budget' mode.
+        Args:
+            html_src (str): HTML source string.
+            sizes (tuple): Chunk sizes from coarsest to finest (default: (15000, 5000, 1000)).
+        Returns:
+            dict: {
+                "sizes": [15000, 5000, 1000],
+                "levels": [[chunk, ...], ...]   # one list per size, coarsest first
+            }
+            Each Chunk has 'html', 'text', 'start', 'end' (offsets in the normalized source),
+            'parent' (index in the previous level, or None) and 'children' (indices in the next level).
+        """
+        sizes = sorted(sizes, reverse=True)
+        if not sizes:
+            raise ValueError("At least one chunk size is required.")
+        source = self.prepare(html_src)
+        max_tokens = sizes[-1] if self.chunk_mode == "token_budget" else None
+        level = []
+        sizes_of_level = []
+        if max_tokens:
+            for start, end, text in self.chunker._iter_chunk_spans(source.html, sizes[-1], self.backtrack, max_tokens, self.token_model, source.boundary_index):
+                level.append(source.chunk(start, end))
+                sizes_of_level.append(count_tokens(text, self.token_model))
+        else:
+            for start, end in source.iter_spans(sizes[-1], self.backtrack):
+                chunk = source.chunk(start, end)
+                level.append(chunk)
+                sizes_of_level.append(chunk.text_end - chunk.text_start)
+        levels = [level]
+        for level_size in sizes[-2::-1]:
+            parents = []
+            parent_sizes = []
+            for idx, child in enumerate(levels[0]):
+                if parents and parent_sizes[-1] + sizes_of_level[idx] <= level_size:
+                    parent = parents[-1]
+                    parent.end = child.end
+                    parent.text_end = child.text_end
+                    parent_sizes[-1] += sizes_of_level[idx]
+                else:
+                    parent = Chunk(source, child.start, child.end, child.text_start, child.text_end)
+                    parents.append(parent)
+                    parent_sizes.append(sizes_of_level[idx])
+                parent.children.append(idx)
+                child.parent = len(parents) - 1
+            levels.insert(0, parents)
+            sizes_of_level = parent_sizes
+        return {"sizes": sizes, "levels": levels}
+
+    def iter_chunks(self, html_src):
+        """
+        Lazily chunk HTML source with sentence-boundary carry-over applied, without BeautifulSoup.
+        Args:
+            html_src (str): HTML source string.
+        Yields:
+            Chunk: Offset-based chunk exposing 'html' and 'text'.
+        """
+        source = self.prepare(html_src)
+        if self.chunk_mode == "chars":
+            for start, end in source.iter_spans(self.max_text_chars, self.backtrack):
+                yield source.chunk(start, end)
+            return
+        for start, end, _ in self.chunker._iter_chunk_spans(source.html, self.max_text_chars, self.backtrack, self.max_tokens, self.token_model, source.boundary_index):
+            yield source.chunk(start, end)
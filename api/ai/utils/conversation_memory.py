@@ -0,0 +1,150 @@
+import logging
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+logger = logging.getLogger(__name__)
+
+class ConversationMemory:
+    """
+    Compressed memory of the turns that left a manager's recent message window.
+    Turns pushed out of the window are kept verbatim until a background refresh folds them into the summary,
+    so add_message never waits for an LLM call and context() returns the latest available state.
+    At most max_pending of those turns are sent verbatim: beyond that, context() waits up to refresh_wait seconds
+    for the running refresh and then keeps only the latest ones, so the prompt size stays bounded.
+    System turns are never summarized; the latest max_system_lines of them are kept verbatim.
+    """
+    EXECUTOR = ThreadPoolExecutor(max_workers=4, thread_name_prefix="conversation-memory")
+
+    def __init__(self, manager, max_tokens=500, max_pending=6, max_system_lines=10, refresh_wait=1.0):
+        """
+        Args:
+            manager (BaseAIManager): Manager used for the summarization calls.
+            max_tokens (int): Token budget of the summary. Default is 500.
+            max_pending (int): Maximum number of turns not yet in the summary that context() returns verbatim. Default is 6.
+            max_system_lines (int): Maximum number of system turns kept. Default is 10.
+            refresh_wait (float): Seconds context() waits for the running refresh when more than max_pending turns are pending. Default is 1.0.
+
+        Example:
+            memory = ConversationMemory(manager, max_tokens=500)
+            memory.push(manager.messages[:-max_history])
+            context = memory.context()
+        """
+        self.manager = manager
+        self.max_tokens = max_tokens
+        self.max_pending = max_pending
+        self.max_system_lines = max_system_lines
+        self.refresh_wait = refresh_wait
+        self.summary = ""
+        self.pending = []
+        self.system_lines = []
+        self.refresh_count = 0
+        self._future = None
+        self._generation = 0
+        self._lock = threading.Lock()
+
+    def push(self, turns):
+        """
+        Add turns that left the recent window and schedule a background refresh of the summary.
+
+        Args:
+            turns (list): Message dicts ({"role", "content"}) in conversation order.
+        """
+        with self._lock:
+            for turn in turns:
+                content = self._text(turn["content"])
+                if turn["role"] == "system":
+                    self.system_lines.append(f"System: {content}")
+                elif turn["role"] == "user":
+                    self.pending.append(f"User said: {content}")
+                elif turn["role"] == "assistant":
+                    self.pending.append(f"Assistant said: {content}")
+            del self.system_lines[:-self.max_system_lines]
+            if self.pending and self._future is None:
+                self._schedule()
+
+    @staticmethod
+    def _text(content):
+        if isinstance(content, list):
+            return " ".join(part["text"] for part in content if part.get("type") == "text")
+        return content
+
+    def context(self):
+        """
+        Return the latest available memory: the summary, the turns not yet folded into it and the system turns.
+        If more than max_pending turns are waiting for the summary, the running refresh is given up to refresh_wait
+        seconds; the turns still pending after that are cut to the latest max_pending.
+
+        Returns:
+            str: Memory text, or "" if no turn has left the window.
+        """
+        with self._lock:
+            future = self._future if len(self.pending) > self.max_pending else None
+        if future is not None:
+            try:
+                future.result(self.refresh_wait)
+            except Exception:
+                pass
+        with self._lock:
+            context = ""
+            if self.summary:
+                context += f"This is the summary of past conversations:\n{self.summary}\n"
+            if self.pending:
+                pending = self.pending[-self.max_pending:]
+                context += "Earlier messages not yet in the summary:\n" + "\n".join(pending) + "\n"
+            if self.system_lines:
+                context += "System messages:\n" + "\n".join(self.system_lines) + "\n"
+            return context
+
+    def wait(self, timeout=None):
+        """
+        Wait until no refresh is running (for tests and shutdown).
+
+        Returns:
+            bool: True if no refresh is running.
+        """
+        with self._lock:
+            future = self._future
+        if future is None:
+            return True
+        future.result(timeout)
+        return self.wait(timeout)
+
+    def clear(self):
+        """
+        Forget the memory; a refresh still running is discarded.
+        """
+        with self._lock:
+            self._generation += 1
+            self.summary = ""
+            self.pending = []
+            self.system_lines = []
+            self._future = None
+
+    def _schedule(self):
+        self._future = self.EXECUTOR.submit(self._refresh, self._generation, self.summary, list(self.pending))
+
+    def _refresh(self, generation, summary, lines):
+        text = "\n".join(([f"Summary so far: {summary}"] if summary else []) + lines)
+        # The refresh is a live call of its own: it must neither clear the history nor join a chunk batch.
+        self.manager._thread_state.keep_messages = True
+        self.manager._thread_state.skip_batch = True
+        try:
+            new_summary = self.manager._summarize_step(text, self.max_tokens)
+        except Exception as e:
+            logger.error("Error refreshing conversation summary: %s", e)
+            new_summary = None
+        finally:
+            self.manager._thread_state.keep_messages = False
+            self.manager._thread_state.skip_batch = False
+        with self._lock:
+            if generation != self._generation:
+                return
+            self._future = None
+            if not new_summary or not new_summary.strip():
+                logger.warning("Conversation summary refresh returned no summary; keeping the previous one")
+                return
+            self.summary = new_summary
+            del self.pending[:len(lines)]
+            self.refresh_count += 1
+            if self.pending:
+                self._schedule()
@@ -0,0 +1,300 @@
+import math
+
+from ai.utils.chunk_manager import count_tokens
+from ai.utils.prompt_builder import PromptBuilder
+
+class CostPlanner:
+    """
+    Pre-flight estimate of a document pipeline: number of calls, input/output tokens, cost and critical-path
+    sequential depth (the number of calls that must run one after another), without calling any provider.
+    The planner walks the same chunk plan as the pipeline and counts the real prompts with the process-wide
+    cached token encoder. Summaries that are already cached are counted as free. Output tokens are estimates:
+    a summary step is assumed to fill its max_length (bounded by its input), and a chunk step to produce about
+    as many tokens as its current chunk (bounded by its max tokens).
+    """
+    MESSAGE_OVERHEAD_TOKENS = 4
+
+    def __init__(self, manager):
+        """
+        Args:
+            manager (BaseAIManager): Manager whose chunking, prompts, model and pricing are planned.
+
+        Example:
+            plan = CostPlanner(manager).plan_translate(text, target_language="fr")
+            print(plan["calls"], plan["cost"], plan["sequential_depth"])
+        """
+        self.manager = manager
+        self.model = manager._model_name()
+
+    def count(self, text):
+        return count_tokens(text or "", self.manager.chunk_token_model or self.model)
+
+    def request_tokens(self, request):
+        """
+        Count the input tokens of generate_response keyword arguments (messages or prompt).
+        """
+        if "messages" in request:
+            return sum(self.count(str(message.get("content", ""))) + self.MESSAGE_OVERHEAD_TOKENS for message in request["messages"])
+        return self.count(request.get("prompt", ""))
+
+    def _stage(self, name, calls=0, input_tokens=0, output_tokens=0, sequential_depth=0, cached=False):
+        return {
+            "stage": name,
+            "calls": calls,
+            "input_tokens": input_tokens,
+            "output_tokens": output_tokens,
+            "cost": self.manager._estimate_cost(input_tokens, output_tokens),
+            "sequential_depth": sequential_depth,
+            "cached": cached,
+        }
+
+    def plan(self, pipeline, stages, sequential_stages=None, extra_cost=0):
+        """
+        Combine stage estimates into a pipeline plan.
+
+        Args:
+            pipeline (str): Pipeline name.
+            stages (list): Stage dicts.
+            sequential_stages (list): Names of the stages on the critical path. Default is all stages.
+            extra_cost (float): Cost not tied to LLM tokens (e.g., OCR).
+
+        Returns:
+            dict: {"pipeline", "model", "calls", "input_tokens", "output_tokens", "cost", "sequential_depth", "stages"}
+        """
+        on_path = [stage for stage in stages if sequential_stages is None or stage["stage"] in sequential_stages]
+        return {
+            "pipeline": pipeline,
+            "model": self.model,
+            "calls": sum(stage["calls"] for stage in stages),
+            "input_tokens": sum(stage["input_tokens"] for stage in stages),
+            "output_tokens": sum(stage["output_tokens"] for stage in stages),
+            "cost": sum(stage["cost"] for stage in stages) + extra_cost,
+            "sequential_depth": sum(stage["sequential_depth"] for stage in on_path),
+            "stages": stages,
+        }
+
+    def plan_summary(self, name, text, max_length, max_chunk_size, kind="general", strategy="rolling", max_concurrency=4, system_prompt=None):
+        """
+        Estimate summarize() (kind 'general'), summarize_for_translation() or summarize_for_manipulation().
+
+        Args:
+            name (str): Stage name.
+            text (str): Text to summarize.
+            max_length (int): max_length of the summary.
+            max_chunk_size (int): max_chunk_size of the summary.
+            kind (str): Summary cache kind (e.g., 'general', 'translation', 'manipulation:academic').
+            strategy (str): 'rolling' or 'map_reduce'.
+            max_concurrency (int): Concurrency of the map_reduce strategy.
+            system_prompt (str): System prompt of the steps. Default is the general summarization request.
+
+        Returns:
+            dict: The stage estimate, with "summary_tokens" (estimated length of the summary).
+        """
+        if len(text) <= max_length:
+            stage = self._stage(name)
+            stage["summary_tokens"] = self.count(text)
+            return stage
+        if self.manager._get_cached_summary(kind, text, max_length, max_chunk_size, strategy=strategy) is not None:
+            stage = self._stage(name, cached=True)
+            stage["summary_tokens"] = max_length
+            return stage
+
+        def step(input_tokens):
+            if system_prompt is None:
+                prompt_tokens = self.request_tokens(self.manager._summarize_request("", max_length))
+            else:
+                prompt_tokens = self.count(system_prompt) + 2 * self.MESSAGE_OVERHEAD_TOKENS
+            return prompt_tokens + input_tokens, min(max_length, input_tokens)
+
+        chunk_tokens = [self.count(chunk["text"]) for chunk in self.manager.build_chunks(text, max_chunk_size=max_chunk_size)]
+        calls, total_in, total_out = 0, 0, 0
+        if strategy == "map_reduce" and chunk_tokens:
+            partials = []
+            for tokens in chunk_tokens:
+                step_in, step_out = step(tokens)
+                calls, total_in, total_out = calls + 1, total_in + step_in, total_out + step_out
+                partials.append(step_out)
+            depth = math.ceil(len(partials) / max(1, max_concurrency))
+            while len(partials) > 1:
+                # Group with the pipeline's own rule, on placeholders of about 4 characters per token.
+                groups = self.manager._group_partials(["x" * (tokens * 4) for tokens in partials], max_chunk_size)
+                merged = []
+                for group in groups:
+                    group_tokens = sum(len(part) // 4 for part in group)
+                    if len(group) == 1:
+                        merged.append(group_tokens)
+                        continue
+                    step_in, step_out = step(group_tokens)
+                    calls, total_in, total_out = calls + 1, total_in + step_in, total_out + step_out
+                    merged.append(step_out)
+                depth += math.ceil(sum(1 for group in groups if len(group) > 1) / max(1, max_concurrency))
+                partials = merged
+            summary_tokens = partials[0] if partials else 0
+        else:
+            summary_tokens = 0
+            for tokens in chunk_tokens:
+                step_in, step_out = step(summary_tokens + tokens)
+                calls, total_in, total_out = calls + 1, total_in + step_in, total_out + step_out
+                summary_tokens = step_out
+            depth = calls
+        stage = self._stage(name, calls, total_in, total_out, depth)
+        stage["summary_tokens"] = summary_tokens
+        return stage
+
+    def plan_fused_summary(self, name, text, purpose, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size, manipulation_type="improve_fluency"):
+        """
+        Estimate summarize_fused(): one call per chunk, run one after another, each carrying both running summaries.
+
+        Args:
+            name (str): Stage name.
+            text (str): Text to summarize.
+            purpose (str): 'translation' or 'manipulation'.
+            max_length_for_general_summary (int): max_length_for_general_summary of summarize_fused.
+            max_length_for_task_summary (int): max_length_for_task_summary of summarize_fused.
+            max_chunk_size (int): max_chunk_size of summarize_fused.
+            manipulation_type (str): Manipulation style when purpose is 'manipulation'.
+
+        Returns:
+            dict: The stage estimate, with "general_summary_tokens" and "task_summary_tokens".
+        """
+        kind, task_prompt = self.manager._fused_summary_task(purpose, manipulation_type)
+        general_ready = len(text) <= max_length_for_general_summary or self.manager._get_cached_summary("general", text, max_length_for_general_summary, max_chunk_size, strategy="fused") is not None
+        task_ready = len(text) <= max_length_for_task_summary or self.manager._get_cached_summary(kind, text, max_length_for_task_summary, max_chunk_size, strategy="fused") is not None
+        if general_ready and task_ready:
+            stage = self._stage(name, cached=len(text) > min(max_length_for_general_summary, max_length_for_task_summary))
+            stage["general_summary_tokens"] = min(self.count(text), max_length_for_general_summary)
+            stage["task_summary_tokens"] = min(self.count(text), max_length_for_task_summary)
+            return stage
+        prompt_tokens = self.request_tokens(self.manager._fused_summary_request(task_prompt, max_length_for_general_summary, max_length_for_task_summary, "", "", ""))
+        calls, total_in, total_out = 0, 0, 0
+        general_tokens, task_tokens = 0, 0
+        for chunk in self.manager.build_chunks(text, max_chunk_size=max_chunk_size):
+            tokens = self.count(chunk["text"])
+            total_in += prompt_tokens + general_tokens + task_tokens + tokens
+            general_tokens = min(max_length_for_general_summary, general_tokens + tokens)
+            task_tokens = min(max_length_for_task_summary, task_tokens + tokens)
+            calls, total_out = calls + 1, total_out + general_tokens + task_tokens
+        stage = self._stage(name, calls, total_in, total_out, calls)
+        stage["general_summary_tokens"] = general_tokens
+        stage["task_summary_tokens"] = task_tokens
+        return stage
+
+    def plan_chunk_tasks(self, name, chunks, system_prompt, document_context_tokens, max_tokens, max_workers=None, extra_chunk_tokens=None):
+        """
+        Estimate one call per chunk built with PromptBuilder (previous, current and next chunk as chunk material).
+
+        Args:
+            name (str): Stage name.
+            chunks (list): Chunks from build_chunks.
+            system_prompt (str): The pipeline's system prompt.
+            document_context_tokens (list): (label, estimated tokens) of the document-level context.
+            max_tokens (int): Max output tokens of each call.
+            max_workers (int): Concurrency; None means the chunks run one after another.
+            extra_chunk_tokens (callable): extra_chunk_tokens(i, outputs) -> additional input tokens of chunk i,
+                given the estimated outputs of the previous chunks (for sequential pipelines).
+
+        Returns:
+            dict: The stage estimate, with "outputs" (estimated output tokens per chunk).
+        """
+        prompt_builder = PromptBuilder(system_prompt, [(label, "") for label, _ in document_context_tokens])
+        context_tokens = sum(tokens for _, tokens in document_context_tokens)
+        total_in, outputs = 0, []
+        for i, chunk in enumerate(chunks):
+            request = prompt_builder.request(self.manager.ai_type, self.manager._neighbour_chunks_context(chunks, i), max_tokens)
+            input_tokens = self.request_tokens(request) + context_tokens
+            if extra_chunk_tokens:
+                input_tokens += extra_chunk_tokens(i, outputs)
+            total_in += input_tokens
+            outputs.append(min(max_tokens, self.count(chunk["html"])))
+        depth = len(chunks) if not max_workers else math.ceil(len(chunks) / max(1, max_workers))
+        stage = self._stage(name, len(chunks), total_in, sum(outputs), depth)
+        stage["outputs"] = outputs
+        return stage
+
+    def _document_summaries(self, text, max_length_for_general_summary, max_chunk_size_for_general_summary, task=None, max_length_for_task_summary=None, max_chunk_size_for_task_summary=None, task_kind=None, task_prompt=None):
+        stages = [self.plan_summary("general_summary", text, max_length_for_general_summary, max_chunk_size_for_general_summary)]
+        if task:
+            stages.append(self.plan_summary(f"{task}_summary", text, max_length_for_task_summary, max_chunk_size_for_task_summary, kind=task_kind, system_prompt=task_prompt))
+        return stages
+
+    def _task_summaries(self, text, purpose, max_length_for_general_summary, max_chunk_size_for_general_summary, max_length_for_task_summary, max_chunk_size_for_task_summary, fused_summary, manipulation_type="improve_fluency"):
+        """
+        Return (summary stages, general summary tokens, task summary tokens), planned as two passes or, with
+        fused_summary, as the single summarize_fused pass (which uses max_chunk_size_for_general_summary).
+        """
+        if fused_summary:
+            stage = self.plan_fused_summary("summaries", text, purpose, max_length_for_general_summary, max_length_for_task_summary, max_chunk_size_for_general_summary, manipulation_type)
+            return [stage], stage["general_summary_tokens"], stage["task_summary_tokens"]
+        kind, task_prompt = self.manager._fused_summary_task(purpose, manipulation_type)
+        stages = self._document_summaries(text, max_length_for_general_summary, max_chunk_size_for_general_summary, purpose, max_length_for_task_summary, max_chunk_size_for_task_summary, kind, task_prompt)
+        return stages, stages[0]["summary_tokens"], stages[1]["summary_tokens"]
+
+    def plan_translate(self, text, target_language, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_translation_summary=5000, max_chunk_size_for_translation_summary=15000, max_chunk_size=1000, max_translation_tokens=5000, max_workers=None, fused_summary=False, **kwargs):
+        """
+        Estimate translate(). Arguments are the same as translate().
+        """
+        summaries, general_tokens, task_tokens = self._task_summaries(text, "translation", max_length_for_general_summary, max_chunk_size_for_general_summary, max_length_for_translation_summary, max_chunk_size_for_translation_summary, fused_summary)
+        chunks = self.manager.build_chunks(text, max_chunk_size=max_chunk_size)
+        chunk_stage = self.plan_chunk_tasks(
+            "translate_chunks", chunks, self.manager._translation_system_prompt(target_language),
+            [("General summary", general_tokens), ("Translation summary", task_tokens)],
+            max_translation_tokens, max_workers or self.manager.chunk_concurrency
+        )
+        return self.plan("translate", summaries + [chunk_stage])
+
+    def plan_manipulate(self, text, manipulation_type="improve_fluency", target_language=None, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_length_for_manipulation_summary=5000, max_chunk_size_for_manipulation_summary=15000, max_chunk_size=1000, max_manipulation_tokens=5000, running_summary_max_tokens=1000, running_summary_every=None, fused_summary=False, **kwargs):
+        """
+        Estimate manipulate_text(). Arguments are the same as manipulate_text(). Chunks run one after another and
+        the running summary is refreshed with one extra call whenever it would exceed running_summary_max_tokens.
+        """
+        summaries, general_tokens, task_tokens = self._task_summaries(text, "manipulation", max_length_for_general_summary, max_chunk_size_for_general_summary, max_length_for_manipulation_summary, max_chunk_size_for_manipulation_summary, fused_summary, manipulation_type)
+        chunks = self.manager.build_chunks(text, max_chunk_size=max_chunk_size)
+        running = {"tokens": 0, "pending": 0, "refreshes": 0, "refresh_input": 0}
+
+        def previous_outputs(i, outputs):
+            if i == 0:
+                return 0
+            running["tokens"] += outputs[-1]
+            running["pending"] += 1
+            if (running_summary_every and running["pending"] >= running_summary_every) or running["tokens"] > running_summary_max_tokens:
+                running["refreshes"] += 1
+                running["refresh_input"] += running["tokens"]
+                running["tokens"] = min(running_summary_max_tokens, running["tokens"])
+                running["pending"] = 0
+            return outputs[-1] + running["tokens"]
+
+        chunk_stage = self.plan_chunk_tasks(
+            "manipulate_chunks", chunks, self.manager._manipulation_system_prompt(manipulation_type, target_language),
+            [("General summary", general_tokens), ("Manipulation summary", task_tokens)],
+            max_manipulation_tokens, None, previous_outputs
+        )
+        refresh_prompt_tokens = self.request_tokens(self.manager._summarize_request("", running_summary_max_tokens))
+        refresh_stage = self._stage(
+            "running_summary", running["refreshes"],
+            running["refreshes"] * refresh_prompt_tokens + running["refresh_input"],
+            running["refreshes"] * running_summary_max_tokens, running["refreshes"]
+        )
+        return self.plan("manipulate_text", summaries + [chunk_stage, refresh_stage])
+
+    def plan_chunk_pipeline(self, pipeline, system_prompt, text, max_length_for_general_summary=2000, max_chunk_size_for_general_summary=15000, max_chunk_size=2500, max_tokens=5000, max_workers=None):
+        """
+        Estimate a general-summary + one-call-per-chunk pipeline (Q&A, MCQ, teaching content).
+        """
+        summaries = self._document_summaries(text, max_length_for_general_summary, max_chunk_size_for_general_summary)
+        chunks = self.manager.build_chunks(text, max_chunk_size=max_chunk_size)
+        chunk_stage = self.plan_chunk_tasks(
+            f"{pipeline}_chunks", chunks, system_prompt,
+            [("General summary", summaries[0]["summary_tokens"])],
+            max_tokens, max_workers or self.manager.chunk_concurrency
+        )
+        return self.plan(pipeline, summaries + [chunk_stage])
+
+    def plan_embeddings(self, text, max_chunk_size=1000, embedding_model="text-embedding-3-large"):
+        """
+        Estimate build_materials_for_rag(): one embedding call per chunk, run one after another.
+        """
+        chunks = self.manager.build_chunks(text, max_chunk_size=max_chunk_size)
+        input_tokens = sum(self.count(chunk["text"]) for chunk in chunks)
+        stage = self._stage("embeddings", len(chunks), input_tokens, 0, len(chunks))
+        stage["cost"] = self.manager._estimate_cost(input_tokens, 0, model=embedding_model)
+        return stage
@@ -0,0 +1,170 @@
+import logging
+import json
+import time
+import uuid
+from datetime import datetime, timezone
+
+from django.core.cache import cache
+from django.db import transaction
+from django.db.models import Case, F, FloatField, Value, When
+
+from core.models import UserModel, ProfileModel, CreditLedgerEntryModel
+
+logger = logging.getLogger(__name__)
+
+# Moves the pending deltas and ledger entries to the flushing keys in one step, so charges recorded
+# during a flush go to the next one. A snapshot left by a failed flush is returned again instead.
+SNAPSHOT_SCRIPT = """
+local flush_id = redis.call('GET', KEYS[5])
+if flush_id then
+    return flush_id
+end
+if redis.call('EXISTS', KEYS[1]) == 0 and redis.call('EXISTS', KEYS[2]) == 0 then
+    return false
+end
+if redis.call('EXISTS', KEYS[1]) == 1 then
+    redis.call('RENAME', KEYS[1], KEYS[3])
+end
+if redis.call('EXISTS', KEYS[2]) == 1 then
+    redis.call('RENAME', KEYS[2], KEYS[4])
+end
+redis.call('SET', KEYS[5], ARGV[1])
+return ARGV[1]
+"""
+
+class CreditLedger:
+    """
+    Aggregates credit charges per user in Redis and applies them to the profiles in periodic flushes.
+    Every charge is one atomic increment of the user's pending delta plus one pending ledger entry;
+    a flush applies all pending deltas with a single F() expression update and writes the entries
+    to the append-only CreditLedgerEntry table in the same transaction.
+    A failed flush keeps its snapshot and is retried by the next one; flush_id makes the retry idempotent.
+    """
+    PREFIX = "credit_ledger"
+
+    def __init__(self, lock_timeout=300):
+        """
+        Args:
+            lock_timeout (int): Seconds a flush may hold the flush lock. Default is 300.
+
+        Example:
+            ledger = CreditLedger()
+            ledger.charge(user.id, 0.0125, source="open_ai:gpt-4o")
+            ledger.flush()
+        """
+        self.lock_timeout = lock_timeout
+        self.pending_key = f"{self.PREFIX}:pending"
+        self.pending_entries_key = f"{self.PREFIX}:pending_entries"
+        self.flushing_key = f"{self.PREFIX}:flushing"
+        self.flushing_entries_key = f"{self.PREFIX}:flushing_entries"
+        self.flush_id_key = f"{self.PREFIX}:flush_id"
+        self.lock_key = f"{self.PREFIX}:flush_lock"
+
+    @property
+    def client(self):
+        return cache.client.get_client(write=True)
+
+    def charge(self, user_id, cost, source=""):
+        """
+        Record a charge to be applied by the next flush.
+
+        Args:
+            user_id (int): Id of the charged user.
+            cost (float): Amount to subtract from the user's credit.
+            source (str): What was charged (e.g., 'open_ai:gpt-4o', 'ocr:document_ai').
+
+        Returns:
+            bool: True if the charge was recorded, False if Redis is unavailable (the caller should charge directly).
+        """
+        if not cost:
+            return True
+        entry = json.dumps({"user_id": user_id, "amount": cost, "source": source, "charged_at": time.time()})
+        try:
+            pipe = self.client.pipeline(transaction=True)
+            pipe.hincrbyfloat(self.pending_key, user_id, cost)
+            pipe.rpush(self.pending_entries_key, entry)
+            pipe.execute()
+            return True
+        except Exception as e:
+            logger.warning("Credit ledger unavailable: %s", e)
+            return False
+
+    def pending(self, user_id):
+        """
+        Get the charges of a user not yet applied to the profile.
+
+        Returns:
+            float: Pending amount; subtract it from profile.credit for the up-to-date balance.
+        """
+        client = self.client
+        return sum(float(client.hget(key, user_id) or 0) for key in (self.pending_key, self.flushing_key))
+
+    def flush(self):
+        """
+        Apply all pending charges to the profiles and append them to the ledger.
+
+        Returns:
+            int: Number of ledger entries written (0 if nothing was pending or another flush is running).
+
+        Example:
+            flush_credit_ledger_task.delay()
+        """
+        client = self.client
+        lock = client.lock(self.lock_key, timeout=self.lock_timeout)
+        if not lock.acquire(blocking=False):
+            return 0
+        try:
+            flush_id = client.eval(SNAPSHOT_SCRIPT, 5, self.pending_key, self.pending_entries_key, self.flushing_key, self.flushing_entries_key, self.flush_id_key, uuid.uuid4().hex)
+            if not flush_id:
+                return 0
+            flush_id = flush_id.decode("utf-8") if isinstance(flush_id, bytes) else flush_id
+            deltas = {int(user_id): float(amount) for user_id, amount in client.hgetall(self.flushing_key).items()}
+            entries = [json.loads(raw) for raw in client.lrange(self.flushing_entries_key, 0, -1)]
+            written = self.apply(deltas, entries, flush_id)
+            client.delete(self.flushing_key, self.flushing_entries_key, self.flush_id_key)
+            logger.info("Credit ledger flush %s: %s users, %s entries", flush_id, len(deltas), written)
+            return written
+        finally:
+            try:
+                lock.release()
+            except Exception:
+                pass
+
+    @staticmethod
+    def apply(deltas, entries, flush_id):
+        """
+        Subtract the deltas from the profiles and write the ledger entries in one transaction.
+        Does nothing if entries of flush_id were already written; entries of deleted users are dropped.
+
+        Args:
+            deltas (dict): user id -> amount to subtract.
+            entries (list): {"user_id", "amount", "source", "charged_at"} dicts; charged_at is a Unix timestamp.
+            flush_id (str): Id of the flush.
+
+        Returns:
+            int: Number of ledger entries written.
+        """
+        with transaction.atomic():
+            if CreditLedgerEntryModel.objects.filter(flush_id=flush_id).exists():
+                return 0
+            existing_user_ids = set(UserModel.objects.filter(id__in={entry["user_id"] for entry in entries}).values_list("id", flat=True))
+            entries = [entry for entry in entries if entry["user_id"] in existing_user_ids]
+            if deltas:
+                ProfileModel.objects.filter(user_id__in=list(deltas)).update(
+                    credit=F("credit") - Case(
+                        *[When(user_id=user_id, then=Value(amount)) for user_id, amount in deltas.items()],
+                        default=Value(0.0),
+                        output_field=FloatField()
+                    )
+                )
+            CreditLedgerEntryModel.objects.bulk_create([
+                CreditLedgerEntryModel(
+                    user_id=entry["user_id"],
+                    amount=entry["amount"],
+                    source=entry.get("source", ""),
+                    charged_at=datetime.fromtimestamp(entry["charged_at"], tz=timezone.utc),
+                    flush_id=flush_id
+                )
+                for entry in entries
+            ], batch_size=1000)
+        return len(entries)
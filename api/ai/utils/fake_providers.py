@@ -0,0 +1,598 @@
+import io
+import re
+import json
+import math
+import time
+import wave
+import base64
+import random
+import struct
+import asyncio
+import hashlib
+import threading
+from datetime import timedelta
+from types import SimpleNamespace
+
+import requests
+import azure.cognitiveservices.speech as speechsdk
+from PyPDF2 import PdfReader
+
+from ai.utils.chunk_manager import count_tokens
+
+WORDS = (
+    "light energy matter system model value process example concept result method structure change "
+    "force time space signal data function theory question answer reason effect pattern rule level"
+).split()
+
+class FakeProviderError(Exception):
+    """
+    Error raised by a fake provider call (status_code 500, or 429 for FakeRateLimitError).
+    """
+    def __init__(self, message, status_code=500, retry_after=None):
+        super().__init__(message)
+        self.status_code = status_code
+        self.retry_after = retry_after
+
+class FakeRateLimitError(FakeProviderError):
+    def __init__(self, message="Rate limit reached", retry_after=1):
+        super().__init__(message, status_code=429, retry_after=retry_after)
+
+class FakeHTTPResponse:
+    """
+    requests.Response stand-in for REST fakes.
+    """
+    def __init__(self, status_code, body):
+        self.status_code = status_code
+        self.ok = status_code < 400
+        self._body = body
+        self.text = json.dumps(body)
+
+    def json(self):
+        return self._body
+
+    def raise_for_status(self):
+        if not self.ok:
+            raise requests.HTTPError(f"{self.status_code} Error: {self._body}", response=self)
+
+class FakeProviders:
+    """
+    Deterministic local stand-ins for the provider clients used by the managers (OpenAI, Gemini, Google
+    Speech/TTS/Vision, Document AI, Azure Speech and AWS Polly), for benchmarking and load tests without keys.
+    Outputs depend only on the request and the seed: chat responses follow the JSON schema the prompt asks for
+    (teaching content, Q&A, MCQ, SSML + slides, fused summaries), TTS returns WAV audio with SSML mark timepoints,
+    STT reads back the text of fake WAV audio, embeddings are unit vectors and Document AI returns layout blocks
+    built from the PDF text layer. Latency, error rate and rate-limit (429) rate are configurable.
+    """
+    SAMPLE_RATE = 16000
+
+    def __init__(self, latency="lognormal:0.8:0.4", error_rate=0.0, rate_limit_rate=0.0, seed=0, words_per_second=2.5, output_tokens=None, tokens_per_second=None, cache_min_tokens=1024):
+        """
+        Args:
+            latency: Latency of each call: seconds (float), "fixed:<s>", "uniform:<min>:<max>", "lognormal:<median>:<sigma>"
+                or a callable(random.Random) -> seconds. Default is "lognormal:0.8:0.4".
+            error_rate (float): Share of calls failing with FakeProviderError (HTTP 500). Default is 0.
+            rate_limit_rate (float): Share of calls failing with FakeRateLimitError (HTTP 429). Default is 0.
+            seed (int): Seed of all generated outputs, latencies and failures. Default is 0.
+            words_per_second (float): Speaking rate of the fake speech. Default is 2.5.
+            output_tokens (int): If set, the approximate size of generated text; otherwise derived from the input. Default is None.
+            tokens_per_second (float): If set, chat calls also take completion_tokens / tokens_per_second seconds. Default is None.
+            cache_min_tokens (int): Minimum system prompt size reported as cached when repeated. Default is 1024.
+
+        Example:
+            fakes = FakeProviders(latency="lognormal:0.5:0.3", rate_limit_rate=0.02, seed=7)
+            fakes.install(open_ai_manager)
+        """
+        self.latency = latency
+        self.error_rate = error_rate
+        self.rate_limit_rate = rate_limit_rate
+        self.seed = seed
+        self.words_per_second = words_per_second
+        self.output_tokens = output_tokens
+        self.tokens_per_second = tokens_per_second
+        self.cache_min_tokens = cache_min_tokens
+        self._attempts = {}
+        self._seen_prefixes = set()
+        self._lock = threading.Lock()
+
+    @classmethod
+    def from_settings(cls, settings):
+        """
+        Build the fakes from settings.AI_FAKE_PROVIDERS.
+        """
+        return cls(**getattr(settings, "AI_FAKE_PROVIDERS", {}))
+
+    # ---------------- behaviour ----------------
+
+    def _rng(self, *parts):
+        digest = hashlib.sha256(repr((self.seed,) + parts).encode("utf-8")).digest()
+        return random.Random(int.from_bytes(digest[:8], "big"))
+
+    def _sample_latency(self, rng):
+        latency = self.latency
+        if callable(latency):
+            return max(0.0, latency(rng))
+        if isinstance(latency, (int, float)):
+            return float(latency)
+        kind, *params = str(latency).split(":")
+        params = [float(param) for param in params]
+        if kind == "fixed":
+            return params[0]
+        if kind == "uniform":
+            return rng.uniform(params[0], params[1])
+        if kind == "lognormal":
+            return params[0] * math.exp(rng.gauss(0, params[1]))
+        return float(kind)
+
+    def _outcome(self, kind, key):
+        with self._lock:
+            attempt = self._attempts.get((kind, key), 0)
+            self._attempts[(kind, key)] = attempt + 1
+        rng = self._rng(kind, key, attempt)
+        roll = rng.random()
+        delay = self._sample_latency(rng)
+        if roll < self.rate_limit_rate:
+            return delay, FakeRateLimitError(f"Fake {kind}: rate limit reached", retry_after=1)
+        if roll < self.rate_limit_rate + self.error_rate:
+            return delay, FakeProviderError(f"Fake {kind}: internal error")
+        return delay, None
+
+    def before_call(self, kind, key, extra_seconds=0.0):
+        """
+        Wait the sampled latency of a call, then raise its sampled failure if any.
+        The same request fails or succeeds the same way on the same attempt number.
+        """
+        delay, error = self._outcome(kind, key)
+        time.sleep(delay + extra_seconds)
+        if error:
+            raise error
+
+    async def abefore_call(self, kind, key, extra_seconds=0.0):
+        delay, error = self._outcome(kind, key)
+        await asyncio.sleep(delay + extra_seconds)
+        if error:
+            raise error
+
+    # ---------------- content ----------------
+
+    @staticmethod
+    def _plain(text):
+        return re.sub(r"\s+", " ", re.sub(r"<[^>]+>", " ", text or "")).strip()
+
+    def _words(self, rng, source, count):
+        vocabulary = [word for word in re.findall(r"[^\W\d_]{3,}", self._plain(source))] or WORDS
+        return [rng.choice(vocabulary) for _ in range(max(1, count))]
+
+    def _sentence(self, rng, source, count=12):
+        words = self._words(rng, source, count)
+        return " ".join(words).capitalize() + "."
+
+    def _paragraph(self, rng, source, tokens):
+        sentences, total = [], 0
+        while total < tokens:
+            length = rng.randint(8, 16)
+            sentences.append(self._sentence(rng, source, length))
+            total += length
+        return " ".join(sentences)
+
+    def _messages_text(self, messages):
+        parts = []
+        for message in messages or []:
+            content = message.get("content", "")
+            if isinstance(content, list):
+                content = " ".join(part.get("text", "") for part in content if part.get("type") == "text")
+            parts.append(content)
+        return parts
+
+    def _material(self, text):
+        match = re.search(r"Current chunk: (.*?)(?:\nNext chunk:|\Z)", text, re.DOTALL)
+        if match:
+            return match.group(1).strip()
+        match = re.search(r"New chunk: (.*)", text, re.DOTALL)
+        return match.group(1).strip() if match else text
+
+    def _ssml_and_slides(self, rng, source, slides):
+        sentences = [self._sentence(rng, source, rng.randint(10, 18)) for _ in range(slides)]
+        ssml = "<speak>" + "".join(f'<s><mark name="slide_{i + 1}"/> {sentence}</s><break time="500ms"/>' for i, sentence in enumerate(sentences))
+        ssml += "<s>Shall we continue?</s></speak>"
+        slide_htmls = [f"<h2>{' '.join(self._words(rng, source, 3)).title()}</h2><ul><li>{sentence}</li></ul>" for sentence in sentences]
+        return ssml, slide_htmls
+
+    def _q_and_a(self, rng, source, count):
+        return [{"question": self._sentence(rng, source, 8)[:-1] + "?", "answer": self._sentence(rng, source, 14)} for _ in range(count)]
+
+    def chat_content(self, system, text, max_tokens):
+        """
+        Deterministic response of a chat/generation request, shaped after the output the prompt asks for.
+
+        Args:
+            system (str): System prompt (or the whole prompt for single-string providers).
+            text (str): Whole request text.
+            max_tokens (int): max_tokens of the request.
+
+        Returns:
+            str: The response text.
+        """
+        rng = self._rng("chat", text, max_tokens)
+        material = self._material(text[len(system):] if system != text and text.startswith(system) else text)
+        budget = min(max_tokens or 500, self.output_tokens or max(40, count_tokens(self._plain(material)) // 2))
+        if "ssml_speech_for_tts" in system:
+            ssml, slide_htmls = self._ssml_and_slides(rng, material, rng.randint(2, 4))
+            return json.dumps({"ssml_speech_for_tts": ssml, "slide_htmls": slide_htmls})
+        if "text_to_speech" in system and "text_to_write" in system:
+            ssml, slide_htmls = self._ssml_and_slides(rng, material, rng.randint(2, 4))
+            return json.dumps({"text_to_speech": ssml, "text_to_write": "".join(slide_htmls), "questions_and_answers": self._q_and_a(rng, material, 2)})
+        if "clarifying_concept_to_teach" in system:
+            html = f"<h2>{' '.join(self._words(rng, material, 3)).title()}</h2><p>{self._paragraph(rng, material, budget)}</p>"
+            return json.dumps({"clarifying_concept_to_teach": html, "q_and_a_list": self._q_and_a(rng, material, rng.randint(1, 3))})
+        if "is_correct" in system:
+            correct = rng.randrange(4)
+            return json.dumps([
+                {"question": self._sentence(rng, material, 8)[:-1] + "?", "options": [{"option": self._sentence(rng, material, 5), "is_correct": int(i == correct)} for i in range(4)]}
+                for _ in range(rng.randint(1, 3))
+            ])
+        if '"question"' in system:
+            return json.dumps(self._q_and_a(rng, material, rng.randint(1, 3)))
+        if '"general_summary"' in system:
+            return json.dumps({"general_summary": self._paragraph(rng, material, budget // 2), "task_summary": self._paragraph(rng, material, budget // 2)})
+        if re.search(r"summari[sz]", system[:400], re.IGNORECASE):
+            return self._paragraph(rng, material, budget)
+        return material
+
+    def _chat_usage(self, system, text, output):
+        prompt_tokens = count_tokens(text)
+        system_tokens = count_tokens(system) if system else 0
+        cached_tokens = 0
+        if system_tokens >= self.cache_min_tokens:
+            prefix = hashlib.sha256(system.encode("utf-8")).hexdigest()
+            with self._lock:
+                if prefix in self._seen_prefixes:
+                    cached_tokens = system_tokens // 128 * 128
+                self._seen_prefixes.add(prefix)
+        return prompt_tokens, count_tokens(output), cached_tokens
+
+    def embedding(self, text, dimensions):
+        """
+        Deterministic unit vector of a text.
+        """
+        rng = self._rng("embedding", text)
+        vector = [rng.gauss(0, 1) for _ in range(dimensions)]
+        norm = math.sqrt(sum(value * value for value in vector)) or 1.0
+        return [value / norm for value in vector]
+
+    def speech(self, text):
+        """
+        Synthesize fake speech: a quiet tone as long as the text would take to speak, with SSML <break> pauses.
+        The plain text is stored in the WAV INFO chunk so that fake STT can transcribe it back.
+
+        Returns:
+            tuple: (wav_bytes, timepoints) with timepoints as [{"markName", "timeSeconds"}] for every SSML <mark>.
+        """
+        seconds, timepoints, spoken = 0.0, [], []
+        for token in re.findall(r"<mark\s+name=\"([^\"]*)\"\s*/>|<break\s+time=\"([\d.]+)(ms|s)\"\s*/>|<[^>]+>|([^<]+)", text or ""):
+            mark, pause, unit, words = token
+            if mark:
+                timepoints.append({"markName": mark, "timeSeconds": round(seconds, 3)})
+            elif pause:
+                seconds += float(pause) / (1000 if unit == "ms" else 1)
+            elif words and words.strip():
+                spoken.append(words.strip())
+                seconds += len(words.split()) / self.words_per_second
+        return self.wav(max(seconds, 0.5), " ".join(spoken)), timepoints
+
+    def wav(self, seconds, text=""):
+        """
+        16 kHz mono 16-bit WAV with a quiet 200 Hz tone, and text in a LIST/INFO/ICMT chunk.
+        """
+        period = self.SAMPLE_RATE // 200
+        cycle = b"".join(struct.pack("<h", int(800 * math.sin(2 * math.pi * i / period))) for i in range(period))
+        frames = int(seconds * self.SAMPLE_RATE)
+        data = (cycle * (frames // period + 1))[:frames * 2]
+        comment = text.encode("utf-8") + b"\x00"
+        if len(comment) % 2:
+            comment += b"\x00"
+        info = b"INFO" + b"ICMT" + struct.pack("<I", len(comment)) + comment
+        fmt = struct.pack("<HHIIHH", 1, 1, self.SAMPLE_RATE, self.SAMPLE_RATE * 2, 2, 16)
+        body = b"WAVE" + b"fmt " + struct.pack("<I", len(fmt)) + fmt + b"LIST" + struct.pack("<I", len(info)) + info + b"data" + struct.pack("<I", len(data)) + data
+        return b"RIFF" + struct.pack("<I", len(body)) + body
+
+    def transcript(self, audio_bytes):
+        """
+        Transcribe fake audio: the text stored by speech()/wav(), or deterministic words for other audio.
+
+        Returns:
+            tuple: (transcript, words as [(word, start_seconds, end_seconds)], duration_seconds)
+        """
+        text, seconds = None, len(audio_bytes or b"") / (self.SAMPLE_RATE * 2)
+        try:
+            with wave.open(io.BytesIO(audio_bytes), "rb") as wav_file:
+                seconds = wav_file.getnframes() / float(wav_file.getframerate())
+            match = re.search(rb"ICMT(....)", audio_bytes)
+            if match:
+                size = struct.unpack("<I", match.group(1))[0]
+                text = audio_bytes[match.end():match.end() + size].rstrip(b"\x00").decode("utf-8")
+        except Exception:
+            pass
+        words = text.split() if text else self._words(self._rng("stt", hashlib.sha256(audio_bytes or b"").hexdigest()), "", int(seconds * self.words_per_second))
+        step = seconds / max(len(words), 1)
+        timed = [(word, round(i * step, 3), round((i + 1) * step, 3)) for i, word in enumerate(words)]
+        return " ".join(words), timed, seconds
+
+    def document_blocks(self, pdf_bytes):
+        """
+        Document AI layout blocks of a PDF: headings, paragraphs, bullet items, a table on every third page
+        and a page-number footer per page. Text comes from the PDF text layer, or is generated for scanned pages.
+        """
+        try:
+            pages = [page.extract_text() or "" for page in PdfReader(io.BytesIO(pdf_bytes)).pages]
+        except Exception:
+            pages = [""]
+        blocks = []
+        for number, page_text in enumerate(pages, start=1):
+            rng = self._rng("docai", number, page_text)
+            lines = [line.strip() for line in page_text.splitlines() if line.strip()]
+            if not lines:
+                lines = [" ".join(self._words(rng, "", 4)).title()] + [self._paragraph(rng, "", 60) for _ in range(3)]
+            blocks.append(self._text_block(lines[0], "heading-1" if number == 1 else "heading-2"))
+            paragraph = []
+            for line in lines[1:]:
+                if line.startswith(("•", "-")):
+                    if paragraph:
+                        blocks.append(self._text_block(" ".join(paragraph), "paragraph"))
+                        paragraph = []
+                    blocks.append(self._text_block(line, "paragraph"))
+                else:
+                    paragraph.append(line)
+            if paragraph:
+                blocks.append(self._text_block(" ".join(paragraph), "paragraph"))
+            if number % 3 == 0:
+                blocks.append(self._table_block(rng, page_text))
+            blocks.append(self._text_block(f"{number} / {len(pages)}", "footer"))
+        return blocks, "\n".join(pages)
+
+    @staticmethod
+    def _text_block(text, type_):
+        return SimpleNamespace(text_block=SimpleNamespace(text=text, type_=type_, blocks=[]), table_block=None, image_block=None, blocks=[])
+
+    def _table_block(self, rng, source):
+        def row(words):
+            return SimpleNamespace(cells=[SimpleNamespace(blocks=[self._text_block(word, "paragraph")], row_span=1, col_span=1) for word in words])
+        header = row(self._words(rng, source, 3))
+        body = [row(self._words(rng, source, 3)) for _ in range(2)]
+        return SimpleNamespace(text_block=None, table_block=SimpleNamespace(header_rows=[header], body_rows=body), image_block=None, blocks=[])
+
+    # ---------------- clients ----------------
+
+    def client(self, attribute):
+        """
+        Return the fake for a manager client attribute (see ProviderBackends.CLIENTS).
+        """
+        return {
+            "OPEN_AI_CLIENT": lambda: FakeOpenAIClient(self),
+            "ASYNC_OPEN_AI_CLIENT": lambda: FakeOpenAIClient(self, is_async=True),
+            "model": lambda: FakeGenerativeModel(self),
+            "speech_client": lambda: FakeGoogleSpeechClient(self),
+            "tts_client": lambda: FakeGoogleTTSClient(self),
+            "vision_client": lambda: FakeGoogleVisionClient(self),
+            "tts_rest_post": lambda: self.google_tts_rest_post,
+            "documentai_client": lambda: FakeDocumentAIClient(self),
+            "synthesizer_class": lambda: self.azure_synthesizer_class(),
+            "polly_client": lambda: FakePollyClient(self),
+        }[attribute]()
+
+    def google_tts_rest_post(self, endpoint, payload):
+        """
+        Fake of the Text-to-Speech REST synthesize call used by GoogleAIManager.advanced_tts.
+        Failures are returned as HTTP error responses, like the real endpoint.
+        """
+        ssml = payload.get("input", {}).get("ssml") or payload.get("input", {}).get("text", "")
+        try:
+            self.before_call("google.tts_rest", ssml)
+        except FakeProviderError as e:
+            return FakeHTTPResponse(e.status_code, {"error": {"code": e.status_code, "message": str(e)}})
+        audio, timepoints = self.speech(ssml)
+        body = {"audioContent": base64.b64encode(audio).decode("utf-8"), "audioConfig": payload.get("audioConfig", {})}
+        if "enableTimePointing" in payload:
+            body["timepoints"] = timepoints
+        return FakeHTTPResponse(200, body)
+
+    def azure_synthesizer_class(self):
+        """
+        Fake of speechsdk.SpeechSynthesizer bound to these fakes.
+        """
+        fakes = self
+
+        class FakeSpeechSynthesizer:
+            def __init__(self, speech_config=None, audio_config=None):
+                self.speech_config = speech_config
+
+            def get_voices_async(self, locale=""):
+                voices = [
+                    SimpleNamespace(name=name, locale=name[:5], gender="Female", style_list=[])
+                    for name in ("fa-IR-DilaraNeural", "fa-IR-FaridNeural", "en-US-AriaNeural", "en-US-JennyNeural")
+                ]
+                return SimpleNamespace(get=lambda: SimpleNamespace(voices=voices))
+
+            def speak_text_async(self, text):
+                return SimpleNamespace(get=lambda: fakes._azure_result(text))
+
+            def speak_ssml_async(self, ssml):
+                return SimpleNamespace(get=lambda: fakes._azure_result(ssml))
+
+        return FakeSpeechSynthesizer
+
+    def _azure_result(self, text):
+        try:
+            self.before_call("azure.tts", text)
+        except FakeProviderError as e:
+            details = SimpleNamespace(reason=speechsdk.CancellationReason.Error, error_details=f"HTTP {e.status_code}: {e}")
+            return SimpleNamespace(reason=speechsdk.ResultReason.Canceled, cancellation_details=details, audio_data=b"")
+        return SimpleNamespace(reason=speechsdk.ResultReason.SynthesizingAudioCompleted, audio_data=self.speech(text)[0])
+
+    def install(self, manager):
+        """
+        Replace the provider clients of a manager with these fakes.
+
+        Example:
+            FakeProviders(latency=0).install(open_ai_manager)
+        """
+        from ai.utils.provider_backends import ProviderBackends
+        for attribute in ProviderBackends.client_attributes(manager):
+            setattr(manager, attribute, self.client(attribute))
+        return manager
+
+class _FakeClient:
+    def __init__(self, fakes, is_async=False):
+        self.fakes = fakes
+        self.is_async = is_async
+
+    def _call(self, kind, key, produce, extra_seconds=0.0):
+        if self.is_async:
+            async def run():
+                await self.fakes.abefore_call(kind, key, extra_seconds)
+                return produce()
+            return run()
+        self.fakes.before_call(kind, key, extra_seconds)
+        return produce()
+
+class FakeOpenAIClient(_FakeClient):
+    """
+    Fake of openai.OpenAI / openai.AsyncOpenAI: chat completions (also streamed), embeddings,
+    audio transcriptions, audio speech and images.
+    """
+    def __init__(self, fakes, is_async=False):
+        super().__init__(fakes, is_async)
+        self.chat = SimpleNamespace(completions=SimpleNamespace(create=self._chat))
+        self.embeddings = SimpleNamespace(create=self._embeddings)
+        self.audio = SimpleNamespace(transcriptions=SimpleNamespace(create=self._transcription), speech=SimpleNamespace(create=self._speech))
+        self.images = SimpleNamespace(generate=self._image)
+
+    def _chat(self, model, messages, max_tokens=None, stream=False, stream_options=None, **kwargs):
+        parts = self.fakes._messages_text(messages)
+        system = parts[0] if messages and messages[0].get("role") == "system" else ""
+        text = "\n".join(parts)
+        content = self.fakes.chat_content(system, text, max_tokens)
+        prompt_tokens, completion_tokens, cached_tokens = self.fakes._chat_usage(system, text, content)
+        usage = SimpleNamespace(prompt_tokens=prompt_tokens, completion_tokens=completion_tokens, total_tokens=prompt_tokens + completion_tokens, prompt_tokens_details=SimpleNamespace(cached_tokens=cached_tokens))
+        extra_seconds = completion_tokens / self.fakes.tokens_per_second if self.fakes.tokens_per_second else 0.0
+
+        def produce():
+            if stream:
+                pieces = re.findall(r"\S+\s*|\s+", content)
+                chunks = [SimpleNamespace(choices=[SimpleNamespace(delta=SimpleNamespace(content=piece))], usage=None) for piece in pieces]
+                return iter(chunks + [SimpleNamespace(choices=[], usage=usage)])
+            return SimpleNamespace(model=model, choices=[SimpleNamespace(index=0, message=SimpleNamespace(role="assistant", content=content), finish_reason="stop")], usage=usage)
+        return self._call("open_ai.chat", text, produce, extra_seconds)
+
+    def _embeddings(self, model, input, **kwargs):
+        inputs = input if isinstance(input, list) else [input]
+        dimensions = kwargs.get("dimensions") or (3072 if "large" in model else 1536)
+        tokens = sum(count_tokens(text) for text in inputs)
+        return self._call("open_ai.embeddings", repr(inputs), lambda: SimpleNamespace(
+            model=model,
+            data=[SimpleNamespace(index=i, embedding=self.fakes.embedding(text, dimensions)) for i, text in enumerate(inputs)],
+            usage=SimpleNamespace(prompt_tokens=tokens, total_tokens=tokens)
+        ))
+
+    def _transcription(self, model, file, response_format="text", language=None, **kwargs):
+        audio_bytes = file.read() if hasattr(file, "read") else file
+        text, words, seconds = self.fakes.transcript(audio_bytes)
+
+        def produce():
+            if response_format == "text":
+                return text
+            verbose = {"text": text, "language": language or "en", "duration": seconds, "words": [{"word": word, "start": start, "end": end} for word, start, end in words]}
+            srt = "".join(f"{i + 1}\n00:00:{start:06.3f} --> 00:00:{end:06.3f}\n{word}\n\n".replace(".", ",") for i, (word, start, end) in enumerate(words))
+            return SimpleNamespace(text=text, json={"text": text}, srt=srt, verbose_json=verbose)
+        return self._call("open_ai.stt", hashlib.sha256(audio_bytes or b"").hexdigest(), produce)
+
+    def _speech(self, model, input, voice, response_format="mp3", **kwargs):
+        return self._call("open_ai.tts", input, lambda: SimpleNamespace(content=self.fakes.speech(input)[0]))
+
+    def _image(self, model, prompt, size="1024x1024", **kwargs):
+        return self._call("open_ai.image", prompt, lambda: SimpleNamespace(data=[SimpleNamespace(url=f"https://fake-provider.invalid/images/{hashlib.sha256(prompt.encode('utf-8')).hexdigest()}.png")]))
+
+class FakeGenerativeModel(_FakeClient):
+    """
+    Fake of google.generativeai.GenerativeModel.generate_content (also streamed).
+    """
+    def generate_content(self, prompt, generation_config=None, stream=False, **kwargs):
+        max_tokens = (generation_config or {}).get("max_output_tokens")
+        content = self.fakes.chat_content(prompt, prompt, max_tokens)
+        prompt_tokens, completion_tokens, cached_tokens = self.fakes._chat_usage(prompt, prompt, content)
+        usage = SimpleNamespace(prompt_token_count=prompt_tokens, candidates_token_count=completion_tokens, cached_content_token_count=cached_tokens)
+        extra_seconds = completion_tokens / self.fakes.tokens_per_second if self.fakes.tokens_per_second else 0.0
+
+        def produce():
+            if stream:
+                return iter([SimpleNamespace(text=piece, usage_metadata=usage) for piece in re.findall(r"\S+\s*|\s+", content)])
+            return SimpleNamespace(text=content, usage_metadata=usage)
+        return self._call("google.generate", prompt, produce, extra_seconds)
+
+class FakeGoogleSpeechClient(_FakeClient):
+    """
+    Fake of google.cloud.speech.SpeechClient.recognize.
+    """
+    def recognize(self, config=None, audio=None, **kwargs):
+        audio_bytes = getattr(audio, "content", b"") or b""
+        text, words, seconds = self.fakes.transcript(audio_bytes)
+        return self._call("google.stt", hashlib.sha256(audio_bytes).hexdigest(), lambda: SimpleNamespace(
+            results=[SimpleNamespace(alternatives=[SimpleNamespace(
+                transcript=text,
+                words=[SimpleNamespace(word=word, start_time=timedelta(seconds=start), end_time=timedelta(seconds=end)) for word, start, end in words]
+            )])],
+            total_billed_time=timedelta(seconds=math.ceil(seconds))
+        ))
+
+class FakeGoogleTTSClient(_FakeClient):
+    """
+    Fake of google.cloud.texttospeech.TextToSpeechClient.synthesize_speech (always returns WAV audio).
+    """
+    def synthesize_speech(self, input=None, voice=None, audio_config=None, **kwargs):
+        text = getattr(input, "ssml", "") or getattr(input, "text", "")
+        return self._call("google.tts", text, lambda: SimpleNamespace(audio_content=self.fakes.speech(text)[0]))
+
+class FakeGoogleVisionClient(_FakeClient):
+    """
+    Fake of google.cloud.vision.ImageAnnotatorClient.label_detection.
+    """
+    def label_detection(self, image=None, **kwargs):
+        digest = hashlib.sha256(getattr(image, "content", b"") or b"").hexdigest()
+        rng = self.fakes._rng("vision", digest)
+        return self._call("google.vision", digest, lambda: SimpleNamespace(
+            label_annotations=[SimpleNamespace(description=word, score=round(rng.uniform(0.6, 0.99), 3)) for word in rng.sample(WORDS, 3)]
+        ))
+
+class FakeDocumentAIClient(_FakeClient):
+    """
+    Fake of documentai.DocumentProcessorServiceClient (processor_path and process_document with a layout parser).
+    """
+    def processor_path(self, project, location, processor):
+        return f"projects/{project}/locations/{location}/processors/{processor}"
+
+    def process_document(self, request=None, **kwargs):
+        content = request.raw_document.content
+        blocks, text = self.fakes.document_blocks(content)
+        return self._call("documentai.process", hashlib.sha256(content).hexdigest(), lambda: SimpleNamespace(
+            document=SimpleNamespace(text=text, document_layout=SimpleNamespace(blocks=blocks))
+        ))
+
+class FakePollyClient(_FakeClient):
+    """
+    Fake of the boto3 Polly client: describe_voices, and synthesize_speech returning WAV audio
+    or, with OutputFormat="json", speech marks for words and SSML marks.
+    """
+    def describe_voices(self, LanguageCode=None, **kwargs):
+        voices = [{"Id": voice, "LanguageCode": language} for voice, language in (("Joanna", "en-US"), ("Matthew", "en-US"), ("Dora", "is-IS"))]
+        return self._call("aws.voices", LanguageCode, lambda: {"Voices": [voice for voice in voices if not LanguageCode or voice["LanguageCode"] == LanguageCode]})
+
+    def synthesize_speech(self, Text, OutputFormat, VoiceId, TextType="text", SpeechMarkTypes=None, **kwargs):
+        def produce():
+            audio, timepoints = self.fakes.speech(Text)
+            if OutputFormat != "json":
+                return {"AudioStream": io.BytesIO(audio), "ContentType": "audio/wav", "RequestCharacters": len(Text)}
+            transcript, words, seconds = self.fakes.transcript(audio)
+            marks = [{"time": int(point["timeSeconds"] * 1000), "type": "ssml", "value": point["markName"]} for point in timepoints]
+            marks += [{"time": int(start * 1000), "type": "word", "value": word} for word, start, end in words]
+            lines = "\n".join(json.dumps(mark) for mark in sorted(marks, key=lambda mark: mark["time"]))
+            return {"AudioStream": io.BytesIO(lines.encode("utf-8")), "ContentType": "application/x-json-stream", "RequestCharacters": len(Text)}
+        return self._call("aws.tts", (Text, OutputFormat, VoiceId), produce)
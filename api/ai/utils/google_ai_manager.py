@@ -1,8 +1,8 @@
+import logging
 from google.cloud import speech, texttospeech, vision
 from google.generativeai import GenerativeModel, configure
 from google.auth.transport.requests import Request
 from google.oauth2 import service_account
-import tiktoken
 from mutagen.mp3 import MP3
 from mutagen.flac import FLAC
 import requests
@@ -12,25 +12,35 @@ import copy
 
 from ai.utils.ai_manager import BaseAIManager
 from ai.utils.audio_manager import AudioManager
+from ai.utils.chunk_manager import count_tokens
+from ai.utils.provider_backends import ProviderBackends
+from ai.utils.tracing import Tracer
 
+logger = logging.getLogger(__name__)
+
+@Tracer.trace_methods
 class GoogleAIManager(BaseAIManager):
-    def __init__(self, api_key=None, cur_user=None):
+    TTS_CRED_PATH = "/run/secrets/cred.json"
+
+    def __init__(self, api_key=None, cur_user=None, priority="live"):
         """
         Initialize the GoogleAIManager.
 
         Args:
             api_key (str): API key for Generative Language API (PaLM/Gemini).
             credentials_path (str): Path to Google service account JSON for other APIs.
+            priority (str): Rate limit priority class: "live", "prebuild" or "ingestion". Default is "live".
 
         Returns:
             None
         """
-        super().__init__(ai_type="google", cur_user=cur_user)
+        super().__init__(ai_type="google", cur_user=cur_user, priority=priority)
         if api_key:
             configure(api_key=api_key)
-        self.speech_client = speech.SpeechClient()
-        self.tts_client = texttospeech.TextToSpeechClient()
-        self.vision_client = vision.ImageAnnotatorClient()
+        self._speech_client = None
+        self._tts_client = None
+        self._vision_client = None
+        self._tts_rest_post = None
         self.model = GenerativeModel("models/gemini-1.5-pro-latest") if api_key else None
         self.GOOGLE_AI_PRICING = {
             "gemini-pro": {
@@ -53,11 +63,68 @@ class GoogleAIManager(BaseAIManager):
                 "image_per_1_image": 0.0015,
             },
         }
+        ProviderBackends.install(self)
+
+    @property
+    def speech_client(self):
+        if self._speech_client is None:
+            self._speech_client = speech.SpeechClient()
+        return self._speech_client
+
+    @speech_client.setter
+    def speech_client(self, client):
+        self._speech_client = client
+
+    @property
+    def tts_client(self):
+        if self._tts_client is None:
+            self._tts_client = texttospeech.TextToSpeechClient()
+        return self._tts_client
+
+    @tts_client.setter
+    def tts_client(self, client):
+        self._tts_client = client
+
+    @property
+    def vision_client(self):
+        if self._vision_client is None:
+            self._vision_client = vision.ImageAnnotatorClient()
+        return self._vision_client
+
+    @vision_client.setter
+    def vision_client(self, client):
+        self._vision_client = client
+
+    @property
+    def tts_rest_post(self):
+        """
+        Callable (endpoint, payload) -> response posting to the Text-to-Speech REST API with the default credentials.
+        """
+        if self._tts_rest_post is None:
+            self._tts_rest_post = self._authorized_tts_post(self.TTS_CRED_PATH)
+        return self._tts_rest_post
+
+    @tts_rest_post.setter
+    def tts_rest_post(self, post):
+        self._tts_rest_post = post
+
+    @staticmethod
+    def _authorized_tts_post(cred_path):
+        creds = service_account.Credentials.from_service_account_file(
+            cred_path, scopes=["https://www.googleapis.com/auth/cloud-platform"]
+        )
+
+        def post(endpoint, payload):
+            if not creds.valid:
+                creds.refresh(Request())
+            headers = {"Authorization": f"Bearer {creds.token}", "Content-Type": "application/json"}
+            return requests.post(endpoint, headers=headers, json=payload)
+        return post
 
     def add_message(self, role, text=None, max_history=5):
         """
         Add a message to the conversation history. For Google Gemini, concatenates the last max_history turns in order,
-        and summarizes earlier ones with an explanation at the beginning of the prompt.
+        preceded by the latest available summary of earlier ones (refreshed in the background by self.memory).
 
         Args:
             role (str): One of 'system', 'user', 'assistant'.
@@ -75,69 +142,115 @@ class GoogleAIManager(BaseAIManager):
         msg_text = text if text is not None else ""
         self.messages.append({"role": role, "content": msg_text})
         if len(self.messages) > max_history:
-            old_msgs = self.messages[:-max_history]
-            recent_msgs = self.messages[-max_history:]
-            summary_lines = []
-            system_lines = []
-            for msg in old_msgs:
-                if msg["role"] == "user":
-                    summary_lines.append(f"User said: {msg['content']}")
-                elif msg["role"] == "assistant":
-                    summary_lines.append(f"Assistant said: {msg['content']}")
-                elif msg["role"] == "system":
-                    system_lines.append(f"System: {msg['content']}")
-            summary_text = self.summarize("\n".join(summary_lines)) if summary_lines else ""
-            system_text = "\n".join(system_lines)
-            self.prompt = ""
-            if summary_text:
-                self.prompt += f"This is the summary of past conversations:\n{summary_text}\n"
-            if system_text:
-                self.prompt += f"System messages:\n{system_text}\n"
-            self.prompt += f"\nNow, here are the last {max_history} messages in order:\n"
-            for msg in recent_msgs:
-                if msg["role"] == "user":
-                    self.prompt += f"User: {msg['content']}\n"
-                elif msg["role"] == "assistant":
-                    self.prompt += f"Assistant: {msg['content']}\n"
-                elif msg["role"] == "system":
-                    self.prompt += f"System: {msg['content']}\n"
-        else:
-            self.prompt = ""
-            for msg in self.messages:
-                if msg["role"] == "user":
-                    self.prompt += f"User: {msg['content']}\n"
-                elif msg["role"] == "assistant":
-                    self.prompt += f"Assistant: {msg['content']}\n"
-                elif msg["role"] == "system":
-                    self.prompt += f"System: {msg['content']}\n"
+            self.memory.push(self.messages[:-max_history])
+            self.messages = self.messages[-max_history:]
+        self.prompt = self._conversation_prompt()
+
+    def _conversation_prompt(self):
+        """
+        Build the prompt from the latest available conversation memory and the recent messages.
+        """
+        context = self.memory.context()
+        prompt = ""
+        if context:
+            prompt += f"{context}\nNow, here are the last {len(self.messages)} messages in order:\n"
+        for msg in self.messages:
+            if msg["role"] == "user":
+                prompt += f"User: {msg['content']}\n"
+            elif msg["role"] == "assistant":
+                prompt += f"Assistant: {msg['content']}\n"
+            elif msg["role"] == "system":
+                prompt += f"System: {msg['content']}\n"
+        return prompt
     
-    def generate_response(self, max_token=2000, prompt=None):
+    def generate_response(self, max_token=2000, prompt=None, stream=False, on_delta=None, use_cache=False):
         """
         Generate a response from the OpenAI chat model.
         
         Args:
             max_token (int): Maximum number of tokens in the response. Default is 2000.
-            messages (list): List of message dicts. If None, uses internal history.
+            prompt (str): The prompt. If None, uses the internal prompt.
+            stream (bool): If True, return a generator of text deltas instead of the full text. Default is False.
+            on_delta (callable): If set, the response is streamed and on_delta(delta) is called for every text delta;
+                the full text is still returned.
+            use_cache (bool): Look up and store the response in self.response_cache (not with stream=True). A hit costs nothing.
+                Only for deterministic pipeline calls (summaries, chunk tasks), never for live conversation turns. Default is False.
         
         Returns:
-            str: The assistant's response text.
+            str: The assistant's response text (or a generator of deltas if stream=True).
+            In streaming modes the cost is applied when the stream ends.
         
         Example:
             reply = manager.generate_response(max_token=500)
+            reply = manager.generate_response(max_token=500, on_delta=lambda delta: print(delta, end=""))
         """
         if not self.model:
             raise RuntimeError("Generative Language API not configured.")
-        use_prompt = prompt if prompt is not None else getattr(self, "prompt", None)
+        # Only a call built from the shared history clears it: calls with an explicit prompt (chunk workers) leave it alone.
+        uses_history = prompt is None
+        use_prompt = prompt if prompt is not None else (self._conversation_prompt() if self.messages else getattr(self, "prompt", None))
         if not use_prompt:
             raise ValueError("Prompt is empty. Add messages before generating a response.")
-        response = self.model.generate_content(use_prompt, generation_config={"max_output_tokens": max_token})
-        enc = tiktoken.get_encoding("cl100k_base") 
-        input_token_count = len(enc.encode(use_prompt))
-        output_token_count = len(enc.encode(response.text))
-        total_cost = (input_token_count / 1000) * self.GOOGLE_AI_PRICING["gemini-pro"]["input_per_1k_token"] + (output_token_count / 1000) * self.GOOGLE_AI_PRICING["gemini-pro"]["output_per_1k_token"]
+        if stream:
+            if uses_history:
+                self.clear_messages()
+            return self._stream_response(max_token, use_prompt)
+        cache_key = self._response_cache_key(use_prompt, max_token, use_cache)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            if uses_history:
+                self.clear_messages()
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
+        if on_delta is not None:
+            deltas = []
+            for delta in self._stream_response(max_token, use_prompt):
+                deltas.append(delta)
+                on_delta(delta)
+            result = "".join(deltas)
+        else:
+            self._acquire_rate_limit(use_prompt, max_token)
+            response = self.model.generate_content(use_prompt, generation_config={"max_output_tokens": max_token})
+            self._apply_generation_cost(use_prompt, response.text, self._cached_content_tokens(response))
+            result = response.text
+        if uses_history:
+            self.clear_messages()
+        self._set_cached_response(cache_key, result)
+        return result
+
+    def _stream_response(self, max_token, use_prompt):
+        """
+        Stream a generation, yielding text deltas. The cost is applied when the stream ends.
+        """
+        self._acquire_rate_limit(use_prompt, max_token)
+        response = self.model.generate_content(use_prompt, generation_config={"max_output_tokens": max_token}, stream=True)
+        deltas = []
+        cached_tokens = 0
+        for chunk in response:
+            cached_tokens = self._cached_content_tokens(chunk) or cached_tokens
+            if chunk.text:
+                deltas.append(chunk.text)
+                yield chunk.text
+        self._apply_generation_cost(use_prompt, "".join(deltas), cached_tokens)
+
+    def _cached_content_tokens(self, response):
+        usage_metadata = getattr(response, "usage_metadata", None)
+        return getattr(usage_metadata, "cached_content_token_count", 0) or 0
+
+    def _estimate_cost(self, input_tokens, output_tokens, model=None):
+        pricing = self.GOOGLE_AI_PRICING.get(model or "gemini-pro", {})
+        return (input_tokens / 1000) * pricing.get("input_per_1k_token", 0) + (output_tokens / 1000) * pricing.get("output_per_1k_token", 0)
+
+    def _apply_generation_cost(self, use_prompt, output_text, cached_tokens=0):
+        input_token_count = count_tokens(use_prompt)
+        output_token_count = count_tokens(output_text)
+        cached_tokens = min(cached_tokens, input_token_count)
+        pricing = self.GOOGLE_AI_PRICING["gemini-pro"]
+        cached_input_price = pricing.get("cached_input_per_1k_token", pricing["input_per_1k_token"])
+        total_cost = ((input_token_count - cached_tokens) / 1000) * pricing["input_per_1k_token"] + (cached_tokens / 1000) * cached_input_price + (output_token_count / 1000) * pricing["output_per_1k_token"]
         self._apply_cost(total_cost)
-        self.clear_messages()
-        return response.text
+        self._record_usage(input_token_count, output_token_count, cached_tokens)
     
     def stt(self, audio_bytes, language_code='en-US', encoding=None, file_path=None):
         """
@@ -155,14 +268,13 @@ class GoogleAIManager(BaseAIManager):
         if encoding is None:
             encoding = speech.RecognitionConfig.AudioEncoding.LINEAR16
 
-        client = speech.SpeechClient()
         audio = speech.RecognitionAudio(content=audio_bytes)
         config = speech.RecognitionConfig(
             encoding=encoding,
             language_code=language_code,
             enable_automatic_punctuation=True
         )
-        response = client.recognize(config=config, audio=audio)
+        response = self.speech_client.recognize(config=config, audio=audio)
 
         duration_seconds = None
         if hasattr(response, "total_billed_time") and response.total_billed_time:
@@ -175,13 +287,13 @@ class GoogleAIManager(BaseAIManager):
                 try:
                     duration_seconds = MP3(file_path).info.length
                 except Exception as e:
-                    print(f"Error reading MP3 duration: {e}")
+                    logger.error("Error reading MP3 duration: %s", e)
                     duration_seconds = 0
             elif encoding == speech.RecognitionConfig.AudioEncoding.FLAC and file_path:
                 try:
                     duration_seconds = FLAC(file_path).info.length
                 except Exception as e:
-                    print(f"Error reading FLAC duration: {e}")
+                    logger.error("Error reading FLAC duration: %s", e)
                     duration_seconds = 0
 
         duration_minutes = (duration_seconds / 60) if duration_seconds else 0
@@ -217,7 +329,6 @@ class GoogleAIManager(BaseAIManager):
         Returns:
             bytes: The audio content in the specified format.
         """
-        client = texttospeech.TextToSpeechClient()
         if isinstance(text, str) and text.strip().startswith("<speak>"):
             input_text = texttospeech.SynthesisInput(ssml=text)
         else:
@@ -229,7 +340,7 @@ class GoogleAIManager(BaseAIManager):
         audio_config = texttospeech.AudioConfig(
             audio_encoding=audio_encoding,
         )
-        response = client.synthesize_speech(
+        response = self.tts_client.synthesize_speech(
             input=input_text,
             voice=voice,
             audio_config=audio_config,
@@ -251,16 +362,11 @@ class GoogleAIManager(BaseAIManager):
         audio_encoding="LINEAR16",     # keep LINEAR16 so your duration math works
         language_code="en-US",
         sample_rate_hz=16000,
-        cred_path="/run/secrets/cred.json",
+        cred_path=TTS_CRED_PATH,
     ):
         """REST TTS with SSML <mark> timepoints (v1beta1)."""
-        # --- Auth
-        creds = service_account.Credentials.from_service_account_file(
-            cred_path, scopes=["https://www.googleapis.com/auth/cloud-platform"]
-        )
-        creds.refresh(Request())
-        token = creds.token
-        headers = {"Authorization": f"Bearer {token}", "Content-Type": "application/json"}
+        # --- Auth (the default credentials are refreshed only when the token expires)
+        post = self.tts_rest_post if cred_path == self.TTS_CRED_PATH else self._authorized_tts_post(cred_path)
 
         # --- SSML hygiene
         ssml = text if (isinstance(text, str) and text.strip().startswith("<speak>")) else f"<speak>{text}</speak>"
@@ -274,10 +380,10 @@ class GoogleAIManager(BaseAIManager):
         }
 
         def _post(endpoint, payload, label):
-            resp = requests.post(endpoint, headers=headers, json=payload)
+            resp = post(endpoint, payload)
             if not resp.ok:
                 # log full body to see *why* it failed
-                print(f"TTS error ({label}): {resp.status_code} {resp.text}")
+                logger.error("TTS error (%s): %s %s", label, resp.status_code, resp.text)
                 resp.raise_for_status()
             return resp.json()
 
@@ -314,9 +420,8 @@ class GoogleAIManager(BaseAIManager):
         Returns:
             str: The generated description of the image.
         """
-        client = vision.ImageAnnotatorClient()
         image = vision.Image(content=image_bytes)
-        response = client.label_detection(image=image)
+        response = self.vision_client.label_detection(image=image)
         labels = response.label_annotations
         descriptions = [label.description for label in labels]
         cost = self.GOOGLE_AI_PRICING["vision"]["image_per_1_image"]
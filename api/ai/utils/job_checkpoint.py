@@ -0,0 +1,126 @@
+import logging
+import uuid
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class JobCheckpoint:
+    """
+    Checkpoints of a long document pipeline, stored in the default (Redis) cache under a job id.
+    Stage values (summaries, OCR output, ...) and per-chunk results are saved as soon as they are produced,
+    so a pipeline restarted with the same job id skips the work that already completed.
+    Each pipeline uses its own namespace, so several pipelines can share one job id.
+    Cache errors never break a pipeline: they are reported and the work is simply redone.
+    A disabled checkpoint stores nothing, so runs nobody will resume do not fill the cache.
+    """
+    PREFIX = "job_checkpoint"
+
+    def __init__(self, job_id=None, namespace="job", timeout=60 * 60 * 24 * 3, enabled=True):
+        """
+        Args:
+            job_id (str): Id of the job to resume. None starts a new job.
+            namespace (str): Pipeline the checkpoints belong to (e.g., 'translate', 'teaching'). Default is 'job'.
+            timeout (int): Seconds checkpoints are kept. Default is 3 days.
+            enabled (bool): If False, nothing is saved or read and every stage is computed. Default is True.
+
+        Example:
+            checkpoint = JobCheckpoint(resume_job_id, namespace="translate")
+            summary = checkpoint.get("general_summary")
+        """
+        self.job_id = job_id or uuid.uuid4().hex
+        self.namespace = namespace
+        self.timeout = timeout
+        self.enabled = enabled
+
+    def _key(self, *parts):
+        return ":".join([self.PREFIX, self.job_id, self.namespace] + [str(part) for part in parts])
+
+    def get(self, name, default=None):
+        """
+        Get a saved stage value, or default if the stage has not completed.
+        """
+        if not self.enabled:
+            return default
+        try:
+            value = cache.get(self._key("stage", name))
+        except Exception as e:
+            logger.warning("Job checkpoint unavailable: %s", e)
+            return default
+        return default if value is None else value
+
+    def set(self, name, value):
+        """
+        Save the value of a completed stage.
+        """
+        if not self.enabled:
+            return
+        try:
+            cache.set(self._key("stage", name), value, self.timeout)
+        except Exception as e:
+            logger.warning("Job checkpoint unavailable: %s", e)
+
+    def stage(self, name, compute):
+        """
+        Return the saved value of a stage, or compute and save it.
+
+        Args:
+            name (str): Stage name.
+            compute (callable): compute() -> value; must not return None.
+
+        Returns:
+            The stage value.
+
+        Example:
+            general_summary = checkpoint.stage("general_summary", lambda: manager.summarize(text))
+        """
+        value = self.get(name)
+        if value is not None:
+            logger.info("Job %s: resuming after stage '%s:%s'", self.job_id, self.namespace, name)
+            return value
+        value = compute()
+        self.set(name, value)
+        return value
+
+    def get_chunks(self, label, total):
+        """
+        Get the saved results of a chunk stage.
+
+        Args:
+            label (str): Chunk stage name.
+            total (int): Number of chunks.
+
+        Returns:
+            dict: chunk index -> result, for the chunks that completed.
+        """
+        if not self.enabled:
+            return {}
+        keys = {self._key("chunk", label, i): i for i in range(total)}
+        try:
+            saved = cache.get_many(list(keys))
+        except Exception as e:
+            logger.warning("Job checkpoint unavailable: %s", e)
+            return {}
+        return {keys[key]: value for key, value in saved.items()}
+
+    def set_chunk(self, label, index, result):
+        """
+        Save the result of one chunk.
+        """
+        if not self.enabled:
+            return
+        try:
+            cache.set(self._key("chunk", label, index), result, self.timeout)
+        except Exception as e:
+            logger.warning("Job checkpoint unavailable: %s", e)
+
+    def clear(self):
+        """
+        Delete all checkpoints of the job in this namespace.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        if not self.enabled:
+            return 0
+        return cache.delete_pattern(f"{self.PREFIX}:{self.job_id}:{self.namespace}:*")
@@ -0,0 +1,141 @@
+import json
+
+class IncrementalJSONExtractor:
+    """
+    Extract fields of a streamed JSON object as soon as each one is complete.
+    Feed it the text deltas of a streamed completion; leading text such as a ```json fence is skipped.
+    When a top-level field's value is complete, on_field(name, value) is called. For array fields,
+    on_item(name, index, value) is also called for every element as soon as that element is complete.
+
+    Example:
+        extractor = IncrementalJSONExtractor(on_field=lambda name, value: print(name), on_item=lambda name, i, value: print(name, i))
+        manager.generate_response(messages=messages, on_delta=extractor.feed)
+        ssml = extractor.fields.get("ssml_speech_for_tts")
+    """
+    def __init__(self, on_field=None, on_item=None):
+        """
+        Args:
+            on_field (callable): Called as on_field(name, value) when a top-level field is complete.
+            on_item (callable): Called as on_item(name, index, value) when an element of a top-level array is complete.
+        """
+        self.on_field = on_field
+        self.on_item = on_item
+        self.fields = {}
+        self.text = ""
+        self.pos = 0
+        self.depth = 0
+        self.in_string = False
+        self.escape = False
+        self.started = False
+        self.done = False
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.value_is_array = False
+        self.item_start = None
+        self.item_index = 0
+
+    def feed(self, delta):
+        """
+        Consume the next piece of the streamed text.
+
+        Args:
+            delta (str): Text delta.
+
+        Returns:
+            None
+        """
+        if not delta or self.done:
+            return
+        self.text += delta
+        text = self.text
+        while self.pos < len(text) and not self.done:
+            ch = text[self.pos]
+            i = self.pos
+            self.pos += 1
+            if not self.started:
+                if ch == "{":
+                    self.started = True
+                    self.depth = 1
+                continue
+            if self.in_string:
+                if self.escape:
+                    self.escape = False
+                elif ch == "\\":
+                    self.escape = True
+                elif ch == '"':
+                    self.in_string = False
+                    if self.depth == 1 and self.value_start is None:
+                        self.key = json.loads(text[self.key_start:i + 1])
+                    elif self.depth == 1:
+                        self._complete_field(text, i + 1)
+                    elif self.depth == 2 and self.value_is_array and self.item_start is not None:
+                        self._complete_item(text, i + 1)
+                continue
+            if ch == '"':
+                self.in_string = True
+                if self.depth == 1 and self.value_start is None and self.key is None:
+                    self.key_start = i
+                elif self.depth == 1 and self.value_start is None:
+                    self.value_start = i
+                elif self.depth == 2 and self.value_is_array and self.item_start is None:
+                    self.item_start = i
+            elif ch in "{[":
+                if self.depth == 1 and self.value_start is None and self.key is not None:
+                    self.value_start = i
+                    self.value_is_array = ch == "["
+                    self.item_index = 0
+                elif self.depth == 2 and self.value_is_array and self.item_start is None:
+                    self.item_start = i
+                self.depth += 1
+            elif ch in "}]":
+                self.depth -= 1
+                if self.depth == 0:
+                    if self.value_start is not None:
+                        self._complete_field(text, i)
+                    self.done = True
+                elif self.depth == 1 and self.value_start is not None and self.value_is_array:
+                    if self.item_start is not None:
+                        self._complete_item(text, i)
+                    self._complete_field(text, i + 1)
+                elif self.depth == 2 and self.value_is_array and self.item_start is not None:
+                    self._complete_item(text, i + 1)
+            elif ch == ",":
+                if self.depth == 1 and self.value_start is not None:
+                    self._complete_field(text, i)
+                elif self.depth == 2 and self.value_is_array and self.item_start is not None:
+                    self._complete_item(text, i)
+            elif ch == ":" or ch.isspace():
+                continue
+            elif self.depth == 1 and self.value_start is None and self.key is not None:
+                # Number, true, false or null.
+                self.value_start = i
+            elif self.depth == 2 and self.value_is_array and self.item_start is None:
+                self.item_start = i
+
+    def _complete_item(self, text, end):
+        raw = text[self.item_start:end].strip()
+        self.item_start = None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        if self.on_item:
+            self.on_item(self.key, self.item_index, value)
+        self.item_index += 1
+
+    def _complete_field(self, text, end):
+        raw = text[self.value_start:end].strip()
+        key = self.key
+        self.key = None
+        self.key_start = None
+        self.value_start = None
+        self.value_is_array = False
+        self.item_start = None
+        try:
+            value = json.loads(raw)
+        except ValueError:
+            return
+        self.fields[key] = value
+        if self.on_field:
+            self.on_field(key, value)
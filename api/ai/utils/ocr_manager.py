@@ -1,3 +1,4 @@
+import logging
 import base64
 from io import BytesIO
 from PIL import Image, ImageEnhance, ImageFilter
@@ -10,8 +11,14 @@ from weasyprint import HTML
 
 from ai.utils.doc_ai_managr import DocAIManager
 from ai.utils.chunk_manager import ChunkPipeline
+from ai.utils.credit_ledger import CreditLedger
+from ai.utils.provider_backends import ProviderBackends
+from ai.utils.tracing import Tracer
 from ai.tasks import apply_cost_task
 
+logger = logging.getLogger(__name__)
+
+@Tracer.trace_methods
 class OCRManager:
     def __init__(self, google_cloud_project_id, google_cloud_location, google_cloud_processor_id, cur_user=None):
         """
@@ -21,6 +28,7 @@ class OCRManager:
             google_cloud_project_id (str): Google Cloud project ID.
             google_cloud_location (str): Google Cloud location (e.g., 'us', 'eu').
             google_cloud_processor_id (str): Document AI processor ID.
+            cur_user (User, optional): User charged for the OCR calls.
 
         Sets:
             self.cost (float): Stores the cost of the last OCR operation.
@@ -29,11 +37,28 @@ class OCRManager:
         self.GOOGLE_CLOUD_LOCATION = google_cloud_location
         self.GOOGLE_CLOUD_PROCESSOR_ID = google_cloud_processor_id
         self.cost = 0
+        self.cur_user = cur_user
+        self.credit_ledger = CreditLedger()
+        self.charge_credit = True
+        self._documentai_client = None
+        ProviderBackends.install(self)
+
+    @property
+    def documentai_client(self):
+        if self._documentai_client is None:
+            self._documentai_client = documentai.DocumentProcessorServiceClient(
+                client_options=ClientOptions(api_endpoint=f"{self.GOOGLE_CLOUD_LOCATION}-documentai.googleapis.com")
+            )
+        return self._documentai_client
+
+    @documentai_client.setter
+    def documentai_client(self, client):
+        self._documentai_client = client
     
     def _apply_cost(self, cost):
         self.cost += cost
-        if self.cur_user:
-            apply_cost_task.delay(self.cur_user.id, cost)
+        if self.cur_user and self.charge_credit and not self.credit_ledger.charge(self.cur_user.id, cost, "ocr:document_ai"):
+            apply_cost_task.delay(self.cur_user.id, cost, "ocr:document_ai")
 
     def _png_bytes_to_pdf_bytes(self, png_bytes):
         """
@@ -119,17 +144,17 @@ class OCRManager:
                     resp.raise_for_status()
                     pdf_bytes = resp.content
                 except Exception as e:
-                    print(f"Error downloading PDF from URL: {e}")
+                    logger.error("Error downloading PDF from URL: %s", e)
                     return None
             else:
                 try:
                     with open(source, 'rb') as file:
                         pdf_bytes = file.read()
                 except Exception as e:
-                    print(f"Error reading PDF from file: {e}")
+                    logger.error("Error reading PDF from file: %s", e)
                     return None
         else:
-            print("Unsupported source type for PDF input.")
+            logger.warning("Unsupported source type for PDF input.")
             return None
         try:
             pages = convert_from_bytes(pdf_bytes, fmt="png", first_page=page_number, last_page=page_number)
@@ -138,7 +163,7 @@ class OCRManager:
                 pages[0].save(png_bytes_io, format="PNG")
                 return png_bytes_io.getvalue()
         except Exception as e:
-            print(f"Error converting PDF page to PNG: {e}")
+            logger.error("Error converting PDF page to PNG: %s", e)
         return None
     
     def get_pdf_page_count(self, pdf_bytes):
@@ -154,6 +179,27 @@ class OCRManager:
         reader = PdfReader(BytesIO(pdf_bytes))
         return len(reader.pages)
 
+    def plan_pdf(self, pdf_bytes, start_page=None, end_page=None, cost_per_page=0.03):
+        """
+        Estimate read_pdf_bytes without calling Document AI. The PDF's embedded text layer (if any) stands in
+        for the OCR output, wrapped in one paragraph per page.
+
+        Args:
+            pdf_bytes (bytes): PDF file data.
+            start_page (int, optional): First page (1-based). If None, starts from first page.
+            end_page (int, optional): Last page (1-based, inclusive). If None, ends at last page.
+            cost_per_page (float, optional): Cost per page for Document AI OCR (default $0.03).
+
+        Returns:
+            dict: {"pages": int, "cost": float, "html_src": str}
+        """
+        reader = PdfReader(BytesIO(pdf_bytes))
+        start = max(1, start_page if start_page is not None else 1)
+        end = min(len(reader.pages), end_page if end_page is not None else len(reader.pages))
+        pages = list(range(start, end + 1))
+        html_src = "".join(f"<p>{reader.pages[page - 1].extract_text() or ''}</p>" for page in pages)
+        return {"pages": len(pages), "cost": len(pages) * cost_per_page, "html_src": html_src}
+
     def make_img_more_readable(self, img_bytes):
         """
         Enhances the readability of an image by applying sharpening and contrast enhancement.
@@ -187,9 +233,7 @@ class OCRManager:
             self.cost (float): Total cost for the operation.
         """
         try:
-            client = documentai.DocumentProcessorServiceClient(
-                client_options=ClientOptions(api_endpoint=f"{self.GOOGLE_CLOUD_LOCATION}-documentai.googleapis.com")
-            )
+            client = self.documentai_client
             name = client.processor_path(self.GOOGLE_CLOUD_PROJECT_ID, self.GOOGLE_CLOUD_LOCATION, self.GOOGLE_CLOUD_PROCESSOR_ID)
             file_bytes = base64.b64decode(base64_encoded_file)
             html_outputs = []
@@ -222,7 +266,7 @@ class OCRManager:
                     else:
                         pdf_bytes = file_bytes
                 except Exception as e:
-                    print(f"Error enhancing PDF pages: {e}")
+                    logger.error("Error enhancing PDF pages: %s", e)
                     pdf_bytes = file_bytes
             try:
                 num_pages = self.get_pdf_page_count(pdf_bytes)
@@ -237,12 +281,12 @@ class OCRManager:
                 html_output = self._docai_blocks_to_html(res.document)
                 html_outputs.append(html_output)
             except Exception as e:
-                print(f"Error in Document AI OCR: {e}")
+                logger.error("Error in Document AI OCR: %s", e)
                 return None
             self._apply_cost(num_pages * cost_per_page)
             return "\n".join(html_outputs)
         except Exception as e:
-            print(f"Error in Document AI OCR: {e}")
+            logger.error("Error in Document AI OCR: %s", e)
             return None
     
     def read_pdf_bytes(self, pdf_bytes, progress_callback=None, start_page=None, end_page=None):
@@ -283,7 +327,7 @@ class OCRManager:
             if progress_callback:
                 progress_callback(page=page, total=number_of_pages)
             else:
-                print(msg)
+                logger.info(msg)
             png_bytes = self.convert_pdf_page_to_png_bytes(pdf_bytes, page_number=page)
             html_output = self.ocr_using_document_ai(base64.b64encode(png_bytes).decode('utf-8'))
             pdf_texts.append(html_output)
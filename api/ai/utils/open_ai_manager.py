@@ -1,20 +1,35 @@
+import logging
 import openai
+import asyncio
 import wave
 import contextlib
 import io
 import requests
+from types import SimpleNamespace
 
 from core.models import UserModel, ProfileModel
 from ai.utils.ai_manager import BaseAIManager
+from ai.utils.batch_manager import BatchJobManager
+from ai.utils.cost_planner import CostPlanner
+from ai.utils.provider_backends import ProviderBackends
+from ai.utils.tracing import Tracer
 
+logger = logging.getLogger(__name__)
+
+@Tracer.trace_methods
 class OpenAIManager(BaseAIManager):
-    def __init__(self, model, api_key, cur_user=None):
+    SUPPORTS_BATCH = True
+    BATCH_PRICE_FACTOR = 0.5
+
+    def __init__(self, model, api_key, cur_user=None, priority="live"):
         """
         Initialize the OpenAIManager.
         
         Args:
             model (str): The OpenAI model name (e.g., 'gpt-4o', 'gpt-3.5-turbo').
             api_key (str): Your OpenAI API key.
+            cur_user (UserModel): User the calls are billed to.
+            priority (str): Rate limit priority class: "live", "prebuild" or "ingestion". Default is "live".
         
         Returns:
             None
@@ -22,7 +37,7 @@ class OpenAIManager(BaseAIManager):
         Example:
             manager = OpenAIManager(model="gpt-4o", api_key="sk-...")
         """
-        super().__init__(ai_type="open_ai", cur_user=cur_user)
+        super().__init__(ai_type="open_ai", cur_user=cur_user, priority=priority)
         self.OPENAI_PRICING = {
             "gpt-3.5-turbo": {
                 "input_per_1k_token": 0.0005,
@@ -35,6 +50,7 @@ class OpenAIManager(BaseAIManager):
             },
             "gpt-4o": {
                 "input_per_1k_token": 0.0005,
+                "cached_input_per_1k_token": 0.00025,
                 "output_per_1k_token": 0.0015,
                 "audio_stt_per_1_minute": 0.006,
                 "image_per_1_image": 0.00765,
@@ -56,7 +72,10 @@ class OpenAIManager(BaseAIManager):
             },
         }
         self.OPEN_AI_CLIENT = openai.OpenAI(api_key=api_key)
+        self.ASYNC_OPEN_AI_CLIENT = openai.AsyncOpenAI(api_key=api_key)
         self.model = model
+        self.chunk_token_model = model
+        ProviderBackends.install(self)
     
     def add_message(self, role, text=None, img_url=None, max_history=5):
         """
@@ -67,6 +86,7 @@ class OpenAIManager(BaseAIManager):
             text (str): The text content.
             img_url (str): The image URL (optional).
             max_history (int): Maximum number of messages to keep in history. Default is 5.
+                Older messages move to self.memory, which summarizes them in the background.
         
         Returns:
             None
@@ -92,55 +112,160 @@ class OpenAIManager(BaseAIManager):
             msg_content = content if content else text
             self.messages.append({"role": role, "content": msg_content})
             if len(self.messages) > max_history + 2:
-                old_msgs = self.messages[1:-max_history] if self.messages and self.messages[0]["role"] == "system" else self.messages[:-max_history]
-                if old_msgs:
-                    summary_lines = []
-                    for msg in old_msgs:
-                        if msg["role"] == "user":
-                            summary_lines.append(f"User said: {msg['content']}")
-                        elif msg["role"] == "assistant":
-                            summary_lines.append(f"Assistant said: {msg['content']}")
-                    summary_text = "\n".join(summary_lines)
-                    summarized = self.summarize(summary_text)
-                    if self.messages and self.messages[0]["role"] == "system":
-                        self.messages[0]["content"] += f"\n{summarized}"
-                        self.messages = [self.messages[0]] + self.messages[-max_history:]
-                    else:
-                        self.messages = [{"role": "system", "content": summarized}] + self.messages[-max_history:]
-
-    def generate_response(self, max_token=2000, messages=None):
+                has_system = self.messages[0]["role"] == "system"
+                self.memory.push(self.messages[1:-max_history] if has_system else self.messages[:-max_history])
+                self.messages = ([self.messages[0]] if has_system else []) + self.messages[-max_history:]
+
+    def _conversation_messages(self):
+        """
+        Return the message history with the latest available conversation memory added to the system message.
+        """
+        context = self.memory.context()
+        if not context:
+            return self.messages
+        if self.messages and self.messages[0]["role"] == "system":
+            return [{"role": "system", "content": f"{self.messages[0]['content']}\n{context}"}] + self.messages[1:]
+        return [{"role": "system", "content": context}] + self.messages
+
+    def generate_response(self, max_token=2000, messages=None, stream=False, on_delta=None, use_cache=False):
         """
         Generate a response from the OpenAI chat model.
         
         Args:
             max_token (int): Maximum number of tokens in the response. Default is 2000.
             messages (list): List of message dicts. If None, uses internal history.
+            stream (bool): If True, return a generator of text deltas instead of the full text. Default is False.
+            on_delta (callable): If set, the response is streamed and on_delta(delta) is called for every text delta;
+                the full text is still returned.
+            use_cache (bool): Look up and store the response in self.response_cache (not with stream=True). A hit costs nothing.
+                Only for deterministic pipeline calls (summaries, chunk tasks), never for live conversation turns. Default is False.
         
         Returns:
-            str: The assistant's response text.
+            str: The assistant's response text (or a generator of deltas if stream=True).
+            In streaming modes the cost is applied from the usage reported at the end of the stream.
         
         Example:
             reply = manager.generate_response(max_token=500)
+            reply = manager.generate_response(max_token=500, on_delta=lambda delta: print(delta, end=""))
+            for delta in manager.generate_response(max_token=500, stream=True):
+                print(delta, end="")
         """
-        if messages is None:
-            messages = self.messages
-        response = self.OPEN_AI_CLIENT.chat.completions.create(
+        # Only a call built from the shared history clears it: calls with explicit messages (chunk workers) leave it alone.
+        uses_history = not messages
+        if uses_history:
+            messages = self._conversation_messages()
+        if stream:
+            if uses_history:
+                self.clear_messages()
+            return self._stream_response(max_token, messages)
+        cache_key = self._response_cache_key(messages, max_token, use_cache)
+        cached = self._get_cached_response(cache_key)
+        if cached is not None:
+            if uses_history:
+                self.clear_messages()
+            if on_delta is not None:
+                on_delta(cached)
+            return cached
+        batched = self._batch_intercept(messages, max_token, cache_key)
+        if batched is not None:
+            if uses_history:
+                self.clear_messages()
+            return batched
+        if on_delta is not None:
+            deltas = []
+            for delta in self._stream_response(max_token, messages):
+                deltas.append(delta)
+                on_delta(delta)
+            result = self._clean_code_block("".join(deltas))
+        else:
+            self._acquire_rate_limit(messages, max_token)
+            response = self.OPEN_AI_CLIENT.chat.completions.create(
+                model=self.model,
+                messages=messages,
+                max_tokens=max_token
+            )
+            result = self._handle_chat_response(response)
+        if uses_history:
+            self.clear_messages()
+        self._set_cached_response(cache_key, result)
+        return result
+
+    async def agenerate_response(self, max_token=2000, messages=None, use_cache=False):
+        """
+        Async counterpart of generate_response, using the async OpenAI client.
+
+        Args:
+            max_token (int): Maximum number of tokens in the response. Default is 2000.
+            messages (list): List of message dicts. If None, uses internal history.
+            use_cache (bool): Look up and store the response in self.response_cache. Default is False.
+
+        Returns:
+            str: The assistant's response text.
+
+        Example:
+            reply = await manager.agenerate_response(max_token=500)
+        """
+        uses_history = not messages
+        if uses_history:
+            messages = self._conversation_messages()
+            self.clear_messages()
+        cache_key = self._response_cache_key(messages, max_token, use_cache)
+        cached = await asyncio.to_thread(self._get_cached_response, cache_key) if cache_key else None
+        if cached is not None:
+            return cached
+        await self._aacquire_rate_limit(messages, max_token)
+        response = await self.ASYNC_OPEN_AI_CLIENT.chat.completions.create(
             model=self.model,
-            messages=messages if messages else self.messages,
+            messages=messages,
             max_tokens=max_token
         )
-        tokens_used = response.usage
+        result = await asyncio.to_thread(self._handle_chat_response, response)
+        if cache_key:
+            await asyncio.to_thread(self._set_cached_response, cache_key, result)
+        return result
+
+    def _stream_response(self, max_token, messages):
+        """
+        Stream a chat completion, yielding text deltas. The cost is applied when the stream ends.
+        """
+        self._acquire_rate_limit(messages, max_token)
+        response = self.OPEN_AI_CLIENT.chat.completions.create(
+            model=self.model,
+            messages=messages,
+            max_tokens=max_token,
+            stream=True,
+            stream_options={"include_usage": True}
+        )
+        usage = None
+        for chunk in response:
+            if chunk.usage:
+                usage = chunk.usage
+            if chunk.choices and chunk.choices[0].delta and chunk.choices[0].delta.content:
+                yield chunk.choices[0].delta.content
+        if usage:
+            self._apply_chat_cost(usage)
+
+    def _apply_chat_cost(self, tokens_used, price_factor=1.0):
         prompt_tokens = tokens_used.prompt_tokens
         completion_tokens = tokens_used.completion_tokens
+        details = getattr(tokens_used, "prompt_tokens_details", None)
+        cached_tokens = (details.get("cached_tokens") if isinstance(details, dict) else getattr(details, "cached_tokens", 0)) or 0
         pricing = self.OPENAI_PRICING.get(self.model, {})
         input_price = pricing.get("input_per_1k_token", 0)
+        cached_input_price = pricing.get("cached_input_per_1k_token", input_price)
         output_price = pricing.get("output_per_1k_token", 0)
         
-        cost = (prompt_tokens / 1000) * input_price + (completion_tokens / 1000) * output_price
+        cost = (((prompt_tokens - cached_tokens) / 1000) * input_price + (cached_tokens / 1000) * cached_input_price + (completion_tokens / 1000) * output_price) * price_factor
         self._apply_cost(cost)
-        
+        self._record_usage(prompt_tokens, completion_tokens, cached_tokens)
+
+    def _estimate_cost(self, input_tokens, output_tokens, model=None):
+        pricing = self.OPENAI_PRICING.get(model or self.model, {})
+        return (input_tokens / 1000) * pricing.get("input_per_1k_token", 0) + (output_tokens / 1000) * pricing.get("output_per_1k_token", 0)
+
+    def _handle_chat_response(self, response):
+        self._apply_chat_cost(response.usage)
         raw_response = response.choices[0].message.content.strip() if response.choices and response.choices[0].message else ""
-        self.clear_messages()
         return self._clean_code_block(raw_response)
 
     
@@ -167,6 +292,38 @@ class OpenAIManager(BaseAIManager):
             # Using file path
             text = manager.stt('/path/to/audio.wav', input_type='file')
         """
+        file_for_api, duration_seconds = self._prepare_audio(audio_input, input_type)
+        response = self.OPEN_AI_CLIENT.audio.transcriptions.create(
+            model="whisper-1",
+            file=file_for_api,
+            response_format=response_format,
+            language=language
+        )
+        return self._handle_stt_response(response, response_format, duration_seconds)
+
+    async def astt(self, audio_input, response_format="text", language=None, input_type="url"):
+        """
+        Async counterpart of stt, using the async OpenAI client. Arguments and return value are the same as stt.
+
+        Example:
+            text = await manager.astt(audio_bytes, input_type='bytes')
+        """
+        file_for_api, duration_seconds = await asyncio.to_thread(self._prepare_audio, audio_input, input_type)
+        response = await self.ASYNC_OPEN_AI_CLIENT.audio.transcriptions.create(
+            model="whisper-1",
+            file=file_for_api,
+            response_format=response_format,
+            language=language
+        )
+        return await asyncio.to_thread(self._handle_stt_response, response, response_format, duration_seconds)
+
+    def _prepare_audio(self, audio_input, input_type):
+        """
+        Load the audio for the transcription API and measure its duration for pricing.
+
+        Returns:
+            tuple: (file_for_api, duration_seconds)
+        """
         if input_type == "bytes":
             audio_file = io.BytesIO(audio_input)
             audio_file.name = f"{self._random_generator()}.wav"
@@ -202,12 +359,9 @@ class OpenAIManager(BaseAIManager):
                     duration_seconds = frames / float(rate)
             except Exception:
                 duration_seconds = 0
-        response = self.OPEN_AI_CLIENT.audio.transcriptions.create(
-            model="whisper-1",
-            file=file_for_api,
-            response_format=response_format,
-            language=language
-        )
+        return file_for_api, duration_seconds
+
+    def _handle_stt_response(self, response, response_format, duration_seconds):
         duration_minutes = duration_seconds / 60
         pricing = self.OPENAI_PRICING.get("whisper", {})
         input_price = pricing.get("audio_stt_per_1_minute", 0)
@@ -248,6 +402,26 @@ class OpenAIManager(BaseAIManager):
             voice=voice,
             response_format=audio_format
         )
+        self._apply_tts_cost(text, model)
+        return response.content
+
+    async def atts(self, text, voice="nova", audio_format="mp3", model="tts-1"):
+        """
+        Async counterpart of tts, using the async OpenAI client. Arguments and return value are the same as tts.
+
+        Example:
+            audio = await manager.atts("Hello world!")
+        """
+        response = await self.ASYNC_OPEN_AI_CLIENT.audio.speech.create(
+            model=model,
+            input=text,
+            voice=voice,
+            response_format=audio_format
+        )
+        await asyncio.to_thread(self._apply_tts_cost, text, model)
+        return response.content
+
+    def _apply_tts_cost(self, text, model):
         pricing = self.OPENAI_PRICING.get("gpt-4o", {})
         if model == "tts-1-hd":
             input_price = pricing.get("tts_premium_per_1k_char", 0)
@@ -256,7 +430,40 @@ class OpenAIManager(BaseAIManager):
         char_count = len(text)
         cost = (char_count / 1000) * input_price
         self._apply_cost(cost)
-        return response.content
+
+    def enable_batch_mode(self, poll_interval=60, completion_window="24h", max_wait=None, block=True):
+        """
+        Run chunk pipelines (teaching content, Q&A, MCQ, translation, RAG embeddings) as OpenAI batch jobs
+        at batch pricing instead of one synchronous request per chunk. Only for work nobody waits on interactively.
+
+        Args:
+            poll_interval (float): Seconds between status checks. Default is 60.
+            completion_window (str): Batch completion window. Default is '24h'.
+            max_wait (float): Seconds to wait for a job before raising TimeoutError. Default is None (no limit).
+            block (bool): Wait for batch jobs. If False, pipelines raise BatchJobPending while a job runs and should be
+                re-run (with their resume_job_id) after its retry_after seconds. Default is True.
+
+        Returns:
+            BatchJobManager: The batch manager, also stored as self.batch_manager.
+
+        Example:
+            manager.enable_batch_mode(poll_interval=30)
+            teaching_content = manager.build_teaching_content_for_a_text(text)
+        """
+        self.batch_manager = BatchJobManager(self.OPEN_AI_CLIENT, poll_interval=poll_interval, completion_window=completion_window, max_wait=max_wait, block=block)
+        return self.batch_manager
+
+    def disable_batch_mode(self):
+        self.batch_manager = None
+
+    def _batch_request(self, payload, max_token):
+        return "/v1/chat/completions", {"model": self.model, "messages": payload, "max_tokens": max_token}
+
+    def _apply_batch_response(self, body):
+        self._apply_chat_cost(SimpleNamespace(**body["usage"]), price_factor=self.BATCH_PRICE_FACTOR)
+        choices = body.get("choices") or []
+        message = choices[0].get("message") or {} if choices else {}
+        return self._clean_code_block((message.get("content") or "").strip())
 
     def generate_image(self, prompt, size="1024x1024"):
         """
@@ -286,7 +493,7 @@ class OpenAIManager(BaseAIManager):
         self._apply_cost(image_price)
         return image_bytes
     
-    def build_materials_for_rag(self, text, max_chunk_size=1000, embedding_model="text-embedding-3-large", progress_callback=None):
+    def build_materials_for_rag(self, text, max_chunk_size=1000, embedding_model="text-embedding-3-large", progress_callback=None, dry_run=False):
         """
         Build materials for RAG (Retrieval-Augmented Generation):
         For each chunk, generate:
@@ -299,41 +506,39 @@ class OpenAIManager(BaseAIManager):
             text (str): The input text (can be HTML)
             max_chunk_size (int): Max size of each chunk. Default 1000.
             embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            dry_run (bool): Return the CostPlanner estimate without calling the API. Default False.
         Returns:
             list: List of dicts for all chunks
         """
+        if dry_run:
+            planner = CostPlanner(self)
+            return planner.plan("build_materials_for_rag", [planner.plan_embeddings(text, max_chunk_size, embedding_model)])
         chunks = self.build_chunks(text, max_chunk_size=max_chunk_size)
+        if self.batch_manager is not None:
+            return self._build_materials_for_rag_batched(chunks, embedding_model, progress_callback)
         materials = []
         for i, chunk in enumerate(chunks):
             msg = f"Processing chunk {i+1}/{len(chunks)} for embeddings..."
             if progress_callback:
                 progress_callback(chunk=chunk, index=i+1, total=len(chunks))
             else:
-                print(msg)
+                logger.info(msg)
             html_output = chunk["html"]
             text_output = chunk["text"]
             embedding_text = text_output
             try:
+                self._acquire_rate_limit(embedding_text)
                 response = self.OPEN_AI_CLIENT.embeddings.create(
                     model=embedding_model,
                     input=embedding_text
                 )
-                vector_output = response.data[0].embedding if response and response.data and response.data[0].embedding else []
-                usage = getattr(response, "usage", None)
-                if usage:
-                    input_tokens = getattr(usage, "prompt_tokens", 0)
-                else:
-                    input_tokens = max(1, len(embedding_text) // 4)
-                pricing = self.OPENAI_PRICING.get(embedding_model, {})
-                input_price = pricing.get("input_per_1k_token", 0)
-                cost = (input_tokens / 1000) * input_price
-                self._apply_cost(cost)
+                vector_output = self._handle_embedding_response(response, embedding_text, embedding_model)
             except Exception as e:
                 err_msg = f"Error generating embedding: {e}"
                 if progress_callback:
                     progress_callback(err_msg, chunk=chunk, index=i+1, total=len(chunks))
                 else:
-                    print(err_msg)
+                    logger.info(err_msg)
                 vector_output = []
             materials.append({
                 "chunk_number": i + 1,
@@ -341,4 +546,98 @@ class OpenAIManager(BaseAIManager):
                 "text": text_output,
                 "vector": vector_output
             })
-        return materials
\ No newline at end of file
+        return materials
+
+    def _build_materials_for_rag_batched(self, chunks, embedding_model, progress_callback=None):
+        """
+        Batch-mode counterpart of build_materials_for_rag: all embeddings are requested in one batch job
+        (custom_id is the chunk index); chunks whose request failed get an empty vector.
+        """
+        for i, chunk in enumerate(chunks):
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i+1, total=len(chunks))
+            else:
+                logger.info("Processing chunk %s/%s for embeddings (batch)...", i+1, len(chunks))
+        lines = [self.batch_manager.build_line(i, "/v1/embeddings", {"model": embedding_model, "input": chunk["text"]}) for i, chunk in enumerate(chunks)]
+        responses = self.batch_manager.run(lines, "Building embeddings")
+        materials = []
+        for i, chunk in enumerate(chunks):
+            body = responses.get(str(i))
+            vector_output = []
+            if body:
+                response = SimpleNamespace(
+                    data=[SimpleNamespace(embedding=item.get("embedding")) for item in body.get("data") or []],
+                    usage=SimpleNamespace(**body["usage"]) if body.get("usage") else None
+                )
+                vector_output = self._handle_embedding_response(response, chunk["text"], embedding_model, price_factor=self.BATCH_PRICE_FACTOR)
+            elif progress_callback:
+                progress_callback(f"Embedding request for chunk {i+1} failed in batch", chunk=chunk, index=i+1, total=len(chunks))
+            else:
+                logger.warning("Embedding request for chunk %s failed in batch", i+1)
+            materials.append({
+                "chunk_number": i + 1,
+                "html": chunk["html"],
+                "text": chunk["text"],
+                "vector": vector_output
+            })
+        return materials
+
+    async def abuild_materials_for_rag(self, text, max_chunk_size=1000, embedding_model="text-embedding-3-large", progress_callback=None, max_concurrency=8):
+        """
+        Async counterpart of build_materials_for_rag. Embeddings are requested with asyncio.gather,
+        at most max_concurrency at a time; materials are returned in chunk order.
+
+        Args:
+            text (str): The input text (can be HTML)
+            max_chunk_size (int): Max size of each chunk. Default 1000.
+            embedding_model (str): OpenAI embedding model name. Default "text-embedding-3-large".
+            max_concurrency (int): Maximum number of concurrent embedding requests. Default 8.
+        Returns:
+            list: List of dicts for all chunks
+        """
+        chunks = await asyncio.to_thread(self.build_chunks, text, max_chunk_size=max_chunk_size)
+        semaphore = asyncio.Semaphore(max(1, max_concurrency))
+
+        async def embed(i, chunk):
+            msg = f"Processing chunk {i+1}/{len(chunks)} for embeddings..."
+            if progress_callback:
+                progress_callback(chunk=chunk, index=i+1, total=len(chunks))
+            else:
+                logger.info(msg)
+            embedding_text = chunk["text"]
+            try:
+                async with semaphore:
+                    await self._aacquire_rate_limit(embedding_text)
+                    response = await self.ASYNC_OPEN_AI_CLIENT.embeddings.create(
+                        model=embedding_model,
+                        input=embedding_text
+                    )
+                vector_output = await asyncio.to_thread(self._handle_embedding_response, response, embedding_text, embedding_model)
+            except Exception as e:
+                err_msg = f"Error generating embedding: {e}"
+                if progress_callback:
+                    progress_callback(err_msg, chunk=chunk, index=i+1, total=len(chunks))
+                else:
+                    logger.info(err_msg)
+                vector_output = []
+            return {
+                "chunk_number": i + 1,
+                "html": chunk["html"],
+                "text": embedding_text,
+                "vector": vector_output
+            }
+
+        return list(await asyncio.gather(*(embed(i, chunk) for i, chunk in enumerate(chunks))))
+
+    def _handle_embedding_response(self, response, embedding_text, embedding_model, price_factor=1.0):
+        vector_output = response.data[0].embedding if response and response.data and response.data[0].embedding else []
+        usage = getattr(response, "usage", None)
+        if usage:
+            input_tokens = getattr(usage, "prompt_tokens", 0)
+        else:
+            input_tokens = max(1, len(embedding_text) // 4)
+        pricing = self.OPENAI_PRICING.get(embedding_model, {})
+        input_price = pricing.get("input_per_1k_token", 0)
+        cost = (input_tokens / 1000) * input_price * price_factor
+        self._apply_cost(cost)
+        return vector_output
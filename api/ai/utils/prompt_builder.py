@@ -0,0 +1,61 @@
+class PromptBuilder:
+    """
+    Assemble per-chunk requests as an identical leading prefix (static system prompt + document-level context)
+    followed by the chunk material, so provider-side prefix caching applies to every chunk after the first.
+    For OpenAI the prefix is the system message and the chunk material the user message;
+    for Google the prompt is the prefix followed by the chunk material.
+    """
+    def __init__(self, system_prompt, document_context=None):
+        """
+        Args:
+            system_prompt (str): Instructions shared by all chunks; must not contain chunk-specific text.
+            document_context (list): (label, text) pairs shared by all chunks (e.g., the general summary).
+
+        Example:
+            builder = PromptBuilder(system_prompt, [("General summary", general_summary)])
+            response = manager.generate_response(**builder.request(manager.ai_type, [("Current chunk", chunk["html"])], max_token=2000))
+        """
+        self.prefix = system_prompt.rstrip("\n") + "\n"
+        if document_context:
+            self.prefix += "\n" + self._format(document_context)
+
+    @staticmethod
+    def _format(parts):
+        return "".join(f"{label}: {value}\n" for label, value in parts)
+
+    def messages(self, chunk_context):
+        """
+        Return the OpenAI messages of a chunk.
+
+        Args:
+            chunk_context (list): (label, text) pairs of the chunk (e.g., previous, current and next chunk).
+
+        Returns:
+            list: [system message with the shared prefix, user message with the chunk material]
+        """
+        return [
+            {"role": "system", "content": self.prefix},
+            {"role": "user", "content": self._format(chunk_context)}
+        ]
+
+    def prompt(self, chunk_context):
+        """
+        Return the single-string prompt of a chunk (shared prefix first).
+        """
+        return f"{self.prefix}\n{self._format(chunk_context)}"
+
+    def request(self, ai_type, chunk_context, max_token):
+        """
+        Return the generate_response keyword arguments of a chunk for a provider.
+
+        Args:
+            ai_type (str): 'open_ai' or 'google'.
+            chunk_context (list): (label, text) pairs of the chunk.
+            max_token (int): max_token of the request.
+
+        Returns:
+            dict: {"max_token": ..., "messages": ...} or {"max_token": ..., "prompt": ...}
+        """
+        if ai_type == "google":
+            return {"max_token": max_token, "prompt": self.prompt(chunk_context)}
+        return {"max_token": max_token, "messages": self.messages(chunk_context)}
@@ -0,0 +1,88 @@
+import threading
+
+from django.conf import settings
+
+from ai.utils.fake_providers import FakeProviders
+from ai.utils.provider_recorder import ProviderRecorder
+
+class ProviderBackends:
+    """
+    Chooses what the provider clients of the managers talk to, from settings.AI_PROVIDER_BACKEND:
+    "live" (the real SDK clients), "fake" (deterministic FakeProviders), "record" (live clients whose responses
+    are saved to AI_PROVIDER_RECORDINGS_DIR) or "replay" (saved responses only, no keys or network needed).
+    The fakes and the recorder are shared by all managers of the process.
+    Only the backends in BILLED reach a paid provider; install() sets manager.charge_credit accordingly,
+    so fake and replayed calls are costed (manager.cost) but never charged to the user.
+    """
+    BILLED = ("live", "record")
+    # Client attributes of each manager that the backend replaces.
+    CLIENTS = {
+        "OpenAIManager": ("OPEN_AI_CLIENT", "ASYNC_OPEN_AI_CLIENT"),
+        "GoogleAIManager": ("model", "speech_client", "tts_client", "vision_client", "tts_rest_post"),
+        "OCRManager": ("documentai_client",),
+        "AzureManager": ("synthesizer_class",),
+        "AwsManager": ("polly_client",),
+    }
+    _fakes = None
+    _recorders = {}
+    _lock = threading.Lock()
+
+    @classmethod
+    def _manager_name(cls, manager):
+        for manager_class in type(manager).__mro__:
+            if manager_class.__name__ in cls.CLIENTS:
+                return manager_class.__name__
+        return None
+
+    @classmethod
+    def client_attributes(cls, manager):
+        return cls.CLIENTS.get(cls._manager_name(manager), ())
+
+    @classmethod
+    def fakes(cls):
+        with cls._lock:
+            if cls._fakes is None:
+                cls._fakes = FakeProviders.from_settings(settings)
+            return cls._fakes
+
+    @classmethod
+    def recorder(cls, mode):
+        with cls._lock:
+            if mode not in cls._recorders:
+                cls._recorders[mode] = ProviderRecorder(settings.AI_PROVIDER_RECORDINGS_DIR, mode=mode)
+            return cls._recorders[mode]
+
+    @classmethod
+    def install(cls, manager, backend=None):
+        """
+        Replace the provider clients of a manager according to the backend. Called at the end of each manager's __init__.
+
+        Args:
+            manager: OpenAIManager, GoogleAIManager, OCRManager, AzureManager or AwsManager.
+            backend (str): "live", "fake", "record" or "replay". Default is settings.AI_PROVIDER_BACKEND.
+
+        Returns:
+            The manager.
+
+        Example:
+            ProviderBackends.install(OpenAIManager(model="gpt-4o", api_key="unused"), backend="fake")
+        """
+        backend = backend or getattr(settings, "AI_PROVIDER_BACKEND", "live")
+        manager.charge_credit = backend in cls.BILLED
+        if backend == "live":
+            return manager
+        manager_name = cls._manager_name(manager)
+        for attribute in cls.client_attributes(manager):
+            if backend == "fake":
+                client = cls.fakes().client(attribute)
+            elif backend == "record":
+                live_client = getattr(manager, attribute)
+                if live_client is None:
+                    continue
+                client = cls.recorder("record").wrap(live_client, f"{manager_name}.{attribute}")
+            elif backend == "replay":
+                client = cls.recorder("replay").wrap(None, f"{manager_name}.{attribute}")
+            else:
+                raise ValueError(f"Unknown provider backend: {backend}")
+            setattr(manager, attribute, client)
+        return manager
@@ -0,0 +1,241 @@
+import io
+import os
+import enum
+import json
+import base64
+import hashlib
+import inspect
+import threading
+from types import SimpleNamespace, GeneratorType
+
+class ReplayMissError(KeyError):
+    """
+    Raised in replay mode for a call that was never recorded.
+    """
+
+class ProviderRecorder:
+    """
+    Records provider client calls to disk and plays them back, so pipelines can be benchmarked
+    and tested against real responses without keys or network.
+    A call is keyed by the client attribute path (e.g., 'OpenAIManager.OPEN_AI_CLIENT.chat.completions.create')
+    and its arguments; repeated identical calls are numbered, and replay falls back to the first recording.
+    Coroutines are awaited, streams (stream=True) and response bodies are read before saving.
+    Recordings are JSON, so replaying a file never runs code from it: SDK objects are saved as their public
+    attributes and come back as SimpleNamespaces; only protobuf messages and enums of the SDK modules in
+    RESTORABLE_MODULES are rebuilt as their own classes.
+    """
+    # Results that are handles for further calls (Azure synthesis futures), not responses.
+    DEFERRED_TYPES = ("ResultFuture",)
+    _DEFERRED = {"__deferred__": True}
+    # Packages whose classes a recording may name (protobuf responses, SDK enums such as ResultReason).
+    RESTORABLE_MODULES = ("google.", "azure.")
+
+    def __init__(self, directory, mode="replay"):
+        """
+        Args:
+            directory (str): Directory of the recordings.
+            mode (str): "record" (call the live client and save the result) or "replay" (load saved results only).
+
+        Example:
+            recorder = ProviderRecorder("/websocket_tmp/provider_recordings", mode="record")
+            manager.OPEN_AI_CLIENT = recorder.wrap(manager.OPEN_AI_CLIENT, "OpenAIManager.OPEN_AI_CLIENT")
+        """
+        if mode not in ("record", "replay"):
+            raise ValueError(f"Unknown recorder mode: {mode}")
+        self.directory = directory
+        self.mode = mode
+        self._counters = {}
+        self._lock = threading.Lock()
+
+    def wrap(self, target, name):
+        """
+        Wrap a client (ignored in replay mode) so that its calls are recorded or replayed.
+
+        Args:
+            target: Live client, callable or class.
+            name (str): Name of the client in the recordings.
+
+        Returns:
+            _RecordedClient: Proxy of the client.
+        """
+        return _RecordedClient(self, target if self.mode == "record" else None, name)
+
+    def key(self, path, args, kwargs):
+        digest = hashlib.sha256(repr((path, self._normalize(args), self._normalize(kwargs))).encode("utf-8"))
+        return digest.hexdigest()[:32]
+
+    @classmethod
+    def _normalize(cls, value):
+        if value is None or isinstance(value, (str, int, float, bool)):
+            return value
+        if isinstance(value, (bytes, bytearray)):
+            return f"bytes:{hashlib.sha256(value).hexdigest()}"
+        if isinstance(value, dict):
+            return sorted((str(key), cls._normalize(item)) for key, item in value.items())
+        if isinstance(value, (list, tuple)):
+            return [cls._normalize(item) for item in value]
+        if hasattr(value, "read") and hasattr(value, "seek"):
+            position = value.tell()
+            content = value.read()
+            value.seek(position)
+            return cls._normalize(content)
+        if hasattr(type(value), "serialize"):
+            try:
+                return cls._normalize(type(value).serialize(value))
+            except Exception:
+                pass
+        if isinstance(value, SimpleNamespace):
+            return cls._normalize(vars(value))
+        # Client configs and other handles: only their type, never their address or secrets.
+        return f"<{type(value).__module__}.{type(value).__qualname__}>"
+
+    def _file(self, path, key, number):
+        return os.path.join(self.directory, path, f"{key}_{number}.json")
+
+    def _next_number(self, path, key):
+        with self._lock:
+            number = self._counters.get((path, key), 0)
+            self._counters[(path, key)] = number + 1
+            return number
+
+    def save(self, path, key, number, value):
+        file_path = self._file(path, key, number)
+        os.makedirs(os.path.dirname(file_path), exist_ok=True)
+        with open(file_path + ".tmp", "w", encoding="utf-8") as file:
+            json.dump(value, file)
+        os.replace(file_path + ".tmp", file_path)
+
+    def load(self, path, key, number):
+        for file_path in (self._file(path, key, number), self._file(path, key, 0)):
+            if os.path.exists(file_path):
+                with open(file_path, "r", encoding="utf-8") as file:
+                    return json.load(file)
+        raise ReplayMissError(f"No recording for {path} ({key})")
+
+    @classmethod
+    def _snapshot(cls, value, depth=3):
+        """
+        JSON-serializable copy of a response. Values that JSON has no type for are tagged ({"__bytes__": ...},
+        {"__object__": ...}, ...); SDK objects become their public attributes, down to depth levels of nesting.
+        """
+        if value is None or isinstance(value, (str, bool, int, float)) and not isinstance(value, enum.Enum):
+            return value
+        if isinstance(value, enum.Enum):
+            return {"__enum__": [type(value).__module__, type(value).__qualname__, value.name]}
+        if isinstance(value, (bytes, bytearray)):
+            return {"__bytes__": base64.b64encode(bytes(value)).decode("ascii")}
+        if isinstance(value, dict):
+            return {"__dict__": {str(key): cls._snapshot(item, depth) for key, item in value.items()}}
+        if isinstance(value, list):
+            return [cls._snapshot(item, depth) for item in value]
+        if isinstance(value, tuple):
+            return {"__tuple__": [cls._snapshot(item, depth) for item in value]}
+        if hasattr(value, "read"):
+            return {"__stream__": cls._snapshot(value.read(), depth)}
+        if hasattr(type(value), "serialize") and hasattr(type(value), "deserialize"):
+            payload = type(value).serialize(value)
+            return {"__message__": [type(value).__module__, type(value).__qualname__, cls._snapshot(payload, depth)]}
+        if hasattr(type(value), "model_fields"):
+            # Pydantic responses (OpenAI SDK): their fields, however deeply nested.
+            return {"__object__": {name: cls._snapshot(getattr(value, name, None), depth) for name in type(value).model_fields}}
+        if depth == 0:
+            return None
+        attributes = {}
+        for name in dir(value):
+            if name.startswith("_"):
+                continue
+            try:
+                item = getattr(value, name)
+            except Exception:
+                continue
+            if not callable(item):
+                attributes[name] = cls._snapshot(item, depth - 1)
+        return {"__object__": attributes}
+
+    @classmethod
+    def _restore(cls, value):
+        if isinstance(value, list):
+            return [cls._restore(item) for item in value]
+        if not isinstance(value, dict):
+            return value
+        if "__bytes__" in value:
+            return base64.b64decode(value["__bytes__"])
+        if "__dict__" in value:
+            return {key: cls._restore(item) for key, item in value["__dict__"].items()}
+        if "__tuple__" in value:
+            return tuple(cls._restore(item) for item in value["__tuple__"])
+        if "__stream__" in value:
+            return io.BytesIO(cls._restore(value["__stream__"]))
+        if "__object__" in value:
+            return SimpleNamespace(**{name: cls._restore(item) for name, item in value["__object__"].items()})
+        if "__enum__" in value:
+            module, qualname, name = value["__enum__"]
+            return getattr(cls._class(module, qualname, enum.Enum), name)
+        if "__message__" in value:
+            module, qualname, payload = value["__message__"]
+            return cls._class(module, qualname).deserialize(cls._restore(payload))
+        return value
+
+    @classmethod
+    def _class(cls, module, qualname, base=None):
+        """
+        Import a class named by a recording, only from the SDK packages in RESTORABLE_MODULES.
+        """
+        if not module.startswith(cls.RESTORABLE_MODULES):
+            raise ValueError(f"Recording names a class outside {cls.RESTORABLE_MODULES}: {module}.{qualname}")
+        target = __import__(module, fromlist=["_"])
+        for part in qualname.split("."):
+            target = getattr(target, part)
+        if not isinstance(target, type) or (base is not None and not issubclass(target, base)):
+            raise ValueError(f"Recording names an unexpected object: {module}.{qualname}")
+        return target
+
+class _RecordedClient:
+    def __init__(self, recorder, target, path):
+        self._recorder = recorder
+        self._target = target
+        self._path = path
+
+    def __getattr__(self, name):
+        if name.startswith("__"):
+            raise AttributeError(name)
+        target = getattr(self._target, name) if self._target is not None else None
+        return _RecordedClient(self._recorder, target, f"{self._path}.{name}")
+
+    def __call__(self, *args, **kwargs):
+        recorder = self._recorder
+        key = recorder.key(self._path, args, kwargs)
+        number = recorder._next_number(self._path, key)
+        child = f"{self._path}#{key}"
+        stream = bool(kwargs.get("stream"))
+        if recorder.mode == "replay":
+            record = recorder.load(self._path, key, number)
+            if record == ProviderRecorder._DEFERRED:
+                return _RecordedClient(recorder, None, child)
+            value = recorder._restore(record["value"])
+            if stream:
+                value = iter(value)
+            if record["async"]:
+                async def replay():
+                    return value
+                return replay()
+            return value
+
+        result = self._target(*args, **kwargs)
+        if inspect.isclass(self._target) or type(result).__name__ in ProviderRecorder.DEFERRED_TYPES:
+            recorder.save(self._path, key, number, ProviderRecorder._DEFERRED)
+            return _RecordedClient(recorder, result, child)
+
+        def keep(value, is_async):
+            if stream or isinstance(value, GeneratorType):
+                value = list(value)
+            snapshot = recorder._snapshot(value)
+            recorder.save(self._path, key, number, {"async": is_async, "value": snapshot})
+            value = recorder._restore(snapshot)
+            return iter(value) if stream else value
+
+        if inspect.isawaitable(result):
+            async def record():
+                return keep(await result, True)
+            return record()
+        return keep(result, False)
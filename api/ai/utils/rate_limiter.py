@@ -0,0 +1,170 @@
+import logging
+import time
+import asyncio
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+# Atomically refill every bucket and take the cost from all of them, or none.
+# KEYS: bucket keys. ARGV: ttl_ms, then per bucket: capacity, refill per ms, cost, reserve.
+# Returns 0 when granted, otherwise the milliseconds to wait before retrying.
+ACQUIRE_SCRIPT = """
+local now_parts = redis.call('TIME')
+local now = tonumber(now_parts[1]) * 1000 + math.floor(tonumber(now_parts[2]) / 1000)
+local ttl = tonumber(ARGV[1])
+local levels = {}
+local wait = 0
+for i, key in ipairs(KEYS) do
+    local base = 1 + (i - 1) * 4
+    local capacity = tonumber(ARGV[base + 1])
+    local rate = tonumber(ARGV[base + 2])
+    local cost = tonumber(ARGV[base + 3])
+    local reserve = tonumber(ARGV[base + 4])
+    local state = redis.call('HMGET', key, 'level', 'ts')
+    local level = tonumber(state[1]) or capacity
+    local ts = tonumber(state[2]) or now
+    level = math.min(capacity, level + math.max(0, now - ts) * rate)
+    levels[i] = level
+    local need = math.min(capacity, cost + reserve)
+    if level < need then
+        wait = math.max(wait, math.ceil((need - level) / rate))
+    end
+end
+if wait > 0 then
+    return wait
+end
+for i, key in ipairs(KEYS) do
+    local base = 1 + (i - 1) * 4
+    redis.call('HSET', key, 'level', tostring(levels[i] - tonumber(ARGV[base + 3])), 'ts', now)
+    redis.call('PEXPIRE', key, ttl)
+end
+return 0
+"""
+
+class RateLimitTimeout(Exception):
+    pass
+
+class RateLimiter:
+    """
+    Cross-process token-bucket limiter for provider API calls, stored in Redis.
+    Every call takes one request from the requests-per-minute bucket and its estimated tokens from the
+    tokens-per-minute bucket of the provider. Lower priority classes may only spend a bucket down to a reserve,
+    so live turns always find headroom while content prebuilds and ingestion wait. Each user also has their own
+    buckets holding `user_share` of the provider quota, so one user's batch cannot starve everyone else.
+    If Redis is unavailable the call is let through and the error reported.
+    """
+    PREFIX = "rate_limit"
+    PRIORITIES = ("live", "prebuild", "ingestion")
+    RESERVES = {"live": 0.0, "prebuild": 0.2, "ingestion": 0.4}
+
+    def __init__(self, provider, rpm=0, tpm=0, user_share=0.5, max_wait=300):
+        """
+        Args:
+            provider (str): Provider name (e.g., 'open_ai', 'google').
+            rpm (int): Requests per minute of the provider. 0 disables the request bucket.
+            tpm (int): Tokens per minute of the provider. 0 disables the token bucket.
+            user_share (float): Fraction of the quota a single user may use. None disables per-user buckets. Default is 0.5.
+            max_wait (int): Seconds to wait for capacity before raising RateLimitTimeout. Default is 300.
+
+        Example:
+            limiter = RateLimiter("open_ai", rpm=500, tpm=30000)
+            limiter.acquire(tokens=1200, priority="ingestion", user_id=user.id)
+        """
+        self.provider = provider
+        self.rpm = rpm
+        self.tpm = tpm
+        self.user_share = user_share
+        self.max_wait = max_wait
+        self._script = None
+
+    @classmethod
+    def for_provider(cls, provider):
+        """
+        Build the limiter of a provider from settings.AI_RATE_LIMITS, or None if no limit is configured.
+
+        Args:
+            provider (str): Provider name (e.g., 'open_ai', 'google').
+
+        Returns:
+            RateLimiter or None
+        """
+        limits = getattr(settings, "AI_RATE_LIMITS", {}).get(provider) or {}
+        if not limits.get("rpm") and not limits.get("tpm"):
+            return None
+        return cls(provider, rpm=limits.get("rpm", 0), tpm=limits.get("tpm", 0), user_share=limits.get("user_share", 0.5))
+
+    @property
+    def client(self):
+        return cache.client.get_client(write=True)
+
+    def _buckets(self, tokens, priority, user_id):
+        if priority not in self.RESERVES:
+            raise ValueError(f"Unknown priority '{priority}'. Options are {', '.join(self.PRIORITIES)}.")
+        reserve = self.RESERVES[priority]
+        buckets = []
+        for unit, limit, cost in (("rpm", self.rpm, 1), ("tpm", self.tpm, tokens)):
+            if not limit:
+                continue
+            buckets.append((f"{self.PREFIX}:{self.provider}:{unit}", limit, cost, reserve))
+            if user_id is not None and self.user_share:
+                user_limit = max(1, limit * self.user_share)
+                buckets.append((f"{self.PREFIX}:{self.provider}:{unit}:user:{user_id}", user_limit, cost, reserve))
+        return buckets
+
+    def _try_acquire(self, tokens, priority, user_id):
+        """
+        Try to take capacity once. Returns 0 when granted, otherwise the seconds to wait.
+        """
+        buckets = self._buckets(tokens, priority, user_id)
+        if not buckets:
+            return 0
+        args = [60_000]
+        for _, limit, cost, reserve in buckets:
+            args += [limit, limit / 60_000, cost, limit * reserve]
+        try:
+            if self._script is None:
+                self._script = self.client.register_script(ACQUIRE_SCRIPT)
+            wait_ms = self._script(keys=[key for key, _, _, _ in buckets], args=args)
+        except Exception as e:
+            logger.warning("Rate limiter unavailable: %s", e)
+            return 0
+        return int(wait_ms) / 1000
+
+    def acquire(self, tokens=0, priority="live", user_id=None):
+        """
+        Block until the call may be made.
+
+        Args:
+            tokens (int): Estimated tokens of the call (prompt + max output).
+            priority (str): 'live', 'prebuild' or 'ingestion'. Default is 'live'.
+            user_id (int): User the call is made for; enables per-user fairness.
+
+        Returns:
+            float: Seconds waited.
+
+        Raises:
+            RateLimitTimeout: If no capacity was available within max_wait seconds.
+        """
+        started = time.monotonic()
+        while True:
+            wait = self._try_acquire(tokens, priority, user_id)
+            if not wait:
+                return time.monotonic() - started
+            if time.monotonic() - started + wait > self.max_wait:
+                raise RateLimitTimeout(f"No {self.provider} capacity for a {priority} call within {self.max_wait}s.")
+            time.sleep(wait)
+
+    async def aacquire(self, tokens=0, priority="live", user_id=None):
+        """
+        Async counterpart of acquire. Arguments and return value are the same as acquire.
+        """
+        started = time.monotonic()
+        while True:
+            wait = await asyncio.to_thread(self._try_acquire, tokens, priority, user_id)
+            if not wait:
+                return time.monotonic() - started
+            if time.monotonic() - started + wait > self.max_wait:
+                raise RateLimitTimeout(f"No {self.provider} capacity for a {priority} call within {self.max_wait}s.")
+            await asyncio.sleep(wait)
@@ -0,0 +1,144 @@
+import logging
+import hashlib
+import json
+import time
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class ResponseCache:
+    """
+    Exact-match cache for LLM responses, stored in Redis.
+    Entries are keyed by a hash of the request (provider, model, messages/prompt, max_tokens), expire after
+    `timeout` seconds without a hit, and the least recently used entries are evicted once there are more than `max_entries`.
+    Managers only use it for calls made with use_cache=True (deterministic pipeline steps, not live conversation turns).
+    Hits and misses are counted in Redis. Cache errors never break a request: they are reported and treated as a miss.
+    """
+    PREFIX = "llm_cache"
+
+    def __init__(self, timeout=60 * 60 * 24, max_entries=10000):
+        """
+        Args:
+            timeout (int): Seconds an entry is kept after its last hit. Default is 1 day.
+            max_entries (int): Maximum number of cached responses; least recently used entries are evicted first. Default is 10000.
+        """
+        self.timeout = timeout
+        self.max_entries = max_entries
+        self.lru_key = f"{self.PREFIX}:lru"
+        self.hits_key = f"{self.PREFIX}:stats:hits"
+        self.misses_key = f"{self.PREFIX}:stats:misses"
+
+    @property
+    def client(self):
+        return cache.client.get_client(write=True)
+
+    @staticmethod
+    def build_key(provider, model, payload, max_tokens):
+        """
+        Hash a request into a cache key.
+
+        Args:
+            provider (str): Provider name (e.g., 'open_ai', 'google').
+            model (str): Model name.
+            payload (list or str): The messages or the prompt.
+            max_tokens (int): max_tokens of the request.
+
+        Returns:
+            str: The hex digest identifying the request.
+        """
+        request = json.dumps([provider, model, payload, max_tokens], sort_keys=True, ensure_ascii=False, default=str)
+        return hashlib.sha256(request.encode("utf-8")).hexdigest()
+
+    def get(self, key):
+        """
+        Get a cached response and count the hit or miss.
+
+        Args:
+            key (str): Key from build_key.
+
+        Returns:
+            str or None: The cached response, or None on a miss.
+        """
+        try:
+            client = self.client
+            raw = client.get(f"{self.PREFIX}:{key}")
+            if raw is None:
+                pipe = client.pipeline()
+                pipe.incr(self.misses_key)
+                # The entry may have expired while its LRU member stayed behind.
+                pipe.zrem(self.lru_key, key)
+                pipe.execute()
+                return None
+            pipe = client.pipeline()
+            pipe.incr(self.hits_key)
+            pipe.expire(f"{self.PREFIX}:{key}", self.timeout)
+            pipe.zadd(self.lru_key, {key: time.time()})
+            pipe.execute()
+            return raw.decode("utf-8") if isinstance(raw, bytes) else raw
+        except Exception as e:
+            logger.warning("Response cache unavailable: %s", e)
+            return None
+
+    def set(self, key, response):
+        """
+        Store a response, dropping LRU members of expired entries and evicting the least recently used entries beyond max_entries.
+
+        Args:
+            key (str): Key from build_key.
+            response (str): The response text.
+        """
+        try:
+            client = self.client
+            now = time.time()
+            pipe = client.pipeline()
+            pipe.set(f"{self.PREFIX}:{key}", response, ex=self.timeout)
+            pipe.zadd(self.lru_key, {key: now})
+            # Entries expire `timeout` seconds after their last use, which is their LRU score.
+            pipe.zremrangebyscore(self.lru_key, "-inf", now - self.timeout)
+            pipe.zcard(self.lru_key)
+            size = pipe.execute()[-1]
+            if self.max_entries and size > self.max_entries:
+                evicted = client.zpopmin(self.lru_key, size - self.max_entries)
+                if evicted:
+                    client.delete(*[f"{self.PREFIX}:{member.decode('utf-8') if isinstance(member, bytes) else member}" for member, _ in evicted])
+        except Exception as e:
+            logger.warning("Response cache unavailable: %s", e)
+
+    def delete(self, key):
+        """
+        Drop one cached response (e.g. an answer that could not be parsed).
+
+        Args:
+            key (str): Key from build_key.
+        """
+        try:
+            pipe = self.client.pipeline()
+            pipe.delete(f"{self.PREFIX}:{key}")
+            pipe.zrem(self.lru_key, key)
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Response cache unavailable: %s", e)
+
+    def stats(self):
+        """
+        Get the hit/miss counters.
+
+        Returns:
+            dict: {"hits": int, "misses": int, "size": int}
+
+        Example:
+            print(ResponseCache().stats())
+        """
+        client = self.client
+        hits, misses, size = client.get(self.hits_key), client.get(self.misses_key), client.zcard(self.lru_key)
+        return {"hits": int(hits or 0), "misses": int(misses or 0), "size": size}
+
+    def clear(self):
+        """
+        Delete all cached responses and reset the counters.
+        """
+        client = self.client
+        keys = list(client.scan_iter(f"{self.PREFIX}:*"))
+        if keys:
+            client.delete(*keys)
@@ -0,0 +1,66 @@
+from ai.utils.chunk_manager import count_tokens
+
+class RunningSummary:
+    """
+    Bounded running summary of a growing sequence of outputs (e.g. manipulated chunks).
+    New text is appended verbatim and only folded into the summary with one LLM call when the
+    token threshold is crossed, or every `refresh_every` additions if a cadence is set.
+    """
+    def __init__(self, manager, max_tokens=1000, refresh_every=None, token_model=None):
+        """
+        Args:
+            manager (BaseAIManager): Manager used for the summarization calls.
+            max_tokens (int): Token budget of the running summary; crossing it triggers a refresh. Default is 1000.
+            refresh_every (int): If set, also refresh after this many additions. Default is None (threshold only).
+            token_model (str): Model whose tiktoken encoder counts tokens. Default is the manager's chunk_token_model.
+
+        Example:
+            running_summary = RunningSummary(manager, max_tokens=1000, refresh_every=5)
+            running_summary.add(manipulated_chunk)
+            context = running_summary.text
+        """
+        self.manager = manager
+        self.max_tokens = max_tokens
+        self.refresh_every = refresh_every
+        self.token_model = token_model or manager.chunk_token_model
+        self.summary = ""
+        self.pending = []
+        self.refresh_count = 0
+
+    @property
+    def text(self):
+        """
+        The current running summary followed by the outputs not yet folded into it.
+        """
+        return "\n".join(part for part in [self.summary] + self.pending if part)
+
+    def add(self, text):
+        """
+        Append a new output and refresh the summary if the threshold or cadence is reached.
+
+        Args:
+            text (str): The new output.
+
+        Returns:
+            bool: True if the summary was refreshed.
+        """
+        if not text:
+            return False
+        self.pending.append(text)
+        if self.refresh_every and len(self.pending) >= self.refresh_every:
+            self.refresh()
+            return True
+        if count_tokens(self.text, self.token_model) > self.max_tokens:
+            self.refresh()
+            return True
+        return False
+
+    def refresh(self):
+        """
+        Fold the pending outputs into the summary with one summarization call.
+        """
+        if not self.pending:
+            return
+        self.summary = self.manager._summarize_step(self.text, self.max_tokens)
+        self.pending = []
+        self.refresh_count += 1
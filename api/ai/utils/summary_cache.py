@@ -0,0 +1,99 @@
+import logging
+import hashlib
+
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class SummaryCache:
+    """
+    Content-addressed cache for document summaries, stored in the default (Redis) cache.
+    Entries are keyed by (summary kind, text hash, model, max_length, max_chunk_size, strategy, chunk_mode), so the same
+    book summarized by different pipelines (translate, Q&A, teaching, ...) is only summarized once.
+    Entries expire after `timeout` seconds; a hit refreshes the expiry, so rarely used summaries are evicted first.
+    Cache errors never break a pipeline: they are reported and treated as a miss.
+    """
+    PREFIX = "summary_cache"
+
+    def __init__(self, timeout=60 * 60 * 24 * 30):
+        """
+        Args:
+            timeout (int): Seconds an entry is kept after its last use. None keeps entries until invalidated. Default is 30 days.
+        """
+        self.timeout = timeout
+
+    @staticmethod
+    def text_hash(text):
+        """
+        Return the SHA-256 hex digest of text.
+        """
+        return hashlib.sha256(text.encode("utf-8")).hexdigest()
+
+    def _key(self, kind, text_hash, model, max_length, max_chunk_size, strategy, chunk_mode):
+        return f"{self.PREFIX}:{text_hash}:{kind}:{model}:{max_length}:{max_chunk_size}:{strategy}:{chunk_mode}"
+
+    def get(self, kind, text, model, max_length, max_chunk_size, strategy="rolling", chunk_mode="chars"):
+        """
+        Get a cached summary.
+
+        Args:
+            kind (str): Summary kind (e.g., 'general', 'translation', 'manipulation:academic').
+            text (str): The summarized text.
+            model (str): Model name that produced the summary.
+            max_length (int): max_length used for the summary.
+            max_chunk_size (int): max_chunk_size used for the summary.
+            strategy (str): How the chunks were folded ('rolling', 'map_reduce' or 'fused'). Default is 'rolling'.
+            chunk_mode (str): How the chunks were sized (e.g., 'chars', 'token_budget:gpt-4o'). Default is 'chars'.
+
+        Returns:
+            str or None: The cached summary, or None on a miss.
+
+        Example:
+            summary = SummaryCache().get("general", text, "gpt-4o", 2000, 15000, strategy="map_reduce")
+        """
+        key = self._key(kind, self.text_hash(text), model, max_length, max_chunk_size, strategy, chunk_mode)
+        try:
+            summary = cache.get(key)
+            if summary is not None:
+                cache.touch(key, self.timeout)
+            return summary
+        except Exception as e:
+            logger.warning("Summary cache unavailable: %s", e)
+            return None
+
+    def set(self, kind, text, model, max_length, max_chunk_size, summary, strategy="rolling", chunk_mode="chars"):
+        """
+        Store a summary. Arguments are the same as get(), plus the summary to store.
+        """
+        key = self._key(kind, self.text_hash(text), model, max_length, max_chunk_size, strategy, chunk_mode)
+        try:
+            cache.set(key, summary, self.timeout)
+        except Exception as e:
+            logger.warning("Summary cache unavailable: %s", e)
+
+    def invalidate(self, text=None, text_hash=None, kind=None):
+        """
+        Delete cached summaries of one document, optionally only those of one kind.
+
+        Args:
+            text (str): The document text.
+            text_hash (str): The document hash, if the text is no longer available.
+            kind (str): If set, only delete summaries of this kind.
+
+        Returns:
+            int: Number of deleted entries.
+
+        Example:
+            SummaryCache().invalidate(text=book_text)
+        """
+        text_hash = text_hash or self.text_hash(text)
+        return cache.delete_pattern(f"{self.PREFIX}:{text_hash}:{kind or '*'}:*")
+
+    def clear(self):
+        """
+        Delete all cached summaries.
+
+        Returns:
+            int: Number of deleted entries.
+        """
+        return cache.delete_pattern(f"{self.PREFIX}:*")
@@ -3,12 +3,18 @@ import json
 from google.cloud import texttospeech
 import base64
 import re
+from concurrent.futures import ThreadPoolExecutor
 from xml.etree import ElementTree as ET
+import logging
 
 from ai.utils.open_ai_manager import OpenAIManager
 from ai.utils.google_ai_manager import GoogleAIManager
 from ai.utils.audio_manager import AudioManager
 from ai.utils.azure_manager import AzureManager
+from ai.utils.json_stream import IncrementalJSONExtractor
+from ai.utils.tracing import Tracer
+
+logger = logging.getLogger(__name__)
 
 # class SynchronizeManager():
 #     def __init__(self, cur_user=None):
@@ -79,16 +85,19 @@ from ai.utils.azure_manager import AzureManager
 #             "slide_alignment": alignment
 #         }
 
+@Tracer.trace_methods
 class SynchronizeManager():
-    def __init__(self, cur_user=None):
+    def __init__(self, cur_user=None, priority="live"):
         self.openai_manager = OpenAIManager(
             model="gpt-4o",
             api_key=settings.OPEN_AI_SECRET_KEY,
-            cur_user=cur_user
+            cur_user=cur_user,
+            priority=priority
         )
         self.google_manager = GoogleAIManager(
             api_key=settings.GOOGLE_API_KEY,
-            cur_user=cur_user
+            cur_user=cur_user,
+            priority=priority
         )
         self.audio_manager = AudioManager()
         self.azure_manager = AzureManager(
@@ -166,7 +175,7 @@ class SynchronizeManager():
         try:
             ET.fromstring(ssml_text)
         except ET.ParseError as e:
-            print("⚠️ SSML ParseError, best-effort fix:", e)
+            logger.warning("SSML ParseError, best-effort fix: %s", e)
             # crude fallback: ensure closing </speak>
             if not ssml_text.endswith("</speak>"):
                 ssml_text += "</speak>"
@@ -174,12 +183,16 @@ class SynchronizeManager():
         return self.normalize_marks(self.fix_ssml(ssml_text))
 
     
-    def full_synchronization_pipeline(self, instructions, cur_message="", stt_language="en-US", tts_encoding=None, max_token=2000, voice_name="en-US-Wavenet-F"):
+    def full_synchronization_pipeline(self, instructions, cur_message="", stt_language="en-US", tts_encoding=None, max_token=2000, voice_name="en-US-Wavenet-F", use_cache=False):
         """
         Complete flow:
         1. OpenAI: instructions → SSML + slides (with <mark> tags)
         2. Google TTS (REST): SSML → audio + timepoints
         3. Map SSML <mark> → slide timings
+        Args:
+            use_cache (bool): Reuse a cached SSML/slides response for identical
+                instructions. Enable it for deterministic prompts (prebuilt
+                lessons, class start); leave it off for live conversation turns.
         Returns:
             dict: {
                 "audio_base64": ...,  # base64 audio
@@ -250,46 +263,74 @@ class SynchronizeManager():
         if cur_message:
             messages.append({"role": "user", "content": cur_message})
 
-        response1 = self.openai_manager.generate_response(
-            max_token=max_token,
-            messages=messages
-        )
-
-        # Robust JSON parsing
-        result1 = {}
-        try:
-            result1 = json.loads(response1)
-        except Exception:
-            if isinstance(response1, dict):
-                result1 = response1
-            else:
-                # If GPT returned plain text, log and fallback to empty dict
-                print("Warning: OpenAI did not return valid JSON, falling back.")
-                result1 = {}
-
-        ssml = result1.get("ssml_speech_for_tts", "")
-        ssml = self.sanitize_ssml(ssml)
-        slide_htmls = result1.get("slide_htmls", [])
-
-        # -------------------------------
-        # Step 2: Google TTS with timepoints
-        # -------------------------------
         if tts_encoding is None:
             tts_encoding = "LINEAR16"   # must be string for REST
         elif not isinstance(tts_encoding, str):
             # Normalize enum-like values into string
             tts_encoding = str(tts_encoding).split(".")[-1]
 
-        
-        tts_result = self.google_manager.advanced_tts(
-            ssml,
-            audio_encoding=tts_encoding,
-            language_code=stt_language,
-            voice_name=voice_name
-        )
+        def synthesize(ssml):
+            with Tracer.span("sync.tts"):
+                return self.google_manager.advanced_tts(
+                    ssml,
+                    audio_encoding=tts_encoding,
+                    language_code=stt_language,
+                    voice_name=voice_name
+                )
+
+        # Stream the response and start Google TTS (step 2) as soon as the SSML field is complete,
+        # while the slides are still being generated.
+        tts_executor = ThreadPoolExecutor(max_workers=1)
+        tts_futures = {}
+
+        def on_field(name, value):
+            if name == "ssml_speech_for_tts" and isinstance(value, str):
+                tts_futures["ssml"] = self.sanitize_ssml(value)
+                tts_futures["result"] = tts_executor.submit(Tracer.bind(synthesize, tts_futures["ssml"]))
+
+        extractor = IncrementalJSONExtractor(on_field=on_field)
+        try:
+            with Tracer.span("sync.generate_ssml_and_slides"):
+                response1 = self.openai_manager.generate_response(
+                    max_token=max_token,
+                    messages=messages,
+                    on_delta=extractor.feed,
+                    use_cache=use_cache
+                )
+
+            # Robust JSON parsing
+            result1 = {}
+            try:
+                result1 = json.loads(response1)
+            except Exception:
+                if isinstance(response1, dict):
+                    result1 = response1
+                elif extractor.fields:
+                    result1 = extractor.fields
+                else:
+                    # If GPT returned plain text, log and fallback to empty dict
+                    logger.warning("OpenAI did not return valid JSON, falling back.")
+                    result1 = {}
+
+            slide_htmls = result1.get("slide_htmls", [])
+
+            # -------------------------------
+            # Step 2: Google TTS with timepoints
+            # -------------------------------
+            if "result" in tts_futures:
+                ssml = tts_futures["ssml"]
+                with Tracer.span("sync.tts_wait"):
+                    tts_result = tts_futures["result"].result()
+            else:
+                ssml = self.sanitize_ssml(result1.get("ssml_speech_for_tts", ""))
+                tts_result = synthesize(ssml)
+        finally:
+            tts_executor.shutdown(wait=False)
         audio_bytes = tts_result["audio_content"]
         timepoints = tts_result.get("timepoints", [])
-        audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
+        Tracer.observe("ai_payload_bytes", len(audio_bytes), stage="sync.tts_audio")
+        with Tracer.span("sync.encode_audio"):
+            audio_base64 = base64.b64encode(audio_bytes).decode("utf-8")
 
         # -------------------------------
         # Step 3: Map timepoints → slides
@@ -3,6 +3,7 @@ from pydoc import text
 from django.conf import settings
 import json
 import os
+import time
 from google.cloud import texttospeech, speech
 
 from ai.utils.open_ai_manager import OpenAIManager
@@ -11,6 +12,8 @@ from ai.utils.ocr_manager import OCRManager
 from ai.utils.audio_manager import AudioManager
 from ai.utils.aws_manager import AwsManager
 from ai.utils.azure_manager import AzureManager
+from ai.utils.chunk_manager import ChunkPipeline, HTMLChunker, count_tokens
+from ai.utils.provider_backends import ProviderBackends
 
 def test_get_response():
     manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
@@ -24,6 +27,18 @@ def test_get_response():
     print(f"Response: {json.dumps(json_response, indent=2)}")
     print(f"Cost: {cost}")
 
+def test_conversation_memory():
+    manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    manager.add_message("system", text="You are a helpful assistant.")
+    start = time.perf_counter()
+    for i in range(12):
+        manager.add_message("user" if i % 2 == 0 else "assistant", text=f"Message {i}: tell me about planet number {i}.")
+    print(f"add_message took {time.perf_counter() - start:.3f}s, window: {len(manager.messages)} messages")
+    print(f"Context available immediately:\n{manager.memory.context()}")
+    manager.memory.wait()
+    print(f"Context after background refresh:\n{manager.memory.context()}")
+    print(f"Response: {manager.generate_response(max_token=200)}")
+
 def test_convert_html_to_text():
     html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
     with open(html_file_path, 'r', encoding='utf-8') as file:
@@ -49,6 +64,104 @@ def test_chunking():
             file.write(simple_text)
     print(f"Successfully Done")
 
+def test_chunking_benchmark():
+    html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
+    with open(html_file_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    for max_chunk_size in [1000, 2500, 5000, 15000]:
+        start = time.perf_counter()
+        chunk_pipeline = ChunkPipeline(max_text_chars=max_chunk_size, backtrack=300)
+        legacy_chunks = chunk_pipeline.process(html_content, "get_chunks", "html_aware")
+        for i in range(len(legacy_chunks) - 1):
+            head, tail = chunk_pipeline.chunker.get_incomplete_end_html_aware(legacy_chunks[i]["html"])
+            if tail:
+                legacy_chunks[i]["html"] = head
+                legacy_chunks[i]["text"] = manager.build_simple_text_from_html(head)
+                legacy_chunks[i + 1]["html"] = tail + legacy_chunks[i + 1]["html"]
+                legacy_chunks[i + 1]["text"] = manager.build_simple_text_from_html(tail + legacy_chunks[i + 1]["text"])
+        legacy_time = time.perf_counter() - start
+        start = time.perf_counter()
+        chunks = manager.build_chunks(text=html_content, max_chunk_size=max_chunk_size)
+        streaming_time = time.perf_counter() - start
+        same_html = [c["html"] for c in legacy_chunks] == [c["html"] for c in chunks]
+        print(f"max_chunk_size={max_chunk_size}: {len(chunks)} chunks, legacy {legacy_time:.3f}s, streaming {streaming_time:.3f}s ({legacy_time / max(streaming_time, 1e-9):.1f}x), same html: {same_html}")
+
+def test_token_budget_chunking():
+    html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
+    with open(html_file_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    chunks = manager.build_chunks(text=html_content, max_chunk_size=1000, chunk_mode="token_budget")
+    for i, chunk in enumerate(chunks):
+        print(f"Chunk {i}: {len(chunk['text'])} chars, {count_tokens(chunk['text'], 'gpt-4o')} tokens")
+    print(f"Successfully Done")
+
+def test_chunk_tokenizer_benchmark():
+    html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
+    with open(html_file_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    chunker = HTMLChunker()
+    html_src = chunker.join_paragraphs(chunker.clean_text(html_content))
+
+    def per_character_chunks(max_text_chars):
+        chunks, html_buf, text_buf, cur_len = [], [], [], 0
+        for kind, token in chunker._iter_html_tokens(html_src):
+            if kind == "tag":
+                tag_text = chunker._tag_text(token)
+                html_buf.append(token)
+                text_buf.append(tag_text)
+                cur_len += len(tag_text)
+                continue
+            for raw_unit, plain_unit in chunker._iter_text_units(token):
+                if cur_len + len(plain_unit) > max_text_chars and cur_len > 0:
+                    chunks.append({"html": "".join(html_buf), "text": "".join(text_buf).strip()})
+                    html_buf, text_buf, cur_len = [], [], 0
+                html_buf.append(raw_unit)
+                text_buf.append(plain_unit)
+                cur_len += len(plain_unit)
+        if html_buf:
+            chunks.append({"html": "".join(html_buf), "text": "".join(text_buf).strip()})
+        return chunks
+
+    for max_text_chars in [1000, 2500, 5000, 15000]:
+        start = time.perf_counter()
+        reference = per_character_chunks(max_text_chars)
+        reference_time = time.perf_counter() - start
+        start = time.perf_counter()
+        chunks = chunker.chunk_html_streaming(html_src, max_text_chars)
+        bulk_time = time.perf_counter() - start
+        print(f"max_text_chars={max_text_chars}: per-character {reference_time:.3f}s, bulk runs {bulk_time:.3f}s ({reference_time / max(bulk_time, 1e-9):.1f}x), identical: {reference == chunks}")
+
+def test_chunk_tree():
+    html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
+    with open(html_file_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    tree = manager.build_chunk_tree(text=html_content, sizes=(15000, 5000, 1000))
+    for size, level in zip(tree["sizes"], tree["levels"]):
+        print(f"Size {size}: {len(level)} chunks")
+    for i, chunk in enumerate(tree["levels"][0]):
+        print(f"Chunk {i} ({len(chunk['text'])} chars) has children {chunk['children']}")
+    print(f"Successfully Done")
+
+def test_parallel_chunking():
+    html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
+    with open(html_file_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    serial = ChunkPipeline(max_text_chars=1000)
+    parallel = ChunkPipeline(max_text_chars=1000, workers=4)
+    parallel.PARALLEL_MIN_CHARS = 0
+    start = time.perf_counter()
+    serial_chunks = [chunk.to_dict() for chunk in serial.iter_chunks(html_content)]
+    print(f"Serial: {len(serial_chunks)} chunks in {time.perf_counter() - start:.3f}s")
+    ChunkPipeline._prepared_cache.clear()
+    start = time.perf_counter()
+    parallel_chunks = [chunk.to_dict() for chunk in parallel.iter_chunks(html_content)]
+    print(f"Parallel: {len(parallel_chunks)} chunks in {time.perf_counter() - start:.3f}s")
+    assert serial_chunks == parallel_chunks
+    print(f"Successfully Done")
+
 def test_ai_tts():
     manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
     # Simulate SSML tags for OpenAI TTS
@@ -206,6 +319,17 @@ def test_summarizer():
     with open(os.path.join("/websocket_tmp/texts/", 'summary.txt'), 'w', encoding='utf-8') as file:
         file.write(summary)
 
+def test_map_reduce_summarizer():
+    html_file_path = os.path.join(settings.MEDIA_ROOT, 'index.html')
+    with open(html_file_path, 'r', encoding='utf-8') as file:
+        html_content = file.read()
+    open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    start = time.perf_counter()
+    summary = open_ai_manager.summarize(text=html_content, max_length=1000, max_chunk_size=15000, strategy="map_reduce", max_concurrency=8)
+    print(f"Map-reduce summary in {time.perf_counter() - start:.1f}s, cost {open_ai_manager.get_cost()}")
+    print(summary)
+    print(f"Successfully Done")
+
 def test_summarizer_for_translation():
     pdf_path = os.path.join("/websocket_tmp/texts/", 'Relativity4.pdf')
     with open(pdf_path, 'rb') as file:
@@ -259,6 +383,27 @@ def test_translation():
     with open(os.path.join("/websocket_tmp/texts/", 'translation.html'), 'w', encoding='utf-8') as file:
         file.write(translate)
 
+def test_resume_translation():
+    html_src = "".join(f"<h2>Section {i}</h2><p>{'Light travels at a constant speed. ' * 30}</p>" for i in range(10))
+    open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    generate_response = open_ai_manager.generate_response
+    calls = []
+    def failing_generate_response(*args, **kwargs):
+        calls.append(1)
+        if len(calls) == 6:
+            raise RuntimeError("Simulated provider error")
+        return generate_response(*args, **kwargs)
+    open_ai_manager.generate_response = failing_generate_response
+    open_ai_manager.chunk_retries = 0
+    job_id = f"resume-translation-{int(time.time())}"
+    try:
+        open_ai_manager.translate(html_src, target_language="fr", max_chunk_size=500, resume_job_id=job_id)
+    except RuntimeError as e:
+        print(f"Interrupted after {len(calls)} calls: {e}")
+    calls.clear()
+    translated = open_ai_manager.translate(html_src, target_language="fr", max_chunk_size=500, resume_job_id=job_id)
+    print(f"Resumed with {len(calls)} calls, {len(translated)} chars")
+
 def test_summarizer_for_manipulation():
     pdf_path = os.path.join("/websocket_tmp/texts/", 'Relativity4.pdf')
     with open(pdf_path, 'rb') as file:
@@ -427,6 +572,53 @@ def test_build_rag_materials_for_text():
     with open("/websocket_tmp/texts/rag.json", "w", encoding="utf-8") as f:
         json.dump(rag_materials, f, ensure_ascii=False, indent=2)
 
+def test_batch_mode():
+    import openai
+    from ai.utils.batch_stub_server import BatchStubServer
+    html_src = "".join(f"<h2>Section {i}</h2><p>{'Light travels at a constant speed. ' * 30}</p>" for i in range(6))
+    with BatchStubServer(responder=lambda url, body: {
+        "choices": [{"index": 0, "message": {"role": "assistant", "content": '{"clarifying_concept_to_teach": "<p>ok</p>", "q_and_a_list": []}'}}],
+        "usage": {"prompt_tokens": 100, "completion_tokens": 20, "total_tokens": 120},
+    } if url == "/v1/chat/completions" else {"data": [{"embedding": [0.1, 0.2]}], "usage": {"prompt_tokens": 10, "total_tokens": 10}}) as server:
+        open_ai_manager = OpenAIManager(model="gpt-4o", api_key="test")
+        open_ai_manager.OPEN_AI_CLIENT = openai.OpenAI(api_key="test", base_url=server.base_url)
+        open_ai_manager.summary_cache = None
+        open_ai_manager.response_cache = None
+        open_ai_manager.enable_batch_mode(poll_interval=0.1)
+        rag_materials = open_ai_manager.build_materials_for_rag(text=html_src)
+        print(f"Embedded {sum(1 for material in rag_materials if material['vector'])}/{len(rag_materials)} chunks in {server.submitted} batch job(s)")
+        teaching_content = open_ai_manager._run_chunk_tasks(
+            open_ai_manager.build_chunks(html_src, max_chunk_size=1000),
+            lambda i, chunk: json.loads(open_ai_manager.generate_response(messages=[{"role": "user", "content": chunk["html"]}])),
+            "Generating teaching content for chunk"
+        )
+        print(f"Teaching content for {len(teaching_content)} chunks, jobs submitted: {server.submitted}, cost: {open_ai_manager.get_cost()}")
+        submitted = server.submitted
+        open_ai_manager.build_materials_for_rag(text=html_src)
+        print(f"Resumed without resubmitting: {server.submitted == submitted}")
+
+def test_dry_run_plan():
+    html_src = "".join(f"<h2>Section {i}</h2><p>{'Light travels at a constant speed. ' * 300}</p>" for i in range(20))
+    open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY)
+    for name, plan in [
+        ("translate", open_ai_manager.translate(html_src, target_language="Persian", dry_run=True)),
+        ("teaching", open_ai_manager.build_teaching_content_for_a_text(html_src, dry_run=True)),
+        ("rag", open_ai_manager.build_materials_for_rag(text=html_src, dry_run=True)),
+    ]:
+        print(f"{name}: {plan['calls']} calls, {plan['input_tokens']} input / {plan['output_tokens']} output tokens, ${plan['cost']:.4f}, sequential depth {plan['sequential_depth']}")
+    print(f"Cost after dry runs: {open_ai_manager.get_cost()}")
+
+def test_fake_providers():
+    html_src = "".join(f"<h2>Section {i}</h2><p>{'Light travels at a constant speed. ' * 50}</p>" for i in range(5))
+    open_ai_manager = ProviderBackends.install(OpenAIManager(model="gpt-4o", api_key="unused"), backend="fake")
+    start = time.perf_counter()
+    teaching = open_ai_manager.build_teaching_content_for_a_text(html_src)
+    print(f"Teaching content on fake OpenAI: {len(teaching)} items in {time.perf_counter() - start:.2f}s, cost {open_ai_manager.get_cost()}")
+    google_ai_manager = ProviderBackends.install(GoogleAIManager(), backend="fake")
+    speech = google_ai_manager.advanced_tts('<speak><s><mark name="slide_1"/> Light is fast.</s><break time="500ms"/><s><mark name="slide_2"/> Sound is slower.</s></speak>')
+    print(f"Fake TTS: {len(speech['audio_content'])} bytes, timepoints {speech['timepoints']}")
+    print(f"Fake STT: {google_ai_manager.stt(speech['audio_content'])[0]['transcript']}")
+
 def test_advanced_stt():
     audio_path = os.path.join("/websocket_tmp/me/", 'chunk_0.wav')
     with open(audio_path, 'rb') as file:
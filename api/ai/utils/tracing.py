@@ -0,0 +1,347 @@
+import os
+import sys
+import json
+import time
+import uuid
+import atexit
+import asyncio
+import logging
+import inspect
+import functools
+import threading
+import contextvars
+from contextlib import contextmanager
+
+from django.conf import settings
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+_current_span = contextvars.ContextVar("current_span", default=None)
+
+class Tracer:
+    """
+    Spans and Prometheus-style histograms for the websocket consumers, the Celery tasks and the AI managers.
+    A span times one stage (a manager method, a consumer handler, a pipeline step), nests under the span that is
+    running in the same context and records its duration in the ai_span_duration_seconds histogram.
+    Histograms (latency, tokens, bytes, queue wait) are aggregated in memory and added to Redis by a background
+    thread every METRICS_FLUSH_INTERVAL seconds, so daphne and Celery processes export through one endpoint
+    (Tracer.export) and the hot path never waits for Redis. Metric errors never break a request.
+    """
+    PREFIX = "metrics"
+    LATENCY_BUCKETS = (0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1, 2.5, 5, 10, 30, 60, 120, 300)
+    TOKEN_BUCKETS = (16, 64, 256, 1024, 2048, 4096, 8192, 16384, 32768, 131072)
+    BYTE_BUCKETS = (256, 1024, 4096, 16384, 65536, 262144, 1048576, 4194304, 16777216, 67108864)
+    METRICS = {
+        "ai_span_duration_seconds": ("Duration of traced stages.", LATENCY_BUCKETS),
+        "ai_queue_wait_seconds": ("Time work waited in a queue (executor or Celery) before it started.", LATENCY_BUCKETS),
+        "ai_tokens": ("Tokens per provider request.", TOKEN_BUCKETS),
+        "ai_payload_bytes": ("Size of audio and messages passing through a stage.", BYTE_BUCKETS),
+    }
+
+    _series = {}
+    _lock = threading.Lock()
+    _flusher_pid = None
+    process = os.path.basename(sys.argv[0]) if sys.argv and sys.argv[0] else "python"
+
+    # ---------------- spans ----------------
+
+    @classmethod
+    @contextmanager
+    def span(cls, name, **labels):
+        """
+        Time a stage.
+
+        Args:
+            name (str): Stage name (e.g., 'TeacherConsumer._respond_to_user', 'sync.tts').
+            **labels: Extra labels of the duration histogram; keep their values low-cardinality.
+
+        Example:
+            with Tracer.span("sync.tts", provider="google"):
+                result = synthesize(ssml)
+        """
+        span = cls.start_span(name, **labels)
+        try:
+            yield span
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            span.end()
+
+    @classmethod
+    def start_span(cls, name, **labels):
+        """
+        Start a span to be ended with span.end() (for stages that start and end in different callbacks).
+        """
+        return _Span(cls, name, labels, _current_span.get())
+
+    @classmethod
+    def traced(cls, name=None, **labels):
+        """
+        Decorator running a sync or async function in a span (default name: the function's qualified name).
+
+        Example:
+            @Tracer.traced("ws.receive")
+            async def receive(self, text_data=None, bytes_data=None): ...
+        """
+        def decorator(func):
+            span_name = name or func.__qualname__
+            if asyncio.iscoroutinefunction(func):
+                @functools.wraps(func)
+                async def async_wrapper(*args, **kwargs):
+                    with cls.span(span_name, **labels):
+                        return await func(*args, **kwargs)
+                return async_wrapper
+
+            @functools.wraps(func)
+            def wrapper(*args, **kwargs):
+                with cls.span(span_name, **labels):
+                    return func(*args, **kwargs)
+            return wrapper
+        return decorator
+
+    @classmethod
+    def trace_methods(cls, target_class):
+        """
+        Class decorator running every public method of a class in a span named '<instance class>.<method>'.
+        Generator functions and properties are left alone. A method that returns a generator (e.g.,
+        generate_response(stream=True)) keeps its span open until the generator is exhausted or closed.
+
+        Example:
+            @Tracer.trace_methods
+            class AudioManager: ...
+        """
+        for attribute, func in list(vars(target_class).items()):
+            if attribute.startswith("_") or not inspect.isfunction(func):
+                continue
+            if inspect.isgeneratorfunction(func) or inspect.isasyncgenfunction(func):
+                continue
+            setattr(target_class, attribute, cls._method_wrapper(func))
+        return target_class
+
+    @classmethod
+    def _method_wrapper(cls, func):
+        if asyncio.iscoroutinefunction(func):
+            @functools.wraps(func)
+            async def async_wrapper(self, *args, **kwargs):
+                with cls.span(f"{type(self).__name__}.{func.__name__}"):
+                    return await func(self, *args, **kwargs)
+            return async_wrapper
+
+        @functools.wraps(func)
+        def wrapper(self, *args, **kwargs):
+            span = cls.start_span(f"{type(self).__name__}.{func.__name__}")
+            try:
+                result = func(self, *args, **kwargs)
+            except BaseException as e:
+                span.fail(e)
+                span.end()
+                raise
+            if inspect.isgenerator(result):
+                # The caller's context moves on; the span ends when the stream does.
+                span.detach()
+                return cls._traced_generator(span, result)
+            span.end()
+            return result
+        return wrapper
+
+    @staticmethod
+    def _traced_generator(span, generator):
+        try:
+            yield from generator
+        except BaseException as e:
+            span.fail(e)
+            raise
+        finally:
+            span.end()
+
+    @staticmethod
+    def bind(func, *args, **kwargs):
+        """
+        Return a callable running func in the current context, so spans started in executor threads nest under the caller.
+
+        Example:
+            executor.submit(Tracer.bind(synthesize, ssml))
+        """
+        context = contextvars.copy_context()
+        return functools.partial(context.run, func, *args, **kwargs)
+
+    @staticmethod
+    def current_trace_id():
+        span = _current_span.get()
+        return span.trace_id if span else None
+
+    # ---------------- histograms ----------------
+
+    @classmethod
+    def observe(cls, metric, value, **labels):
+        """
+        Add one observation to a histogram.
+
+        Args:
+            metric (str): One of Tracer.METRICS.
+            value (float): Observed value (seconds, tokens or bytes).
+            **labels: Labels of the series.
+        """
+        if not getattr(settings, "METRICS_ENABLED", True) or value is None:
+            return
+        cls._ensure_flusher()
+        buckets = cls.METRICS[metric][1]
+        labels = {"process": cls.process, **labels}
+        key = (metric, tuple(sorted((name, str(label)) for name, label in labels.items())))
+        with cls._lock:
+            series = cls._series.get(key)
+            if series is None:
+                series = cls._series[key] = [[0] * (len(buckets) + 1), 0.0]
+            counts = series[0]
+            for i, bound in enumerate(buckets):
+                if value <= bound:
+                    counts[i] += 1
+            counts[-1] += 1
+            series[1] += value
+
+    @classmethod
+    def _ensure_flusher(cls):
+        # One flusher thread per process; Celery prefork children start their own after the fork.
+        if cls._flusher_pid == os.getpid():
+            return
+        with cls._lock:
+            if cls._flusher_pid == os.getpid():
+                return
+            if cls._flusher_pid is not None:
+                # Forked child: the parent flushes the observations it had.
+                cls._series = {}
+            cls._flusher_pid = os.getpid()
+        threading.Thread(target=cls._flush_loop, name="metrics-flusher", daemon=True).start()
+        atexit.register(cls.flush)
+
+    @classmethod
+    def _flush_loop(cls):
+        interval = getattr(settings, "METRICS_FLUSH_INTERVAL", 10)
+        while True:
+            time.sleep(interval)
+            cls.flush()
+
+    @classmethod
+    def flush(cls):
+        """
+        Add the in-memory observations to Redis. Observations are kept for the next flush if Redis is unavailable.
+
+        Returns:
+            int: Number of series written.
+        """
+        with cls._lock:
+            series, cls._series = cls._series, {}
+        if not series:
+            return 0
+        try:
+            pipe = cache.client.get_client(write=True).pipeline()
+            for (metric, labels), (counts, total) in series.items():
+                key = f"{cls.PREFIX}:{metric}"
+                label_text = json.dumps(labels)
+                buckets = cls.METRICS[metric][1]
+                for bound, count in zip(list(buckets) + ["+Inf"], counts):
+                    if count:
+                        pipe.hincrby(key, f"{label_text}|{bound}", count)
+                pipe.hincrbyfloat(key, f"{label_text}|sum", total)
+            pipe.execute()
+            return len(series)
+        except Exception as e:
+            logger.warning("Metrics flush failed: %s", e)
+            with cls._lock:
+                for key, (counts, total) in series.items():
+                    current = cls._series.setdefault(key, [[0] * len(counts), 0.0])
+                    current[0] = [a + b for a, b in zip(current[0], counts)]
+                    current[1] += total
+            return 0
+
+    @classmethod
+    def export(cls):
+        """
+        Render the histograms of all processes in the Prometheus text exposition format.
+
+        Returns:
+            str: Metrics text (content type 'text/plain; version=0.0.4').
+
+        Example:
+            curl -H "Authorization: Bearer $METRICS_TOKEN" https://.../api/metrics/
+        """
+        cls.flush()
+        client = cache.client.get_client(write=True)
+        lines = []
+        for metric, (description, buckets) in cls.METRICS.items():
+            values = {}
+            for field, value in client.hgetall(f"{cls.PREFIX}:{metric}").items():
+                field = field.decode("utf-8") if isinstance(field, bytes) else field
+                label_text, bound = field.rsplit("|", 1)
+                values.setdefault(label_text, {})[bound] = float(value)
+            if not values:
+                continue
+            lines += [f"# HELP {metric} {description}", f"# TYPE {metric} histogram"]
+            for label_text, series in sorted(values.items()):
+                labels = ",".join(f'{name}="{_escape(label)}"' for name, label in json.loads(label_text))
+                for bound in list(buckets) + ["+Inf"]:
+                    lines.append(f'{metric}_bucket{{{labels},le="{bound}"}} {int(series.get(str(bound), 0))}')
+                lines.append(f"{metric}_sum{{{labels}}} {series.get('sum', 0.0)}")
+                lines.append(f"{metric}_count{{{labels}}} {int(series.get('+Inf', 0))}")
+        return "\n".join(lines) + "\n"
+
+    @classmethod
+    def clear(cls):
+        """
+        Reset all histograms.
+        """
+        with cls._lock:
+            cls._series = {}
+        client = cache.client.get_client(write=True)
+        client.delete(*[f"{cls.PREFIX}:{metric}" for metric in cls.METRICS])
+
+class _Span:
+    def __init__(self, tracer, name, labels, parent):
+        self.tracer = tracer
+        self.name = name
+        self.labels = labels
+        self.parent = parent
+        self.trace_id = parent.trace_id if parent else uuid.uuid4().hex[:16]
+        self.status = "ok"
+        self.started_at = time.perf_counter()
+        self._token = _current_span.set(self)
+
+    def fail(self, error):
+        self.status = "error" if isinstance(error, Exception) else "cancelled"
+
+    def detach(self):
+        """
+        Restore the parent span in the current context while this span keeps running (e.g., over a returned stream).
+        """
+        self._reset()
+
+    def _reset(self):
+        if self._token is None:
+            return
+        try:
+            _current_span.reset(self._token)
+        except ValueError:
+            # Ended in another context (e.g., a Celery signal handler); nothing to restore.
+            pass
+        self._token = None
+
+    def end(self):
+        duration = time.perf_counter() - self.started_at
+        self._reset()
+        self.tracer.observe("ai_span_duration_seconds", duration, span=self.name, status=self.status, **self.labels)
+        level = logging.INFO if duration >= getattr(settings, "TRACE_SLOW_SPAN_SECONDS", 5) else logging.DEBUG
+        if logger.isEnabledFor(level):
+            logger.log(level, "span %s took %.3fs", self.name, duration, extra={
+                "span": self.name,
+                "trace_id": self.trace_id,
+                "parent_span": self.parent.name if self.parent else None,
+                "duration_ms": round(duration * 1000, 1),
+                "status": self.status,
+                **self.labels,
+            })
+        return duration
+
+def _escape(value):
+    return str(value).replace("\\", "\\\\").replace('"', '\\"').replace("\n", "\\n")
@@ -0,0 +1,68 @@
+import logging
+from django.core.cache import cache
+
+logger = logging.getLogger(__name__)
+
+class UsageMetrics:
+    """
+    Process-wide token usage counters per provider and model, stored in Redis hashes.
+    Tracks requests, prompt tokens, prompt tokens served from the provider's prompt cache and completion tokens,
+    so the prompt cache hit rate can be checked across all workers. Counter errors never break a request.
+    """
+    PREFIX = "llm_usage"
+    FIELDS = ("requests", "prompt_tokens", "cached_tokens", "completion_tokens")
+
+    @property
+    def client(self):
+        return cache.client.get_client(write=True)
+
+    def record(self, provider, model, prompt_tokens, completion_tokens, cached_tokens=0):
+        """
+        Add the usage of one request.
+
+        Args:
+            provider (str): Provider name (e.g., 'open_ai', 'google').
+            model (str): Model name.
+            prompt_tokens (int): Input tokens, including cached ones.
+            completion_tokens (int): Output tokens.
+            cached_tokens (int): Input tokens read from the provider's prompt cache.
+        """
+        key = f"{self.PREFIX}:{provider}:{model}"
+        try:
+            pipe = self.client.pipeline()
+            pipe.hincrby(key, "requests", 1)
+            pipe.hincrby(key, "prompt_tokens", int(prompt_tokens or 0))
+            pipe.hincrby(key, "cached_tokens", int(cached_tokens or 0))
+            pipe.hincrby(key, "completion_tokens", int(completion_tokens or 0))
+            pipe.execute()
+        except Exception as e:
+            logger.warning("Usage metrics unavailable: %s", e)
+
+    def stats(self):
+        """
+        Get the counters of every provider and model.
+
+        Returns:
+            dict: "provider:model" -> {"requests", "prompt_tokens", "cached_tokens", "completion_tokens", "cache_hit_rate"}
+
+        Example:
+            print(UsageMetrics().stats())
+        """
+        client = self.client
+        stats = {}
+        for key in client.scan_iter(f"{self.PREFIX}:*"):
+            key = key.decode("utf-8") if isinstance(key, bytes) else key
+            values = {(field.decode("utf-8") if isinstance(field, bytes) else field): int(value) for field, value in client.hgetall(key).items()}
+            entry = {field: values.get(field, 0) for field in self.FIELDS}
+            entry["cache_hit_rate"] = entry["cached_tokens"] / entry["prompt_tokens"] if entry["prompt_tokens"] else 0.0
+            stats[key[len(self.PREFIX) + 1:]] = entry
+        return stats
+
+    def clear(self):
+        """
+        Reset all counters.
+        """
+        client = self.client
+        keys = list(client.scan_iter(f"{self.PREFIX}:*"))
+        if keys:
+            client.delete(*keys)
@@ -2,7 +2,7 @@ from django.contrib import admin
 
 class BookForUserAdmin(admin.ModelAdmin):
     list_display = ('id', 'user', 'title', 'summary')
-    search_fields = ('title', 'summary', 'user__email')
+    search_fields = ('title', 'summary', 'user__email', 'learn_job_id')
     list_filter = ('user',)
     list_per_page = 10
 
@@ -16,4 +16,10 @@ class BookTeachingContentAdmin(admin.ModelAdmin):
     list_display = ('id', 'book_for_user', 'chunk_index', 'user_has_learned')
     search_fields = ('content', 'book_for_user__title')
     list_filter = ('book_for_user', 'user_has_learned')
-    list_per_page = 10
\ No newline at end of file
+    list_per_page = 10
+
+class BookAnswerCacheAdmin(admin.ModelAdmin):
+    list_display = ('id', 'book_hash', 'book_for_user', 'question', 'hit_count', 'generation_latency_sec')
+    search_fields = ('question', 'book_hash', 'book_for_user__title')
+    list_filter = ('book_for_user',)
+    list_per_page = 10
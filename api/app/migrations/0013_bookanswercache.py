@@ -0,0 +1,44 @@
+# Generated by Django 5.1.6 on 2026-10-17 10:00
+
+import django.db.models.deletion
+import pgvector.django.vector
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0012_classroomcontent_audio_length_sec_and_more'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookforuser',
+            name='content_hash',
+            field=models.CharField(blank=True, db_index=True, default='', max_length=64),
+        ),
+        migrations.CreateModel(
+            name='BookAnswerCache',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('book_hash', models.CharField(db_index=True, default='', max_length=64)),
+                ('concept_hash', models.CharField(db_index=True, max_length=64)),
+                ('question', models.TextField()),
+                ('question_embedding', pgvector.django.vector.VectorField(dimensions=3072)),
+                ('ssml', models.TextField()),
+                ('slide_alignment', models.JSONField(default=list)),
+                ('timepoints', models.JSONField(default=list)),
+                ('audio_file', models.CharField(blank=True, max_length=255, null=True)),
+                ('audio_length_sec', models.FloatField(default=0.0)),
+                ('generation_latency_sec', models.FloatField(default=0.0)),
+                ('hit_count', models.PositiveIntegerField(default=0)),
+                ('book_for_user', models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.SET_NULL, related_name='answer_cache', to='app.bookforuser')),
+            ],
+            options={
+                'verbose_name_plural': 'Book Answer Cache',
+                'ordering': ('id',),
+            },
+        ),
+    ]
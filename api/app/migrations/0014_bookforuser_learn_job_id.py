@@ -0,0 +1,18 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:00
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('app', '0013_bookanswercache'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='bookforuser',
+            name='learn_job_id',
+            field=models.CharField(blank=True, default='', max_length=32),
+        ),
+    ]
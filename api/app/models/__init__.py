@@ -4,6 +4,7 @@ BookForUserModel = book_data.BookForUser
 BookChunkModel = book_data.BookChunk
 BookTeachingContentModel = book_data.BookTeachingContent
 BookChatMessageModel = book_data.BookChatMessage
+BookAnswerCacheModel = book_data.BookAnswerCache
 
 ClassRoomModel = ai_teacher.ClassRoom
 ClassRoomMemberModel = ai_teacher.ClassRoomMember
@@ -9,6 +9,8 @@ class BookForUser(TimeStampedModel):
     user = models.ForeignKey(settings.AUTH_USER_MODEL, on_delete=models.CASCADE, related_name='books')
     title = models.CharField(max_length=255)
     summary = models.TextField(max_length=2048)
+    content_hash = models.CharField(max_length=64, blank=True, default="", db_index=True)
+    learn_job_id = models.CharField(max_length=32, blank=True, default="")
 
     def __str__(self):
         return self.title
@@ -64,4 +66,25 @@ class BookChatMessage(TimeStampedModel):
 
     class Meta:
         verbose_name_plural = "Book Chat Messages"
-        ordering = ('id',)
\ No newline at end of file
+        ordering = ('id',)
+
+class BookAnswerCache(TimeStampedModel):
+    book_hash = models.CharField(max_length=64, db_index=True, default="")
+    book_for_user = models.ForeignKey(BookForUser, on_delete=models.SET_NULL, null=True, blank=True, related_name='answer_cache')
+    concept_hash = models.CharField(max_length=64, db_index=True)
+    question = models.TextField()
+    question_embedding = VectorField(dimensions=3072)
+    ssml = models.TextField()
+    slide_alignment = models.JSONField(default=list)
+    timepoints = models.JSONField(default=list)
+    audio_file = models.CharField(max_length=255, null=True, blank=True)
+    audio_length_sec = models.FloatField(default=0.0)
+    generation_latency_sec = models.FloatField(default=0.0)
+    hit_count = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"BookAnswerCache {self.id}"
+
+    class Meta:
+        verbose_name_plural = "Book Answer Cache"
+        ordering = ('id',)
@@ -0,0 +1 @@
+from app.signals.book_data import delete_book_answer_audio
\ No newline at end of file
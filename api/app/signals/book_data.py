@@ -0,0 +1,10 @@
+from django.db.models.signals import post_delete
+from django.dispatch import receiver
+
+from config.utils.storage_manager import CloudStorageManager
+from app.models import BookAnswerCacheModel
+
+@receiver(post_delete, sender=BookAnswerCacheModel)
+def delete_book_answer_audio(sender, instance, **kwargs):
+    if instance.audio_file:
+        CloudStorageManager().delete_file(bucket="AI", file_key=instance.audio_file)
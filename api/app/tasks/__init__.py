@@ -1,9 +1,17 @@
+import uuid
+
 from celery import shared_task
 
-from core.models import ProfileModel
+from app.tasks.teaching_book import learn_book
 
-@shared_task
-def apply_cost_task(user_id, cost):
-    profile = ProfileModel.objects.filter(user_id=user_id).first()
-    profile.credit = profile.credit - cost
-    profile.save()
\ No newline at end of file
+@shared_task(bind=True, max_retries=3)
+def learn_book_task(self, user_id, pdf_file_key, book_title, target_language="en", start_page=None, end_page=None, use_batch=False, resume_job_id=None):
+    # The job id is fixed before the first run, so a retry resumes from the stages and chunks that completed.
+    args = (user_id, pdf_file_key, book_title, target_language, start_page, end_page, use_batch, resume_job_id or uuid.uuid4().hex)
+    try:
+        pending = learn_book(*args)
+    except Exception as e:
+        raise self.retry(exc=e, args=args, countdown=60)
+    if pending:
+        # A batch job is still running: check again later instead of holding the worker.
+        learn_book_task.apply_async(args=args, countdown=pending["countdown"])
\ No newline at end of file
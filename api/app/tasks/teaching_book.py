@@ -1,8 +1,14 @@
+import base64
+
 from django.conf import settings
 
 from core.models import UserModel
+from config.utils.storage_manager import CloudStorageManager
 from ai.utils.open_ai_manager import OpenAIManager
+from ai.utils.batch_manager import BatchJobPending
+from ai.utils.job_checkpoint import JobCheckpoint
 from app.models import BookChatMessageModel, BookForUserModel
+from app.utils.book_data_manager import BookDataManager
 
 def add_message_to_chat_history(user_id, book_for_user_id, message, sender):
     user = UserModel.objects.filter(id=user_id).first()
@@ -11,7 +17,7 @@ def add_message_to_chat_history(user_id, book_for_user_id, message, sender):
     book_for_user = BookForUserModel.objects.filter(id=book_for_user_id, user=user).first()
     if not book_for_user:
         return
-    open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY, cur_user=user)
+    open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY, cur_user=user, priority="ingestion")
     materials = open_ai_manager.build_materials_for_rag(message)
     for material in materials:
         BookChatMessageModel.objects.create(
@@ -20,4 +26,31 @@ def add_message_to_chat_history(user_id, book_for_user_id, message, sender):
             message_embedding=material["vector"],
             sender=sender
         )
-    
\ No newline at end of file
+    
+
+def learn_book(user_id, pdf_file_key, book_title, target_language="en", start_page=None, end_page=None, use_batch=False, resume_job_id=None):
+    """
+    Learn a book uploaded to the AI bucket. In batch mode the batch jobs are not waited for: while one runs,
+    the job id and the seconds to wait are returned so the caller can re-schedule the same job.
+    resume_job_id may be a new id: the checkpoints are then created under it, so a failed run can be retried with
+    the same id (it is also stored on the book as learn_job_id).
+
+    Returns:
+        dict or None: {"job_id": str, "countdown": float} if the job must run again later, else None.
+    """
+    user = UserModel.objects.filter(id=user_id).first()
+    if not user:
+        return None
+    pdf_bytes = b""
+    # The PDF is only read by the OCR stage; a resumed job that is past it does not download it again.
+    if resume_job_id is None or JobCheckpoint(resume_job_id, namespace="learn_book").get("ocr") is None:
+        pdf_base64 = CloudStorageManager().download_base64(bucket="AI", file_key=pdf_file_key)
+        if not pdf_base64:
+            raise ValueError(f"Book file not found: {pdf_file_key}")
+        pdf_bytes = base64.b64decode(pdf_base64)
+    book_data_manager = BookDataManager(pdf_bytes, user, book_title, target_language=target_language, start_page=start_page, end_page=end_page, use_batch=use_batch, batch_block=False)
+    try:
+        book_data_manager.learn_book(resume_job_id=resume_job_id)
+    except BatchJobPending as e:
+        return {"job_id": book_data_manager.job_id, "countdown": e.retry_after}
+    return None
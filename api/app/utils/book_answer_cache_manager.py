@@ -0,0 +1,160 @@
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import F
+from pgvector.django import CosineDistance
+import hashlib
+import uuid
+
+from config.utils.storage_manager import CloudStorageManager
+from app.models import BookForUserModel, BookAnswerCacheModel
+
+class BookAnswerCacheManager:
+    """
+    Semantic cache of teacher answers, shared by every learner of the same book.
+    An answer (SSML, slides, audio) is reused for a new question on the same concept when the cosine similarity
+    of the question embeddings is at least min_similarity. Entries are keyed by the book's content hash
+    (BookForUser.content_hash, set at the end of ingestion), so uploads of the same book share them; they are
+    deleted once no book has that content any more.
+    Hit rate and total latency saved are counted in Redis.
+    """
+    HITS_KEY = "book_answer_cache:hits"
+    MISSES_KEY = "book_answer_cache:misses"
+    LATENCY_SAVED_KEY = "book_answer_cache:latency_saved_sec"
+
+    def __init__(self, book_for_user, min_similarity=None):
+        self.book_for_user = book_for_user
+        self.book_hash = book_for_user.content_hash
+        self.min_similarity = min_similarity if min_similarity is not None else settings.BOOK_ANSWER_CACHE_MIN_SIMILARITY
+
+    @property
+    def enabled(self):
+        """
+        False for books ingested before content hashes existed; they are not cached until re-ingested.
+        """
+        return bool(self.book_hash)
+
+    @staticmethod
+    def content_hash(html_src):
+        """
+        Return the content hash of a book from its OCR output.
+        """
+        return hashlib.sha256(html_src.encode("utf-8")).hexdigest()
+
+    def _concept_hash(self, concept):
+        return hashlib.sha256((concept or "").encode("utf-8")).hexdigest()
+
+    @classmethod
+    def update_book_hash(cls, book_for_user, content_hash):
+        """
+        Set the content hash of a book at the end of its ingestion. If the content changed, the answers
+        of the previous content are deleted once in one query, unless another book still has that content.
+
+        Args:
+            book_for_user (BookForUserModel): The ingested book.
+            content_hash (str): Hash from content_hash().
+
+        Returns:
+            int: Number of deleted cache entries.
+        """
+        previous_hash = book_for_user.content_hash
+        if previous_hash == content_hash:
+            return 0
+        book_for_user.content_hash = content_hash
+        book_for_user.save(update_fields=["content_hash", "updated_at"])
+        if not previous_hash or BookForUserModel.objects.filter(content_hash=previous_hash).exists():
+            return 0
+        deleted, _ = BookAnswerCacheModel.objects.filter(book_hash=previous_hash).delete()
+        return deleted
+
+    def lookup(self, question_embedding, concept):
+        """
+        Find a cached answer for a question.
+
+        Args:
+            question_embedding (list): Embedding of the student's question.
+            concept (str): The concept currently being taught.
+
+        Returns:
+            dict or None: The cached synchronization result (audio_base64, slide_alignment, ssml, audio_length_sec, timepoints), or None on a miss.
+        """
+        if not self.enabled:
+            return None
+        entry = (
+            BookAnswerCacheModel.objects.filter(book_hash=self.book_hash, concept_hash=self._concept_hash(concept))
+            .annotate(distance=CosineDistance("question_embedding", question_embedding))
+            .filter(distance__lte=1 - self.min_similarity)
+            .order_by("distance")
+            .first()
+        )
+        audio_base64 = CloudStorageManager().download_base64(bucket="AI", file_key=entry.audio_file) if entry and entry.audio_file else None
+        client = cache.client.get_client(write=True)
+        if not audio_base64:
+            client.incr(self.MISSES_KEY)
+            return None
+        BookAnswerCacheModel.objects.filter(id=entry.id).update(hit_count=F("hit_count") + 1)
+        client.incr(self.HITS_KEY)
+        client.incrbyfloat(self.LATENCY_SAVED_KEY, entry.generation_latency_sec)
+        return {
+            "audio_base64": audio_base64,
+            "slide_alignment": entry.slide_alignment,
+            "ssml": entry.ssml,
+            "audio_length_sec": entry.audio_length_sec,
+            "timepoints": entry.timepoints,
+        }
+
+    def store(self, question, question_embedding, concept, result, generation_latency_sec):
+        """
+        Cache the answer generated for a question.
+
+        Args:
+            question (str): The student's question.
+            question_embedding (list): Embedding of the question.
+            concept (str): The concept currently being taught.
+            result (dict): Result of SynchronizeManager.full_synchronization_pipeline.
+            generation_latency_sec (float): Time it took to generate the answer; added to the latency saved on each hit.
+
+        Returns:
+            BookAnswerCacheModel or None: The cache entry, or None if the cache is not enabled for the book.
+        """
+        if not self.enabled:
+            return None
+        audio_file_key = CloudStorageManager().upload_base64(result.get("audio_base64", ""), bucket="AI", file_key=f"answer_cache/{self.book_hash}/{uuid.uuid4()}.wav")
+        return BookAnswerCacheModel.objects.create(
+            book_hash=self.book_hash,
+            book_for_user=self.book_for_user,
+            concept_hash=self._concept_hash(concept),
+            question=question,
+            question_embedding=question_embedding,
+            ssml=result.get("ssml", ""),
+            slide_alignment=result.get("slide_alignment", []),
+            timepoints=result.get("timepoints", []),
+            audio_file=audio_file_key,
+            audio_length_sec=result.get("audio_length_sec", 0),
+            generation_latency_sec=generation_latency_sec,
+        )
+
+    def invalidate(self):
+        """
+        Delete all cached answers of the book's content (shared with other learners of the same book).
+        """
+        if self.enabled:
+            BookAnswerCacheModel.objects.filter(book_hash=self.book_hash).delete()
+
+    @classmethod
+    def stats(cls):
+        """
+        Get the cache hit rate and the total latency saved.
+
+        Returns:
+            dict: {"hits": int, "misses": int, "hit_rate": float, "latency_saved_sec": float}
+        """
+        client = cache.client.get_client(write=True)
+        hits = int(client.get(cls.HITS_KEY) or 0)
+        misses = int(client.get(cls.MISSES_KEY) or 0)
+        latency_saved = client.get(cls.LATENCY_SAVED_KEY)
+        return {
+            "hits": hits,
+            "misses": misses,
+            "hit_rate": hits / (hits + misses) if hits + misses else 0.0,
+            "latency_saved_sec": float(latency_saved or 0),
+        }
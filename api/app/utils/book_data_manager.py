@@ -1,13 +1,22 @@
+import base64
+import json
+import logging
+
 from django.conf import settings
 
+from config.utils.storage_manager import CloudStorageManager
 from core.models import ProfileModel, UserModel
 from ai.utils.ocr_manager import OCRManager
 from ai.utils.open_ai_manager import OpenAIManager
+from ai.utils.job_checkpoint import JobCheckpoint
+from ai.utils.cost_planner import CostPlanner
+from app.utils.book_answer_cache_manager import BookAnswerCacheManager
 from app.models import BookForUserModel, BookChunkModel, BookTeachingContentModel
 
+logger = logging.getLogger(__name__)
 
 class BookDataManager:
-    def __init__(self, pdf_bytes, user_to_learn, book_title, target_language="en", start_page=None, end_page=None):
+    def __init__(self, pdf_bytes, user_to_learn, book_title, target_language="en", start_page=None, end_page=None, use_batch=False, batch_block=True):
         self.pdf_bytes = pdf_bytes
         self.user_to_learn = user_to_learn
         self.book_title = book_title
@@ -16,63 +25,148 @@ class BookDataManager:
             google_cloud_project_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROJECT_ID,
             google_cloud_location=settings.GOOGLE_CLOUD_DOCUMENT_AI_LOCATION,
             google_cloud_processor_id=settings.GOOGLE_CLOUD_DOCUMENT_AI_PROCESSOR_ID,
-            cur_user=self.self.user_to_learn
+            cur_user=self.user_to_learn
         )
-        self.open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY, cur_user=self.user_to_learn)
+        self.open_ai_manager = OpenAIManager(model="gpt-4o", api_key=settings.OPEN_AI_SECRET_KEY, cur_user=self.user_to_learn, priority="ingestion")
+        if use_batch:
+            self.open_ai_manager.enable_batch_mode(block=batch_block)
+        self.job_id = None
         self.start_page = start_page
         self.end_page = end_page
 
     def _ocr_progress_callback(self, page, total):
         percent = int((page / total) * 100)
-        print(f"Processing page {page}/{total} ({percent}%)")
+        logger.info("Processing page %s/%s (%s%%)", page, total, percent)
 
     def _rag_progress_callback(self, chunk=None, index=None, total=None, err_msg=None):
         if err_msg:
-            print(f"[ERROR] Chunk {index}/{total}: {err_msg}")
+            logger.error("Chunk %s/%s: %s", index, total, err_msg)
         elif chunk is not None:
             percent = int((index / total) * 100)
-            print(f"Processing chunk {index}/{total} ({percent}%)")
+            logger.info("Processing chunk %s/%s (%s%%)", index, total, percent)
     
     def _summarize_progress_callback(self, chunk, index, total):
         percent = int((index / total) * 100)
-        print(f"Summarizing chunk {index}/{total} ({percent}%)")
+        logger.info("Summarizing chunk %s/%s (%s%%)", index, total, percent)
     
     def _teaching_progress_callback(self, chunk, index, total):
             percent = int((index / total) * 100)
-            print(f"Teaching content chunk {index}/{total} ({percent}%)")
+            logger.info("Teaching content chunk %s/%s (%s%%)", index, total, percent)
 
-    
-    def learn_book(self):
+    def _save_ocr_output(self, html_src, text):
+        """
+        Upload the OCR output of the job to the AI bucket, so the checkpoint only keeps its file key.
+
+        Returns:
+            str: File key of the upload, or None if it failed.
+        """
+        data = json.dumps({"html_src": html_src, "text": text}).encode("utf-8")
+        return CloudStorageManager().upload_base64(data, bucket="AI", file_key=f"learn_book/{self.job_id}/ocr.json")
+
+    def _load_ocr_output(self, file_key):
+        """
+        Download an OCR output saved by _save_ocr_output.
+
+        Returns:
+            tuple or None: (html_src, text), or None if it could not be read.
+        """
+        data = CloudStorageManager().download_base64(bucket="AI", file_key=file_key)
+        if not data:
+            return None
+        ocr = json.loads(base64.b64decode(data))
+        return ocr["html_src"], ocr["text"]
+
+    def plan_learn_book(self):
+        """
+        Estimate the calls, tokens, cost and sequential depth of learn_book without calling any provider.
+        The PDF's embedded text layer stands in for the OCR output, so scanned books without one are underestimated.
+
+        Returns:
+            dict: CostPlanner plan with an "ocr" stage (pages and Document AI cost) followed by summary, RAG and teaching.
+        """
+        ocr_plan = self.ocr_manager.plan_pdf(self.pdf_bytes, start_page=self.start_page, end_page=self.end_page)
+        html_src = ocr_plan["html_src"]
+        planner = CostPlanner(self.open_ai_manager)
+        teaching = self.open_ai_manager.build_teaching_content_for_a_text(text=html_src, target_language=self.target_language, max_chunk_size=5000, max_teaching_tokens=5000, dry_run=True)
+        stages = [
+            {"stage": "ocr", "calls": ocr_plan["pages"], "input_tokens": 0, "output_tokens": 0, "cost": ocr_plan["cost"], "sequential_depth": ocr_plan["pages"], "cached": False},
+            planner.plan_summary("summary", html_src, 2000, 15000, strategy="map_reduce", max_concurrency=4),
+            planner.plan_embeddings(html_src),
+        ] + teaching["stages"]
+        return planner.plan("learn_book", stages)
+
+    def learn_book(self, resume_job_id=None, dry_run=False):
+        """
+        OCR the book, summarize it, build the RAG chunks and the teaching content.
+        Every stage is checkpointed under self.job_id, which is also stored on the book (learn_job_id); if the process
+        dies, calling learn_book again with resume_job_id=<job_id> resumes from the last completed stage (OCR, summary,
+        RAG, teaching) and, inside the teaching stage, from the last completed chunk. The OCR output itself is kept in
+        storage; its checkpoint only holds the file key.
+
+        Args:
+            resume_job_id (str): Id of an interrupted run to resume. Default is None (new run).
+            dry_run (bool): Return the estimate of plan_learn_book() instead of learning the book. Default is False.
+
+        Returns:
+            BookForUserModel: The learned book.
+        """
+        if dry_run:
+            return self.plan_learn_book()
+        checkpoint = JobCheckpoint(resume_job_id, namespace="learn_book")
+        self.job_id = checkpoint.job_id
+        logger.info("Learning book '%s' (job %s)", self.book_title, self.job_id)
         self.ocr_manager.clear_cost()
         self.open_ai_manager.clear_cost()
-        html_src, text = self.ocr_manager.read_pdf_bytes(self.pdf_bytes, progress_callback=self._ocr_progress_callback, start_page=self.start_page, end_page=self.end_page)
-        summary = self.open_ai_manager.summarize(text=text, max_length=2000, max_chunk_size=15000, progress_callback=self._summarize_progress_callback)
-        cur_book_for_user = BookForUserModel()
-        cur_book_for_user.user = self.user_to_learn
-        cur_book_for_user.title = self.book_title
-        cur_book_for_user.summary = summary
-        cur_book_for_user.save()
-        materials = self.open_ai_manager.build_materials_for_rag(text=html_src, progress_callback=self._rag_progress_callback)
-        for material in materials:
-            BookChunkModel.objects.create(
-                book_for_user=cur_book_for_user,
-                chunk_index=material['chunk_number'],
-                chunk_text=material['text'],
-                chunk_html=material['html'],
-                embedding=material['vector']
-            )
-
-        all_teaching_content = self.open_ai_manager.build_teaching_content_for_a_text(
-            text=html_src,
-            target_language=self.target_language,
-            max_chunk_size=5000,
-            max_teaching_tokens=5000,
-            progress_callback=self._teaching_progress_callback)
-        for idx, chunk_content in enumerate(all_teaching_content):
-            BookTeachingContentModel.objects.create(
-                book_for_user=cur_book_for_user,
-                chunk_index=idx,
-                content=chunk_content.get("clarifying_concept_to_teach", ""),
-                q_and_a=chunk_content.get("q_and_a_list", []),
-                user_has_learned=False
-            )
\ No newline at end of file
+        ocr_file_key = checkpoint.get("ocr")
+        ocr = self._load_ocr_output(ocr_file_key) if ocr_file_key else None
+        if ocr is None:
+            ocr = self.ocr_manager.read_pdf_bytes(self.pdf_bytes, progress_callback=self._ocr_progress_callback, start_page=self.start_page, end_page=self.end_page)
+            ocr_file_key = self._save_ocr_output(*ocr)
+            if ocr_file_key:
+                checkpoint.set("ocr", ocr_file_key)
+        html_src, text = ocr
+        summary = checkpoint.stage("summary", lambda: self.open_ai_manager.summarize(text=text, max_length=2000, max_chunk_size=15000, progress_callback=self._summarize_progress_callback, strategy="map_reduce"))
+        book_for_user_id = checkpoint.get("book_for_user_id")
+        cur_book_for_user = BookForUserModel.objects.filter(id=book_for_user_id).first() if book_for_user_id else None
+        if cur_book_for_user is None:
+            cur_book_for_user = BookForUserModel()
+            cur_book_for_user.user = self.user_to_learn
+            cur_book_for_user.title = self.book_title
+            cur_book_for_user.summary = summary
+            cur_book_for_user.learn_job_id = self.job_id
+            cur_book_for_user.save()
+            checkpoint.set("book_for_user_id", cur_book_for_user.id)
+
+        if not checkpoint.get("rag"):
+            BookChunkModel.objects.filter(book_for_user=cur_book_for_user).delete()
+            materials = self.open_ai_manager.build_materials_for_rag(text=html_src, progress_callback=self._rag_progress_callback)
+            for material in materials:
+                BookChunkModel.objects.create(
+                    book_for_user=cur_book_for_user,
+                    chunk_index=material['chunk_number'],
+                    chunk_text=material['text'],
+                    chunk_html=material['html'],
+                    embedding=material['vector']
+                )
+            checkpoint.set("rag", True)
+
+        if not checkpoint.get("teaching"):
+            all_teaching_content = self.open_ai_manager.build_teaching_content_for_a_text(
+                text=html_src,
+                target_language=self.target_language,
+                max_chunk_size=5000,
+                max_teaching_tokens=5000,
+                progress_callback=self._teaching_progress_callback,
+                resume_job_id=self.job_id)
+            BookTeachingContentModel.objects.filter(book_for_user=cur_book_for_user).delete()
+            for idx, chunk_content in enumerate(all_teaching_content):
+                BookTeachingContentModel.objects.create(
+                    book_for_user=cur_book_for_user,
+                    chunk_index=idx,
+                    content=chunk_content.get("clarifying_concept_to_teach", ""),
+                    q_and_a=chunk_content.get("q_and_a_list", []),
+                    user_has_learned=False
+                )
+            checkpoint.set("teaching", True)
+        BookAnswerCacheManager.update_book_hash(cur_book_for_user, BookAnswerCacheManager.content_hash(html_src))
+        return cur_book_for_user
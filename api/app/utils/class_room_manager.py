@@ -1,8 +1,11 @@
+import logging
 from config.utils.storage_manager import CloudStorageManager
 from core.models import UserModel
 from ai.utils.synchronize_manager import SynchronizeManager
 from app.models import ClassRoomModel, ClassRoomMemberModel, ClassRoomContentModel
 
+logger = logging.getLogger(__name__)
+
 class ClassRoomManager:
     def __init__(self, instructions="", teaching_tasks=[]):
         self.class_room = None
@@ -59,7 +62,7 @@ class ClassRoomManager:
             raise ValueError("No class room exists.")
         created_contents = []
         for idx, task in enumerate(self.teaching_tasks):
-            print(f"Building content for task {idx+1}: {task.get('title', 'No Title')}")
+            logger.info("Building content for task %s: %s", idx+1, task.get('title', 'No Title'))
             content = ClassRoomContentModel()
             content.class_room = self.class_room
             content.title = task.get("title", f"Content {idx+1}")
@@ -71,8 +74,8 @@ class ClassRoomManager:
                 f"Prompt: {prompt}\n"
                 f"Ensure the content is clear, engaging, and suitable for beginners.\n"
             )
-            sync_manager = SynchronizeManager()
-            result = sync_manager.full_synchronization_pipeline(instructions)
+            sync_manager = SynchronizeManager(priority="prebuild")
+            result = sync_manager.full_synchronization_pipeline(instructions, use_cache=True)
             audio_base64 = result.get("audio_base64", "")
             storage = CloudStorageManager()
             audio_file_key = storage.upload_base64(audio_base64, bucket="AI", file_key=f"teachers/{self.class_room.uuid}/{idx + 1}.wav", acl="public-read")
@@ -1,8 +1,35 @@
 import os
+import time
 from celery import Celery
+from celery.signals import before_task_publish, task_prerun, task_postrun
 
 os.environ.setdefault('DJANGO_SETTINGS_MODULE', 'config.settings')
 
 celery = Celery('config')
 celery.config_from_object('django.conf:settings', namespace='CELERY')
-celery.autodiscover_tasks()
\ No newline at end of file
+celery.autodiscover_tasks()
+
+# Spans of the running tasks, by task id; started in task_prerun and ended in task_postrun.
+_task_spans = {}
+
+@before_task_publish.connect
+def _stamp_published_at(headers=None, **kwargs):
+    if headers is not None:
+        headers.setdefault('published_at', time.time())
+
+@task_prerun.connect
+def _start_task_span(task_id=None, task=None, **kwargs):
+    from ai.utils.tracing import Tracer
+
+    published_at = getattr(task.request, 'published_at', None) or (task.request.headers or {}).get('published_at')
+    if published_at:
+        Tracer.observe("ai_queue_wait_seconds", max(0.0, time.time() - float(published_at)), queue="celery", task=task.name)
+    _task_spans[task_id] = Tracer.start_span(f"celery.{task.name}")
+
+@task_postrun.connect
+def _end_task_span(task_id=None, state=None, **kwargs):
+    span = _task_spans.pop(task_id, None)
+    if span is not None:
+        if state != 'SUCCESS':
+            span.status = "error"
+        span.end()
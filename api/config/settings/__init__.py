@@ -17,6 +17,7 @@ from config.settings.cache import *
 from config.settings.email import *
 from config.settings.rest_framework import *
 from config.settings.channels import *
+from config.settings.logging import *
 
 if not WITH_DOCKER:
     MIDDLEWARE.append('corsheaders.middleware.CorsMiddleware')
@@ -9,4 +9,14 @@ CELERY_BROKER_URL = f"redis://:{REDIS_USER_PASS}@redis:6379/1"
 
 CELERY_TIMEZONE = os.environ.get('API_TIME_ZONE', 'America/Toronto')
 
-CELERY_BEAT_SCHEDULE = {}
\ No newline at end of file
+# Keep the LOGGING configuration in workers instead of Celery's own root handler.
+CELERY_WORKER_HIJACK_ROOT_LOGGER = False
+
+CREDIT_LEDGER_FLUSH_INTERVAL = int(os.environ.get('CREDIT_LEDGER_FLUSH_INTERVAL', 30))
+
+CELERY_BEAT_SCHEDULE = {
+    'flush-credit-ledger': {
+        'task': 'ai.tasks.flush_credit_ledger_task',
+        'schedule': CREDIT_LEDGER_FLUSH_INTERVAL,
+    },
+}
\ No newline at end of file
@@ -79,4 +79,32 @@ AWS_DEFAULT_REGION=os.environ.get("AWS_DEFAULT_REGION", "AWS_DEFAULT_REGION")
 AZURE_COGNITIVE_SERVICES_KEY_1=os.environ.get("AZURE_COGNITIVE_SERVICES_KEY_1", "AZURE_COGNITIVE_SERVICES_KEY_1")
 AZURE_COGNITIVE_SERVICES_KEY_2=os.environ.get("AZURE_COGNITIVE_SERVICES_KEY_2", "AZURE_COGNITIVE_SERVICES_KEY_2")
 AZURE_COGNITIVE_SERVICES_REGION=os.environ.get("AZURE_COGNITIVE_SERVICES_REGION", "AZURE_COGNITIVE_SERVICES_REGION")
+
+BOOK_ANSWER_CACHE_ENABLED = bool(int(os.environ.get("BOOK_ANSWER_CACHE_ENABLED", 0)))
+BOOK_ANSWER_CACHE_MIN_SIMILARITY = float(os.environ.get("BOOK_ANSWER_CACHE_MIN_SIMILARITY", 0.95))
+
+# Provider quotas shared by all processes; 0 disables a limit.
+AI_RATE_LIMITS = {
+    "open_ai": {
+        "rpm": int(os.environ.get("OPEN_AI_RPM_LIMIT", 0)),
+        "tpm": int(os.environ.get("OPEN_AI_TPM_LIMIT", 0)),
+        "user_share": float(os.environ.get("AI_RATE_LIMIT_USER_SHARE", 0.5)),
+    },
+    "google": {
+        "rpm": int(os.environ.get("GOOGLE_AI_RPM_LIMIT", 0)),
+        "tpm": int(os.environ.get("GOOGLE_AI_TPM_LIMIT", 0)),
+        "user_share": float(os.environ.get("AI_RATE_LIMIT_USER_SHARE", 0.5)),
+    },
+}
+
+# Backend of the provider clients: "live", "fake" (deterministic local fakes), "record" (live, saving responses)
+# or "replay" (saved responses only).
+AI_PROVIDER_BACKEND = os.environ.get("AI_PROVIDER_BACKEND", "live")
+AI_PROVIDER_RECORDINGS_DIR = os.environ.get("AI_PROVIDER_RECORDINGS_DIR", "/websocket_tmp/provider_recordings")
+AI_FAKE_PROVIDERS = {
+    "latency": os.environ.get("AI_FAKE_PROVIDERS_LATENCY", "lognormal:0.8:0.4"),
+    "error_rate": float(os.environ.get("AI_FAKE_PROVIDERS_ERROR_RATE", 0)),
+    "rate_limit_rate": float(os.environ.get("AI_FAKE_PROVIDERS_RATE_LIMIT_RATE", 0)),
+    "seed": int(os.environ.get("AI_FAKE_PROVIDERS_SEED", 0)),
+}
 # ---------------- END OF CONSTANT VARS ----------------
\ No newline at end of file
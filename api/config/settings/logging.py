@@ -0,0 +1,42 @@
+import os
+
+LOG_LEVEL = os.environ.get('LOG_LEVEL', 'INFO')
+
+# "json" (one JSON object per line, with span/trace fields) or "text".
+LOG_FORMAT = os.environ.get('LOG_FORMAT', 'json')
+
+# Records go straight to stdout: a QueueHandler would need its QueueListener thread started in every process,
+# including the forked Celery workers, or records would pile up in the queue unwritten.
+LOGGING = {
+    'version': 1,
+    'disable_existing_loggers': False,
+    'formatters': {
+        'json': {
+            '()': 'config.utils.log_formatter.JSONFormatter',
+        },
+        'text': {
+            'format': '%(asctime)s %(levelname)s %(name)s: %(message)s',
+        },
+    },
+    'handlers': {
+        'console': {
+            'class': 'logging.StreamHandler',
+            'formatter': LOG_FORMAT,
+        },
+    },
+    'root': {
+        'handlers': ['console'],
+        'level': LOG_LEVEL,
+    },
+    'loggers': {
+        'django': {
+            'level': os.environ.get('DJANGO_LOG_LEVEL', 'INFO'),
+        },
+    },
+}
+
+# Span durations, token counts, payload sizes and queue waits (see ai.utils.tracing.Tracer).
+METRICS_ENABLED = bool(int(os.environ.get('METRICS_ENABLED', 1)))
+METRICS_FLUSH_INTERVAL = int(os.environ.get('METRICS_FLUSH_INTERVAL', 10))
+METRICS_TOKEN = os.environ.get('METRICS_TOKEN', '')
+TRACE_SLOW_SPAN_SECONDS = float(os.environ.get('TRACE_SLOW_SPAN_SECONDS', 5))
@@ -1,7 +1,10 @@
+import logging
 from django.core.mail import BadHeaderError
 from django.conf import settings
 from sendgrid.helpers.mail import Mail, Attachment, FileContent, FileName, FileType, Disposition, Asm, Category
 
+logger = logging.getLogger(__name__)
+
 FROM_EMAIL = "info@iswad.tech"
 
 def _resolve_recipient(email):
@@ -20,9 +23,9 @@ def send_email(email, params, email_template_id):
         message.template_id = email_template_id   
         return settings.SG_SMTP.send(message)
     except BadHeaderError as e:
-        print(e)
+        logger.error("Invalid email header: %s", e)
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error("Error sending email: %s", e)
     return
 
 # ----------------------------------------------
@@ -51,7 +54,7 @@ def send_email_with_attachment(email, params, attached_file_info, email_template
         message.attachment = attachment
         return settings.SG_SMTP.send(message)
     except BadHeaderError as e:
-        print(e)
+        logger.error("Invalid email header: %s", e)
     except Exception as e:
-        print(f"Error sending email: {e}")
+        logger.error("Error sending email: %s", e)
     return
\ No newline at end of file
@@ -1,15 +1,18 @@
+import logging
 from django.contrib.auth.models import Group
 
+logger = logging.getLogger(__name__)
+
 LIST_OF_GROUPS = ["ADMIN", "CLIENT"]
 
 def build_group_list():
     for group in LIST_OF_GROUPS:
         new_group, created = Group.objects.get_or_create(name=group)
         if created:
-            print(f"New group named {new_group} created successfully!")
+            logger.info("New group named %s created successfully!", new_group)
         else:
-            print(
-                f"We couldn't create a group with name {group}. It seems {group} has already been declared as a group name.")
+            logger.info(
+                "We couldn't create a group with name %s. It seems %s has already been declared as a group name.", group, group)
     return
 
 def isAdmin(user):
@@ -1,8 +1,11 @@
+import logging
 from django.conf import settings
 import os
 import boto3
 from botocore.client import Config
 
+logger = logging.getLogger(__name__)
+
 ACCESS_KEY = settings.STORAGE_ACCESS_KEY
 SECRET_KEY = settings.STORAGE_SECRET_KEY
 END_POINT_URL = settings.STORAGE_END_POINT_URL
@@ -43,7 +46,7 @@ def upload_file_to_cloud(file, storage_space_name="images", file_key="nested/tes
             )
         return True
     except Exception as e:
-        print(e)
+        logger.error("Upload error: %s", e)
         return False
 
 
@@ -57,7 +60,7 @@ def get_signed_url_of_file_from_cloud(storage_space_name="images", file_key="nes
         )
         return signed_url
     except Exception as e:
-        print(e)
+        logger.error("Signed URL error: %s", e)
         return ""
 
 
@@ -70,7 +73,7 @@ def get_url_from_cloud(storage_space_name="images", file_key="nested/test_img.sv
         else:
             return get_signed_url_of_file_from_cloud(storage_space_name, file_key)
     except Exception as e:
-        print(e)
+        logger.error("Get URL error: %s", e)
         return ""
 
 
@@ -81,8 +84,8 @@ def delete_file_from_cloud(storage_space_name="images", file_key="nested/test_im
             Bucket=storage_space_name,
             Key=file_key
         )
-        print(f"File '{file_key}' deleted successfully.")
+        logger.info("File '%s' deleted successfully.", file_key)
         return True
     except Exception as e:
-        print(e)
+        logger.error("Delete error: %s", e)
         return False
\ No newline at end of file
@@ -1,9 +1,12 @@
+import logging
 from django.conf import settings
 import boto3
 from botocore.client import Config
 import base64
 import io
 
+logger = logging.getLogger(__name__)
+
 
 class CloudStorageManager:
     def __init__(self, region="nyc3"):
@@ -49,7 +52,7 @@ class CloudStorageManager:
                 )
             return True
         except Exception as e:
-            print(f"Upload error: {e}")
+            logger.error("Upload error: %s", e)
             return False
 
     def get_url(self, bucket="images", file_key="nested/test_img.svg", acl="private"):
@@ -62,7 +65,7 @@ class CloudStorageManager:
             else:
                 return self._get_signed_url(bucket, file_key)
         except Exception as e:
-            print(f"Get URL error: {e}")
+            logger.error("Get URL error: %s", e)
             return ""
 
     def delete_file(self, bucket="images", file_key="nested/test_img.svg"):
@@ -72,10 +75,10 @@ class CloudStorageManager:
                 Bucket=bucket,
                 Key=file_key
             )
-            print(f"File '{file_key}' deleted successfully.")
+            logger.info("File '%s' deleted successfully.", file_key)
             return True
         except Exception as e:
-            print(f"Delete error: {e}")
+            logger.error("Delete error: %s", e)
             return False
     
     def upload_base64(self, data, bucket="images", file_key="nested/test.wav", acl="private"):
@@ -98,9 +101,21 @@ class CloudStorageManager:
             )
             return file_key
         except Exception as e:
-            print(f"Base64 upload error: {e}")
+            logger.error("Base64 upload error: %s", e)
             return None
     
+    def download_base64(self, bucket="images", file_key="nested/test.wav"):
+        """Download a file from storage as a base64 string."""
+        try:
+            response = self.client.get_object(
+                Bucket=bucket,
+                Key=file_key
+            )
+            return base64.b64encode(response["Body"].read()).decode("utf-8")
+        except Exception as e:
+            logger.error("Base64 download error: %s", e)
+            return None
+
     # ------------------------------------------------------------
     # Private methods
     # ------------------------------------------------------------
@@ -114,5 +129,5 @@ class CloudStorageManager:
                 ExpiresIn=expires_in
             )
         except Exception as e:
-            print(f"Signed URL error: {e}")
+            logger.error("Signed URL error: %s", e)
             return ""
\ No newline at end of file
@@ -1,11 +1,12 @@
 from django.conf import settings
 from django.contrib import admin
 
-from . import user, media, profile
-from core.models import UserModel, MediaModel, ProfileModel
+from . import user, media, profile, credit_ledger
+from core.models import UserModel, MediaModel, ProfileModel, CreditLedgerEntryModel
 
 admin.site.site_header = "BASE REPO ADMIN DASHBOARD"
 
 admin.site.register(UserModel, user.UserAdmin)
 admin.site.register(MediaModel, media.MediaAdmin)
-admin.site.register(ProfileModel, profile.ProfileAdmin)
\ No newline at end of file
+admin.site.register(ProfileModel, profile.ProfileAdmin)
+admin.site.register(CreditLedgerEntryModel, credit_ledger.CreditLedgerEntryAdmin)
\ No newline at end of file
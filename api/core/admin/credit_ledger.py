@@ -0,0 +1,22 @@
+from django.contrib import admin
+
+
+class CreditLedgerEntryAdmin(admin.ModelAdmin):
+    autocomplete_fields = ['user']
+    list_display = ['user_email', 'amount', 'source', 'charged_at', 'flush_id']
+    list_per_page = 10
+    list_select_related = ['user']
+    search_fields = ['user__email__istartswith', 'source']
+
+    @admin.display(ordering='user__email')
+    def user_email(self, entry):
+        return entry.user.email
+
+    def has_add_permission(self, request):
+        return False
+
+    def has_change_permission(self, request, obj=None):
+        return False
+
+    def has_delete_permission(self, request, obj=None):
+        return False
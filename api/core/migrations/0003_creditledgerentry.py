@@ -0,0 +1,33 @@
+# Generated by Django 5.1.6 on 2026-10-17 12:00
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('core', '0002_profile_credit'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='CreditLedgerEntry',
+            fields=[
+                ('id', models.BigAutoField(editable=False, primary_key=True, serialize=False)),
+                ('created_at', models.DateTimeField(auto_now_add=True)),
+                ('updated_at', models.DateTimeField(auto_now=True)),
+                ('amount', models.FloatField()),
+                ('source', models.CharField(blank=True, default='', max_length=255)),
+                ('charged_at', models.DateTimeField()),
+                ('flush_id', models.CharField(db_index=True, max_length=64)),
+                ('user', models.ForeignKey(on_delete=django.db.models.deletion.CASCADE, related_name='credit_ledger_entries', to=settings.AUTH_USER_MODEL)),
+            ],
+            options={
+                'verbose_name_plural': 'Credit Ledger Entries',
+                'ordering': ('-charged_at',),
+                'indexes': [models.Index(fields=['user', 'charged_at'], name='credit_ledger_user_charged_idx')],
+            },
+        ),
+    ]
@@ -1,4 +1,4 @@
-from core.models import base_model, user, media, profile
+from core.models import base_model, user, media, profile, credit_ledger
 
 TimeStampedModel = base_model.TimeStampedModel
 TimeStampedUUIDModel = base_model.TimeStampedUUIDModel
@@ -7,4 +7,6 @@ UserModel = user.User
 
 MediaModel = media.Media
 
-ProfileModel = profile.Profile
\ No newline at end of file
+ProfileModel = profile.Profile
+
+CreditLedgerEntryModel = credit_ledger.CreditLedgerEntry
\ No newline at end of file
@@ -0,0 +1,31 @@
+from django.db import models
+from django.conf import settings
+
+from core.models.base_model import TimeStampedModel
+
+
+class CreditLedgerEntry(TimeStampedModel):
+    """
+    Append-only audit record of one credit charge (an LLM, STT, TTS, embedding or OCR call).
+    Entries are written in bulk when pending charges are flushed to the profiles;
+    flush_id ties the entries to the profile update that applied them.
+    """
+    user = models.ForeignKey(settings.AUTH_USER_MODEL,
+                             on_delete=models.CASCADE, related_name='credit_ledger_entries')
+    amount = models.FloatField()
+    source = models.CharField(blank=True, default="", max_length=255)
+    charged_at = models.DateTimeField()
+    flush_id = models.CharField(max_length=64, db_index=True)
+
+    def save(self, *args, **kwargs):
+        if self.pk:
+            raise ValueError("Credit ledger entries are append-only")
+        super().save(*args, **kwargs)
+
+    def __str__(self):
+        return f"{self.user_id}: {self.amount} ({self.source})"
+
+    class Meta:
+        verbose_name_plural = "Credit Ledger Entries"
+        ordering = ('-charged_at',)
+        indexes = [models.Index(fields=['user', 'charged_at'], name='credit_ledger_user_charged_idx')]
@@ -1,3 +1,4 @@
+import logging
 from django.conf import settings
 from datetime import datetime
 
@@ -6,6 +7,8 @@ from config.utils.email import send_email
 from core.models import UserModel
 from core.utils.sg_templates import SG_TEMPLATE_IDS
 
+logger = logging.getLogger(__name__)
+
 def send_activation_email_after_register(user_id, redirect_url=""):
     try:
         user = UserModel.objects.filter(id=user_id).first()
@@ -23,7 +26,7 @@ def send_activation_email_after_register(user_id, redirect_url=""):
         user.save(update_fields=["last_tokenized_email_sent"])
         return True
     except Exception as e:
-        print(f"Error sending activation email: {str(e)}")
+        logger.error("Error sending activation email: %s", e)
         return False
 
 def send_reset_password_email(user_id):
@@ -44,5 +47,5 @@ def send_reset_password_email(user_id):
         user.save(update_fields=["last_tokenized_email_sent"])
         return True
     except Exception as e:
-        print(f"Error sending reset password email: {str(e)}")
+        logger.error("Error sending reset password email: %s", e)
         return False
\ No newline at end of file
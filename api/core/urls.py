@@ -13,5 +13,7 @@ urlpatterns = [
     path('user-auth-with-google/', views.UserAuthWithGoogleViewSet),
     path('user-login-with-google/', views.UserLoginWithGoogleViewSet),
 
-    path('profile/', views.ProfileViewSet)
+    path('profile/', views.ProfileViewSet),
+
+    path('metrics/', views.MetricsViewSet)
 ]
@@ -1,4 +1,4 @@
-from . import user, profile
+from . import user, profile, metrics
 
 UserViewSet = user.UserViewSet.as_view()
 UserActivateAccountViewSet = user.UserActivateAccountViewSet.as_view()
@@ -10,4 +10,6 @@ UserLogOutViewSet = user.UserLogOutViewSet.as_view()
 UserAuthWithGoogleViewSet = user.UserAuthWithGoogleViewSet.as_view()
 UserLoginWithGoogleViewSet = user.UserLoginWithGoogleViewSet.as_view()
 
-ProfileViewSet = profile.ProfileViewSet.as_view()
\ No newline at end of file
+ProfileViewSet = profile.ProfileViewSet.as_view()
+
+MetricsViewSet = metrics.MetricsViewSet.as_view()
\ No newline at end of file
@@ -0,0 +1,23 @@
+import hmac
+
+from django.conf import settings
+from django.http import HttpResponse
+from rest_framework import views, permissions, response, status
+
+from ai.utils.tracing import Tracer
+
+
+class MetricsViewSet(views.APIView):
+    authentication_classes = []
+    permission_classes = [permissions.AllowAny]
+
+    def get(self, request, format=None):
+        token = getattr(settings, "METRICS_TOKEN", "")
+        if not token:
+            return response.Response(status=status.HTTP_403_FORBIDDEN, data={"message": "Metrics are disabled: METRICS_TOKEN is not set."})
+        if not hmac.compare_digest(request.headers.get("Authorization", "").encode("utf-8"), f"Bearer {token}".encode("utf-8")):
+            return response.Response(status=status.HTTP_401_UNAUTHORIZED, data={"message": "Invalid metrics token."})
+        try:
+            return HttpResponse(Tracer.export(), content_type="text/plain; version=0.0.4")
+        except Exception as e:
+            return response.Response(status=status.HTTP_503_SERVICE_UNAVAILABLE, data={"message": f"{str(e)}"})
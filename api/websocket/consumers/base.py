@@ -1,26 +1,51 @@
 from django.core.cache import cache
 from channels.generic.websocket import AsyncWebsocketConsumer
 import json
-import functools
+import base64
 import asyncio
+import time
 from rest_framework_simplejwt.tokens import AccessToken
 from urllib.parse import parse_qs
 from asgiref.sync import sync_to_async
 
 from core.models import UserModel, ProfileModel
+from ai.utils.tracing import Tracer
 
 class BaseConsumer(AsyncWebsocketConsumer):
+    # Handlers of the consumers timed as '<consumer>.<handler>' spans.
+    TRACED_STAGES = ("receive", "_start_the_class", "_audio_handler", "_respond_to_user", "_add_message_to_chat_history", "_get_next_content_to_teach")
+
+    def __init_subclass__(cls, **kwargs):
+        super().__init_subclass__(**kwargs)
+        for stage in cls.TRACED_STAGES:
+            if stage in vars(cls):
+                setattr(cls, stage, Tracer.traced(f"{cls.__name__}.{stage}")(vars(cls)[stage]))
 
     async def _send_json(self, data):
-        await self.send(text_data=json.dumps(data))
+        with Tracer.span("ws.serialize_json"):
+            text_data = json.dumps(data)
+        Tracer.observe("ai_payload_bytes", len(text_data), stage="ws.send_json")
+        await self.send(text_data=text_data)
 
     async def _send_bytes(self, data):
+        Tracer.observe("ai_payload_bytes", len(data), stage="ws.send_bytes")
         await self.send(bytes_data=data)
     
     async def _run_blocking(self, func, *args, **kwargs):
         loop = asyncio.get_running_loop()
-        return await loop.run_in_executor(None, functools.partial(func, *args, **kwargs))
+        submitted_at = time.perf_counter()
+
+        def run():
+            Tracer.observe("ai_queue_wait_seconds", time.perf_counter() - submitted_at, queue="ws_executor")
+            return func(*args, **kwargs)
+        return await loop.run_in_executor(None, Tracer.bind(run))
     
+    def _decode_voice_chunk(self, data):
+        with Tracer.span("ws.decode_audio"):
+            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+        Tracer.observe("ai_payload_bytes", len(audio_bytes), stage="ws.voice_chunk")
+        return audio_bytes
+
     async def _handle_error(self, message):
         return await self._send_json({"error": message, "remove_loader": True})
     
@@ -80,11 +105,7 @@ class BasePrivateRoomBasedConsumer(BasePrivateConsumer):
             await self._send_json({
                 "connection": True,
             })
-            cache_key = f"room_{self.room_id}_members"
-            group_members = cache.get(cache_key, [])
-            if self.profile.user.email not in group_members:
-                group_members.append(self.profile.user.email)
-                cache.set(cache_key, group_members, None)
+            group_members, _ = await sync_to_async(self._update_room_members)(joined=True)
             members = [user for user in group_members]
             await self._send_to_group({
                 "members": members,
@@ -96,14 +117,31 @@ class BasePrivateRoomBasedConsumer(BasePrivateConsumer):
     async def disconnect(self, close_code):
         if self.room_id:
             await self.channel_layer.group_discard(self._room_group_name(), self.channel_name)
-            cache_key = f"room_{self.room_id}_members"
-            group_members = cache.get(cache_key, [])
-            if self.profile and self.profile.user.email in group_members:
-                group_members.remove(self.profile.user.email)
-                cache.set(cache_key, group_members, None)
-                await self._send_to_group({"members": group_members})
+            if self.profile:
+                group_members, changed = await sync_to_async(self._update_room_members)(joined=False)
+                if changed:
+                    await self._send_to_group({"members": group_members})
         await super().disconnect(close_code)
 
+    def _update_room_members(self, joined):
+        """
+        Add the user to (or remove them from) the cached member list of the room.
+
+        Returns:
+            tuple: (members, changed)
+        """
+        cache_key = f"room_{self.room_id}_members"
+        group_members = cache.get(cache_key, [])
+        email = self.profile.user.email
+        changed = (email not in group_members) if joined else (email in group_members)
+        if changed:
+            if joined:
+                group_members.append(email)
+            else:
+                group_members.remove(email)
+            cache.set(cache_key, group_members, None)
+        return group_members, changed
+
 
     async def _send_to_group(self, data, event_type="broadcast_message"):
         """
@@ -1,6 +1,6 @@
 from django.conf import settings
 import json
-import base64
+import logging
 from google.cloud import texttospeech
 
 from ai.utils.open_ai_manager import OpenAIManager
@@ -8,6 +8,9 @@ from ai.utils.google_ai_manager import GoogleAIManager
 from ai.utils.audio_manager import AudioManager
 from websocket.consumers.base import BasePrivateConsumer
 
+logger = logging.getLogger(__name__)
+
+
 class ChatBotConsumer(BasePrivateConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -31,29 +34,32 @@ class ChatBotConsumer(BasePrivateConsumer):
     async def _audio_handler(self, data):
         try:
             chunk_id = int(data.get("chunk_id", 0))
-            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+            audio_bytes = self._decode_voice_chunk(data)
             audio_manager = AudioManager()
             wav_data = await self._run_blocking(audio_manager.convert_webm_to_wav, audio_bytes)
             processed_wav = await self._run_blocking(audio_manager.skip_seconds_wav, wav_data, chunk_id * 60)
             filtered_wav = await self._run_blocking(audio_manager.preprocess_wav, processed_wav)
-            open_ai_text = await self._run_blocking(self.openai_manager.stt, filtered_wav, input_type='bytes')
-            stt_chunks = self.openai_manager.build_chunks(text=open_ai_text, max_chunk_size=1000)
-            
+            open_ai_text = await self.openai_manager.astt(filtered_wav, input_type='bytes')
+            stt_chunks = await self._run_blocking(self.openai_manager.build_chunks, text=open_ai_text, max_chunk_size=1000)
+            # Every request clears the manager's messages, so the instructions are added after asummarize and again for each chunk.
+            # Each chunk is its own conversation: the previous chunk's evicted turns must not reach its prompt.
+            summary = await self.openai_manager.asummarize(open_ai_text, max_length=1000, max_chunk_size=1000)
+
             translated_text = ""
-            self.openai_manager.add_message("system", text="You are a helpful assistant that translates text chunks.")
-            self.openai_manager.add_message("system", text="You are given a chunk that has been processed from STT, so it might have some issues. First, try to improve the chunk if you feel TTS has trouble building meaningful sentences. Then, translate the improved chunk to English.")
-            self.openai_manager.add_message("system", text="You are provided with: previous_chunk, cur_chunk, next_chunk, and a summary of the chunk. Your duty is to translate only the cur_chunk to English, but you may improve the text from your understanding using the context.")
-            self.openai_manager.add_message("system", text="Use the previous_chunk and next_chunk, plus the summary, only to help you understand and improve the cur_chunk before translating it. Output only the improved and translated cur_chunk in English.")
-            summary = await self._run_blocking(self.openai_manager.summarize, open_ai_text, max_summary_input=15000, max_length=1000, max_chunk_size=1000)
             for i, chunk in enumerate(stt_chunks):
                 previous_chunk = stt_chunks[i-1]["text"] if i > 0 else ""
                 cur_chunk = chunk["text"]
                 next_chunk = stt_chunks[i+1]["text"] if i < len(stt_chunks)-1 else ""
+                self.openai_manager.clear_messages(clear_memory=True)
+                self.openai_manager.add_message("system", text="You are a helpful assistant that translates text chunks.")
+                self.openai_manager.add_message("system", text="You are given a chunk that has been processed from STT, so it might have some issues. First, try to improve the chunk if you feel TTS has trouble building meaningful sentences. Then, translate the improved chunk to English.")
+                self.openai_manager.add_message("system", text="You are provided with: previous_chunk, cur_chunk, next_chunk, and a summary of the chunk. Your duty is to translate only the cur_chunk to English, but you may improve the text from your understanding using the context.")
+                self.openai_manager.add_message("system", text="Use the previous_chunk and next_chunk, plus the summary, only to help you understand and improve the cur_chunk before translating it. Output only the improved and translated cur_chunk in English.")
                 self.openai_manager.add_message("system", text=f"previous_chunk: {previous_chunk}")
                 self.openai_manager.add_message("system", text=f"cur_chunk: {cur_chunk}")
                 self.openai_manager.add_message("system", text=f"next_chunk: {next_chunk}")
                 self.openai_manager.add_message("system", text=f"summary: {summary}")
-                translated = self.openai_manager.generate_response()
+                translated = await self.openai_manager.agenerate_response()
                 translated_text += translated + " "
 
             new_audio_bytes = await self._run_blocking(
@@ -73,7 +79,7 @@ class ChatBotConsumer(BasePrivateConsumer):
             }
             await self._send_json(metadata)
         except Exception as e:
-            print(e)
+            logger.exception("Audio processing error")
             await self._send_json({"error": f"Audio processing error: {str(e)}"})
 
     async def receive(self, text_data=None, bytes_data=None):
@@ -81,4 +87,4 @@ class ChatBotConsumer(BasePrivateConsumer):
             if text_data:
                await self._data_handler(text_data)
         except Exception as e:
-            print(e)
\ No newline at end of file
+            logger.exception("Error in receiving data")
\ No newline at end of file
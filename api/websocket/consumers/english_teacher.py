@@ -2,8 +2,7 @@ from django.conf import settings
 from django.db.models import F
 from pgvector.django import CosineDistance
 import json
-import base64
-import traceback
+import logging
 from google.cloud import texttospeech
 from asgiref.sync import sync_to_async
 
@@ -54,6 +53,9 @@ Teaching Plan for English Language Course:
 - Hint at the next lesson (e.g., “Next time, we’ll practice talking about your family”).
 """
 
+logger = logging.getLogger(__name__)
+
+
 
 
 
@@ -90,7 +92,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 elif task == "listen_to_audio":
                     await self._audio_handler(data)
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in receiving data")
             return await self._handle_error(f"Error in receiving data: {str(e)}")
 
     # --------------------------------------------
@@ -140,7 +142,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 f"- Focus only on creating motivation, building comfort, and explaining how the sessions will work.\n"
                 f"- Keep it short, friendly, and encouraging."
             )
-            result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions)
+            result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions, use_cache=True)
             await self._add_message_to_chat_history(result["ssml"], "ai_bot")
             return await self._send_json({
                 "speech": result["audio_base64"],
@@ -148,7 +150,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 "remove_loader": True,
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in starting the class")
             return await self._handle_error(f"Error in starting the class: {str(e)}")
 
     # --------------------------------------------
@@ -157,14 +159,14 @@ class TeacherConsumer(BasePrivateConsumer):
     async def _audio_handler(self, data):
         try:
             is_last_chunk = bool(data.get("is_last_chunk", False))
-            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+            audio_bytes = self._decode_voice_chunk(data)
             self.user_message += await self._run_blocking(
                 self.audio_manager.convert_audio_to_text, audio_bytes=audio_bytes, do_final_edition=True, target_language="en"
             )
             if is_last_chunk:
                 return await self._respond_to_user()
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in audio handler")
             return await self._handle_error(f"Error in audio handler: {str(e)}")
 
     # --------------------------------------------
@@ -213,5 +215,5 @@ class TeacherConsumer(BasePrivateConsumer):
                 "ssml": result["ssml"],
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in responding to user")
             return await self._handle_error(f"Error in responding to user: {str(e)}")
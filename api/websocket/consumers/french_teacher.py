@@ -2,8 +2,7 @@ from django.conf import settings
 from django.db.models import F
 from pgvector.django import CosineDistance
 import json
-import base64
-import traceback
+import logging
 from google.cloud import texttospeech
 from asgiref.sync import sync_to_async
 
@@ -109,6 +108,9 @@ EXAMPLE_FLOW_RESPONSE = """
      If wrong or silent → encourage gently and retry.)
 """
 
+logger = logging.getLogger(__name__)
+
+
 
 
 
@@ -147,7 +149,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 elif task == "listen_to_audio":
                     await self._audio_handler(data)
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in receiving data")
             return await self._handle_error(f"Error in receiving data: {str(e)}")
 
     # --------------------------------------------
@@ -203,7 +205,7 @@ class TeacherConsumer(BasePrivateConsumer):
             )
 
 
-            result = await self._run_blocking(sync_manager.full_synchronization_pipeline,  instructions=instructions, stt_language="fr-FR", tts_encoding=None, max_token=2000, voice_name="fr-FR-Wavenet-A")
+            result = await self._run_blocking(sync_manager.full_synchronization_pipeline,  instructions=instructions, stt_language="fr-FR", tts_encoding=None, max_token=2000, voice_name="fr-FR-Wavenet-A", use_cache=True)
             await self._add_message_to_chat_history(result["ssml"], "ai_bot")
             return await self._send_json({
                 "speech": result["audio_base64"],
@@ -211,7 +213,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 "remove_loader": True,
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in starting the class")
             return await self._handle_error(f"Error in starting the class: {str(e)}")
 
     # --------------------------------------------
@@ -220,14 +222,14 @@ class TeacherConsumer(BasePrivateConsumer):
     async def _audio_handler(self, data):
         try:
             is_last_chunk = bool(data.get("is_last_chunk", False))
-            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+            audio_bytes = self._decode_voice_chunk(data)
             self.user_message += await self._run_blocking(
                 self.audio_manager.convert_audio_to_text, audio_bytes=audio_bytes, do_final_edition=True, target_language=None
             )
             if is_last_chunk:
                 return await self._respond_to_user()
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in audio handler")
             return await self._handle_error(f"Error in audio handler: {str(e)}")
 
     # --------------------------------------------
@@ -283,5 +285,5 @@ class TeacherConsumer(BasePrivateConsumer):
                 "user_message": cur_message
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in responding to user")
             return await self._handle_error(f"Error in responding to user: {str(e)}")
@@ -1,11 +1,10 @@
 import asyncio
+import logging
 from django.core.cache import cache
 from django.conf import settings
 from django.db.models import F
 from pgvector.django import CosineDistance
 import json
-import base64
-import traceback
 from google.cloud import texttospeech
 from asgiref.sync import sync_to_async
 
@@ -109,6 +108,9 @@ TEACHING_TASKS = [
   }
 ]
 
+logger = logging.getLogger(__name__)
+
+
 class TeacherConsumer(BasePrivateRoomBasedConsumer):
     def __init__(self, *args, **kwargs):
         super().__init__(*args, **kwargs)
@@ -132,12 +134,12 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
             )
             self.audio_manager = AudioManager()
             self.tasks = RedisQueue(name=f"class_room_{self.room_id}_tasks", timeout=3600)
-            cache.set(f"class_room_{self.room_id}_is_active", True, timeout=3600)
+            await sync_to_async(cache.set)(f"class_room_{self.room_id}_is_active", True, timeout=3600)
             asyncio.create_task(self._task_runner())
 
     async def _task_runner(self):
-        while cache.get(f"class_room_{self.room_id}_is_active", False):
-            task = self.tasks.get_task()
+        while await sync_to_async(cache.get)(f"class_room_{self.room_id}_is_active", False):
+            task = await sync_to_async(self.tasks.get_task)()
             if task:
                 await self._run_task(task)
             else:
@@ -150,21 +152,24 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
                 task = data.get("task") or ""
                 if task == "start_the_class":
                     cache_key = f"class_room_{self.room_id}_class_started"
-                    class_started = cache.get(cache_key, False)
+                    class_started = await sync_to_async(cache.get)(cache_key, False)
                     if not class_started:
-                        cache.set(cache_key, True, None)
-                        self.tasks.add_priority_task({"task": "start_the_class", "metadata": None})
-                        for task in TEACHING_TASKS:
-                            self.tasks.add_task({
-                                "task": "teach_new_content",
-                                "metadata": dict(task)
-                            })
+                        await sync_to_async(cache.set)(cache_key, True, None)
+                        await sync_to_async(self._queue_class_tasks)()
                 elif task == "listen_to_audio":
-                    self.tasks.add_priority_task({"task": "listen_to_audio", "metadata": data})
+                    await sync_to_async(self.tasks.add_priority_task)({"task": "listen_to_audio", "metadata": data})
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in receiving data")
             return await self._handle_error(f"Error in receiving data: {str(e)}")
 
+    def _queue_class_tasks(self):
+        self.tasks.add_priority_task({"task": "start_the_class", "metadata": None})
+        for task in TEACHING_TASKS:
+            self.tasks.add_task({
+                "task": "teach_new_content",
+                "metadata": dict(task)
+            })
+
     async def _run_task(self, task):
         task_type = task.get("task")
         if task_type == "start_the_class":
@@ -221,7 +226,7 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
                 f"Then clearly outline the materials that will be covered in this course:\n{TEACHING_TASKS}\n"
                 f"Important: Do NOT begin teaching any HTML concepts yet — only greet, introduce methodology, and present the roadmap."
             )
-            result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions)
+            result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions, use_cache=True)
             await self._add_message_to_chat_history(result["ssml"], "ai_bot")
             return await self._send_to_group({
                 "speech": result["audio_base64"],
@@ -229,7 +234,7 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
                 "remove_loader": True,
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in starting the class")
             return await self._handle_error(f"Error in starting the class: {str(e)}")
 
     # --------------------------------------------
@@ -238,14 +243,14 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
     async def _audio_handler(self, data):
         try:
             is_last_chunk = bool(data.get("is_last_chunk", False))
-            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+            audio_bytes = self._decode_voice_chunk(data)
             self.user_message += await self._run_blocking(
                 self.audio_manager.convert_audio_to_text, audio_bytes=audio_bytes, do_final_edition=True, target_language="en"
             )
             if is_last_chunk:
                 return await self._respond_to_user()
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in audio handler")
             return await self._handle_error(f"Error in audio handler: {str(e)}")
 
     # --------------------------------------------
@@ -286,7 +291,7 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
                 "ssml": result["ssml"],
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in responding to user")
             return await self._handle_error(f"Error in responding to user: {str(e)}")
     
     # --------------------------------------------
@@ -309,7 +314,8 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
 
             result = await self._run_blocking(
                 sync_manager.full_synchronization_pipeline,
-                instructions
+                instructions,
+                use_cache=True
             )
 
             await self._add_message_to_chat_history(result["ssml"], "ai_bot")
@@ -323,5 +329,5 @@ class TeacherConsumer(BasePrivateRoomBasedConsumer):
                 "task_title": data.get("title")
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in teaching new content")
             return await self._handle_error(f"Error in teaching new content: {str(e)}")
\ No newline at end of file
@@ -1,9 +1,10 @@
 from django.conf import settings
 from django.db.models import F
 from pgvector.django import CosineDistance
+import asyncio
 import json
-import base64
-import traceback
+import logging
+import time
 from google.cloud import texttospeech
 from asgiref.sync import sync_to_async
 
@@ -11,6 +12,7 @@ from ai.utils.open_ai_manager import OpenAIManager
 from ai.utils.google_ai_manager import GoogleAIManager
 from ai.utils.audio_manager import AudioManager
 from ai.utils.synchronize_manager import SynchronizeManager
+from app.utils.book_answer_cache_manager import BookAnswerCacheManager
 from app.models import (
     BookForUserModel,
     BookChunkModel,
@@ -19,6 +21,9 @@ from app.models import (
 )
 from websocket.consumers.base import BasePrivateConsumer
 
+logger = logging.getLogger(__name__)
+
+
 
 class TeacherConsumer(BasePrivateConsumer):
     def __init__(self, *args, **kwargs):
@@ -62,7 +67,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 elif task == "listen_to_audio":
                     await self._audio_handler(data)
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in receiving data")
             return await self._handle_error(f"Error in receiving data: {str(e)}")
 
     # --------------------------------------------
@@ -200,7 +205,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 "- Mix engagement styles: end-of-block questions, quick recaps, relatable examples.\n"
                 "- Always close each response by engaging the student: ask if they have questions, confirm understanding, or invite them to continue with the next concept.\n"
             )
-            result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions)
+            result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions, use_cache=True)
             await self._add_message_to_chat_history(result["ssml"], "ai_bot")
             return await self._send_json({
                 "speech": result["audio_base64"],
@@ -208,7 +213,7 @@ class TeacherConsumer(BasePrivateConsumer):
                 "remove_loader": True,
             })
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in starting the class")
             return await self._handle_error(f"Error in starting the class: {str(e)}")
 
     # --------------------------------------------
@@ -217,7 +222,7 @@ class TeacherConsumer(BasePrivateConsumer):
     async def _audio_handler(self, data):
         try:
             is_last_chunk = bool(data.get("is_last_chunk", False))
-            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+            audio_bytes = self._decode_voice_chunk(data)
             self.user_message += await self._run_blocking(
                 self.audio_manager.convert_audio_to_text, audio_bytes=audio_bytes, do_final_edition=True, target_language="en"
             )
@@ -225,7 +230,7 @@ class TeacherConsumer(BasePrivateConsumer):
             if is_last_chunk:
                 return await self._respond_to_user()
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in audio handler")
             return await self._handle_error(f"Error in audio handler: {str(e)}")
 
     # --------------------------------------------
@@ -256,6 +261,22 @@ class TeacherConsumer(BasePrivateConsumer):
             )
             cur_message_embedding = processed_cur_message[0]["vector"]
 
+            answer_cache = BookAnswerCacheManager(self.book_for_user) if settings.BOOK_ANSWER_CACHE_ENABLED and cur_message_embedding else None
+            if answer_cache and not answer_cache.enabled:
+                answer_cache = None
+            if answer_cache:
+                cached_result = await sync_to_async(answer_cache.lookup)(cur_message_embedding, self.content_to_teach)
+                if cached_result:
+                    await self._add_message_to_chat_history(cached_result["ssml"], "ai_bot")
+                    return await self._send_json({
+                        "speech": cached_result["audio_base64"],
+                        "slide_alignment": cached_result["slide_alignment"],
+                        "ssml": cached_result["ssml"],
+                        "audio_length_sec": cached_result["audio_length_sec"],
+                        "timepoints": cached_result["timepoints"],
+                        "remove_loader": True,
+                    })
+
             threshold = 0.3
             similar_chunks = await sync_to_async(
                 lambda: list(
@@ -318,7 +339,9 @@ class TeacherConsumer(BasePrivateConsumer):
                 "confirm understanding, or invite them to continue to the next concept.\n"
             )
 
+            started_at = time.perf_counter()
             result = await self._run_blocking(sync_manager.full_synchronization_pipeline, instructions, cur_message)
+            generation_latency = time.perf_counter() - started_at
             await self._add_message_to_chat_history(result["ssml"], "ai_bot")
             with open(f"/websocket_tmp/ai/last_ssml_{self.user.id}.json", "w") as f:
                 json.dump({
@@ -329,7 +352,7 @@ class TeacherConsumer(BasePrivateConsumer):
                     "remove_loader": True,
                     "instructions": instructions,
                 }, f, ensure_ascii=False, indent=2)
-            return await self._send_json({
+            await self._send_json({
                 "speech": result["audio_base64"],
                 "slide_alignment": result["slide_alignment"],
                 "ssml": result["ssml"],
@@ -338,6 +361,15 @@ class TeacherConsumer(BasePrivateConsumer):
                 "remove_loader": True,
                 "instructions": instructions,
             })
+            if answer_cache:
+                # Stored after the answer is sent, so the upload and insert never delay the student.
+                asyncio.create_task(self._store_cached_answer(answer_cache, cur_message, cur_message_embedding, self.content_to_teach, result, generation_latency))
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in responding to user")
             return await self._handle_error(f"Error in responding to user: {str(e)}")
+
+    async def _store_cached_answer(self, answer_cache, *args):
+        try:
+            await sync_to_async(answer_cache.store)(*args)
+        except Exception:
+            logger.exception("Error in storing the cached answer")
@@ -1,7 +1,11 @@
 import json
+import logging
 
 from websocket.consumers.base import BasePrivateConsumer, BasePrivateRoomBasedConsumer
 
+logger = logging.getLogger(__name__)
+
+
 class TestSocketConsumer(BasePrivateRoomBasedConsumer):
 
     def __init__(self, *args, **kwargs):
@@ -12,7 +16,7 @@ class TestSocketConsumer(BasePrivateRoomBasedConsumer):
             if text_data:
                await self._data_handler(text_data)
         except Exception as e:
-            print(e)
+            logger.exception("Error in receiving data")
     
     # --------------------------------------------
     # Data handler Beginning
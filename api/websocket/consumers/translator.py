@@ -2,8 +2,7 @@ from django.conf import settings
 from django.db.models import F
 from pgvector.django import CosineDistance
 import json
-import base64
-import traceback
+import logging
 from google.cloud import texttospeech
 from asgiref.sync import sync_to_async
 
@@ -13,6 +12,9 @@ from ai.utils.audio_manager import AudioManager
 from ai.utils.synchronize_manager import SynchronizeManager
 from websocket.consumers.base import BasePrivateRoomBasedConsumer
 
+logger = logging.getLogger(__name__)
+
+
 
 class TranslateConsumer(BasePrivateRoomBasedConsumer):
     def __init__(self, *args, **kwargs):
@@ -45,7 +47,7 @@ class TranslateConsumer(BasePrivateRoomBasedConsumer):
                 if task == "listen_to_audio":
                     await self._audio_handler(data)
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in receiving data")
             return await self._handle_error(f"Error in receiving data: {str(e)}")
 
     # --------------------------------------------
@@ -54,14 +56,14 @@ class TranslateConsumer(BasePrivateRoomBasedConsumer):
     async def _audio_handler(self, data):
         try:
             is_last_chunk = bool(data.get("is_last_chunk", False))
-            audio_bytes = base64.b64decode(data.get("voice_chunk", ""))
+            audio_bytes = self._decode_voice_chunk(data)
             self.user_message += await self._run_blocking(
                 self.audio_manager.convert_audio_to_text, audio_bytes=audio_bytes, do_final_edition=True, target_language="en"
             )
             if is_last_chunk:
                 return await self._respond_to_user()
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in audio handler")
             return await self._handle_error(f"Error in audio handler: {str(e)}")
         
      # --------------------------------------------
@@ -72,5 +74,5 @@ class TranslateConsumer(BasePrivateRoomBasedConsumer):
             cur_message = self.user_message.strip()
             pass
         except Exception as e:
-            traceback.print_exc()
+            logger.exception("Error in responding to user")
             return await self._handle_error(f"Error in responding to user: {str(e)}")
\ No newline at end of file